@@ -0,0 +1,196 @@
+# analytics.py
+# This file computes utilization, idle gaps, department load and makespan metrics from a finished schedule.
+
+import numpy as np
+import pandas as pd
+from utils import get_base_task_name
+
+class ScheduleAnalytics:
+    """
+    Columnar view of a finished schedule.
+
+    schedule.assignments is flattened once into NumPy arrays (resource code,
+    task code, day, work time); every metric below is then computed with
+    vectorized operations over those arrays, so it stays fast on schedules
+    with millions of (task, day) entries. Each metric is returned as a DataFrame.
+    """
+
+    def __init__(self, schedule):
+        # Every resource gets a code, including resources with no assignments
+        self.resource_names = list(dict.fromkeys(
+            [r.name for r in schedule.resources] + list(schedule.assignments)))
+        resource_codes = {name: code for code, name in enumerate(self.resource_names)}
+        departments = {}
+        for resource in schedule.resources:
+            departments.setdefault(resource.name, resource.department)
+        department_codes, self.department_names = pd.factorize(
+            pd.Series([departments.get(name) for name in self.resource_names], dtype=object))
+        self.resource_departments = department_codes
+
+        entry_tasks = []
+        resource_column, task_column, day_column, work_column = [], [], [], []
+        for resource_name, assignments in schedule.assignments.items():
+            if not assignments:
+                continue
+            tasks, days, work_times = zip(*assignments)
+            entry_tasks.extend(tasks)
+            resource_column.append(np.full(len(tasks), resource_codes[resource_name], dtype=np.int64))
+            task_column.append(np.fromiter(map(id, tasks), dtype=np.int64, count=len(tasks)))
+            day_column.append(np.asarray(days, dtype=np.int64))
+            work_column.append(np.asarray(work_times, dtype=np.float64))
+
+        self.resource = _concatenate(resource_column, np.int64)
+        self.day = _concatenate(day_column, np.int64)
+        self.work_time = _concatenate(work_column, np.float64)
+        # Task objects are coded by identity; the first entry of each code gives back its Task
+        self.task, task_ids = pd.factorize(_concatenate(task_column, np.int64))
+        first_entry = np.empty(len(task_ids), dtype=np.int64)
+        first_entry[self.task[::-1]] = np.arange(len(self.task) - 1, -1, -1)
+        self.tasks = [entry_tasks[i] for i in first_entry]
+        self.makespan = int(self.day.max()) if len(self.day) else 0
+        self._busy = None
+
+    def frame(self):
+        """One row per assignment entry, with resource, department, task and base task as categoricals."""
+        task_names = pd.Series([task.name for task in self.tasks], dtype=object)
+        base_names = pd.Series([get_base_task_name(task) for task in self.tasks], dtype=object)
+        return pd.DataFrame({
+            "resource": pd.Categorical.from_codes(self.resource, categories=self.resource_names),
+            "department": _categorical(self.department_names, self.resource_departments[self.resource]),
+            "task": _categorical(*_factorized(task_names, self.task)),
+            "base_task": _categorical(*_factorized(base_names, self.task)),
+            "day": self.day,
+            "work_time": self.work_time,
+        })
+
+    def utilization(self):
+        """
+        Per resource: booked work, the days it works on, its first and last day,
+        and utilization as booked work over the makespan.
+        """
+        n_resources = len(self.resource_names)
+        busy = np.bincount(self.resource, weights=self.work_time, minlength=n_resources)
+        active_days, first_day, last_day = self._day_span(*self._busy_days(), n_resources)
+
+        return pd.DataFrame({
+            "department": self._department_labels(),
+            "work_time": busy,
+            "active_days": active_days,
+            "first_day": first_day,
+            "last_day": last_day,
+            "utilization": busy / self.makespan if self.makespan else np.zeros(n_resources),
+        }, index=pd.Index(self.resource_names, name="resource"))
+
+    def idle_gaps(self, min_length=1):
+        """
+        Every run of fully idle days of each resource between day 1 and the
+        makespan, including resources that never work, as (start, end, length) rows.
+        """
+        width = self.makespan + 2
+        busy_resources, busy_days = self._busy_days()
+        # Sentinel days 0 and makespan + 1 turn leading, trailing and whole-schedule gaps into ordinary gaps
+        sentinels = np.arange(len(self.resource_names), dtype=np.int64) * width
+        keys = np.sort(np.concatenate([busy_resources * width + busy_days, sentinels, sentinels + width - 1]))
+        resources, days = keys // width, keys % width
+
+        length = np.diff(days) - 1
+        gap = (resources[1:] == resources[:-1]) & (length >= max(min_length, 1))
+        gap_resources = resources[:-1][gap]
+        return pd.DataFrame({
+            "resource": pd.Categorical.from_codes(gap_resources, categories=self.resource_names),
+            "department": self._department_labels()[gap_resources],
+            "start_day": days[:-1][gap] + 1,
+            "end_day": days[1:][gap] - 1,
+            "length": length[gap],
+        })
+
+    def department_load(self, normalize=False):
+        """
+        Work booked in each department on each day, as a day x department table.
+        With normalize=True each column is divided by the department's resource
+        count, giving the share of its capacity in use.
+        """
+        n_departments = len(self.department_names)
+        departments = self.resource_departments[self.resource]
+        load = np.bincount(departments * self.makespan + (self.day - 1), weights=self.work_time,
+                           minlength=n_departments * self.makespan).reshape(n_departments, self.makespan).T
+        if normalize:
+            load = load / np.maximum(np.bincount(self.resource_departments, minlength=n_departments), 1)
+        return pd.DataFrame(load, columns=pd.Index(self.department_names, name="department"),
+                            index=pd.RangeIndex(1, self.makespan + 1, name="day"))
+
+    def makespan_breakdown(self):
+        """
+        Per department: when its work starts and finishes, how much of its
+        capacity over the makespan it uses, and whether it finishes on the last
+        day of the schedule, i.e. is on the makespan's critical tail.
+        """
+        n_departments = len(self.department_names)
+        departments = self.resource_departments[self.resource]
+        resources = np.bincount(self.resource_departments, minlength=n_departments)
+        work = np.bincount(departments, weights=self.work_time, minlength=n_departments)
+        department_tasks = _unique(departments * max(len(self.tasks), 1) + self.task)
+        tasks = np.bincount(department_tasks // max(len(self.tasks), 1), minlength=n_departments)
+        department_days = _unique(departments * (self.makespan + 2) + self.day)
+        _, start_day, finish_day = self._day_span(department_days // (self.makespan + 2),
+                                                  department_days % (self.makespan + 2), n_departments)
+
+        capacity = resources * self.makespan
+        return pd.DataFrame({
+            "resources": resources,
+            "tasks": tasks,
+            "work_time": work,
+            "start_day": start_day,
+            "finish_day": finish_day,
+            "utilization": np.divide(work, capacity, out=np.zeros(n_departments), where=capacity > 0),
+            "finishes_last": (finish_day == self.makespan) & (work > 0),
+        }, index=pd.Index(self.department_names, name="department"))
+
+    def sheets(self):
+        """The metrics that go into the analytics sheets of the Excel export, by sheet name."""
+        return {
+            "Utilization": self.utilization(),
+            "Idle Gaps": self.idle_gaps(),
+            "Department Load": self.department_load(),
+            "Makespan": self.makespan_breakdown(),
+        }
+
+    def _busy_days(self):
+        """The distinct (resource, day) pairs with any booking, sorted by resource then day."""
+        if self._busy is None:
+            keys = _unique(self.resource * (self.makespan + 2) + self.day)
+            self._busy = keys // (self.makespan + 2), keys % (self.makespan + 2)
+        return self._busy
+
+    @staticmethod
+    def _day_span(groups, days, n_groups):
+        """Count, first and last day of each group, given (group, day) pairs sorted by group then day."""
+        counts = np.bincount(groups, minlength=n_groups)
+        first_day = np.zeros(n_groups, dtype=np.int64)
+        last_day = np.zeros(n_groups, dtype=np.int64)
+        ends = np.cumsum(counts)
+        present = counts > 0
+        first_day[present] = days[(ends - counts)[present]]
+        last_day[present] = days[ends[present] - 1]
+        return counts, first_day, last_day
+
+    def _department_labels(self):
+        return np.asarray(self.department_names, dtype=object)[self.resource_departments]
+
+def _concatenate(columns, dtype):
+    return np.concatenate(columns) if columns else np.empty(0, dtype=dtype)
+
+def _unique(keys):
+    """Sorted distinct values of an integer array; a plain sort is much faster than np.unique on large arrays."""
+    keys = np.sort(keys)
+    if len(keys):
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return keys
+
+def _factorized(labels, codes):
+    """Map per-task labels to category codes for each entry, hashing each task once rather than each entry."""
+    label_codes, categories = pd.factorize(labels)
+    return categories, label_codes[codes]
+
+def _categorical(categories, codes):
+    return pd.Categorical.from_codes(codes, categories=categories)
@@ -0,0 +1,38 @@
+# assets.py
+# This file pre-renders resized images once and caches them as PNGs that Tk can load without PIL.
+
+import os
+import tkinter as tk
+from utils import resource_path
+
+# Where resized images are kept between launches
+ASSET_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "task_scheduling")
+
+def cached_image_path(filename, size):
+    """
+    Path of a PNG of the bundled image filename resized to size, a (width,
+    height) pair. The LANCZOS resize runs once and its result is cached; the
+    cache name includes the source's modification time, so an updated image
+    is rendered again.
+    """
+    source = resource_path(filename)
+    base = os.path.splitext(os.path.basename(filename))[0]
+    cached = os.path.join(ASSET_CACHE_DIR, f"{base}_{size[0]}x{size[1]}_{os.stat(source).st_mtime_ns}.png")
+    if not os.path.exists(cached):
+        # PIL is only imported on the launch that renders the image
+        from PIL import Image
+        os.makedirs(ASSET_CACHE_DIR, exist_ok=True)
+        temporary = f"{cached}.{os.getpid()}.tmp"
+        with Image.open(source) as image:
+            image.resize(size, Image.Resampling.LANCZOS).save(temporary, "PNG")
+        os.replace(temporary, cached)
+    return cached
+
+def load_image(filename, size, master=None):
+    """A Tk image of filename resized to size, read from the cache. Falls back to resizing in memory if the cache cannot be written or read back."""
+    try:
+        return tk.PhotoImage(master=master, file=cached_image_path(filename, size))
+    except (OSError, tk.TclError):
+        from PIL import Image, ImageTk
+        with Image.open(resource_path(filename)) as image:
+            return ImageTk.PhotoImage(image.resize(size, Image.Resampling.LANCZOS), master=master)
@@ -0,0 +1,51 @@
+# bench_dependencies.py
+# This file benchmarks dependency graph construction and topological sorting on synthetic task rows.
+
+import argparse
+import json
+import random
+import time
+from data_structures import Task
+from excel_io import set_up_dependencies
+from utils import build_dependency_graph, topological_sort
+
+def make_tasks(rows, departments, seed=0):
+    """Create the tasks read_tasks_from_excel would produce for `rows` feature rows."""
+    rng = random.Random(seed)
+    tasks = []
+    for row in range(rows):
+        priority = rng.randint(1, 3)
+        for department in departments:
+            if rng.random() < 0.8:
+                tasks.append(Task(f"{department}: Feature {row}", {department: rng.choice([0.5, 1, 2, 3])}, priority))
+    return tasks
+
+def run(sizes, rules):
+    departments = list(dict.fromkeys(list(rules) + [dep for deps in rules.values() for dep in deps]))
+    print(f"{'rows':>8} {'tasks':>8} {'edges':>8} {'set_up (s)':>11} {'graph (s)':>10} {'topo (s)':>9} {'us/task':>8}")
+    for rows in sizes:
+        tasks = make_tasks(rows, departments)
+
+        start = time.perf_counter()
+        set_up_dependencies(tasks, rules)
+        set_up_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        graph = build_dependency_graph(tasks)
+        graph_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        topological_sort(tasks, graph)
+        topo_time = time.perf_counter() - start
+
+        edges = sum(len(task.dependencies) for task in tasks)
+        per_task = (set_up_time + graph_time + topo_time) / len(tasks) * 1e6
+        print(f"{rows:>8} {len(tasks):>8} {edges:>8} {set_up_time:>11.3f} {graph_time:>10.3f} {topo_time:>9.3f} {per_task:>8.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time dependency setup and topological sort as the number of task rows grows.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--rules", default="dependency_rules.json")
+    args = parser.parse_args()
+    with open(args.rules, 'r') as f:
+        run(args.sizes, json.load(f))
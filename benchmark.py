@@ -0,0 +1,134 @@
+# benchmark.py
+# This file times each stage of the scheduling pipeline across a sweep of synthetic workload sizes.
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from analytics import ScheduleAnalytics
+from excel_io import build_tasks, clear_input_cache, generate_excel_output, load_input, build_resources, set_up_dependencies
+from main import combine_qc_tasks
+from scheduler import PLACEMENT_POLICIES, Scheduler
+from utils import topological_sort
+from workload_generator import PRIORITY_DISTRIBUTIONS, write_workload
+
+STAGES = ["read_tasks_from_excel", "set_up_dependencies", "topological_sort", "schedule_tasks", "generate_excel_output"]
+
+def run_pipeline(input_file, rules, output_file, placement_policy="first_fit"):
+    """
+    Run the pipeline of main.main once and return the wall-clock seconds spent
+    in each stage, along with the makespan, mean resource utilization and
+    idle resource-days of the schedule it produced.
+    """
+    timings = {}
+
+    clear_input_cache()
+    start = time.perf_counter()
+    parsed = load_input(input_file)
+    tasks = build_tasks(parsed)
+    resources = build_resources(parsed)
+    timings["read_tasks_from_excel"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    set_up_dependencies(tasks, rules)
+    timings["set_up_dependencies"] = time.perf_counter() - start
+
+    combine_qc_tasks(tasks)
+
+    start = time.perf_counter()
+    sorted_tasks = topological_sort(tasks)
+    timings["topological_sort"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    schedule = Scheduler(resources, placement_policy=placement_policy)
+    schedule.schedule_tasks(sorted_tasks)
+    timings["schedule_tasks"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    generate_excel_output(schedule, output_file, auto_open=False)
+    timings["generate_excel_output"] = time.perf_counter() - start
+
+    analytics = ScheduleAnalytics(schedule)
+    quality = {
+        "makespan": analytics.makespan,
+        "utilization": round(float(analytics.utilization()["utilization"].mean()), 4),
+        "idle_days": int(analytics.idle_gaps()["length"].sum()),
+    }
+    return len(tasks), len(resources), timings, quality
+
+def run_sweep(sizes, departments, resources, priority_distribution, rule_density, repeat, workdir,
+              placement_policies=("first_fit",)):
+    results = []
+    for size in sizes:
+        n_resources = resources or max(departments, size // 20)
+        input_file = os.path.join(workdir, f"bench_{size}.xlsx")
+        rules_file = os.path.join(workdir, f"bench_{size}_rules.json")
+        output_file = os.path.join(workdir, f"bench_{size}_schedule.xlsx")
+        write_workload(input_file, rules_file, size, departments, n_resources,
+                       priority_distribution=priority_distribution, rule_density=rule_density)
+        with open(rules_file, 'r') as f:
+            rules = json.load(f)
+
+        for placement_policy in placement_policies:
+            # Keep the fastest run of each stage to reduce noise
+            best = {}
+            for _ in range(repeat):
+                n_tasks, n_resources, timings, quality = run_pipeline(input_file, rules, output_file, placement_policy)
+                for stage, seconds in timings.items():
+                    best[stage] = min(best.get(stage, seconds), seconds)
+
+            result = {
+                "base_tasks": size,
+                "tasks": n_tasks,
+                "resources": n_resources,
+                "placement_policy": placement_policy,
+                "stages": {stage: round(best[stage], 6) for stage in STAGES},
+                "total": round(sum(best.values()), 6),
+                **quality,
+            }
+            results.append(result)
+            print_result(result)
+    return results
+
+def print_header():
+    print(f"{'base':>7} {'tasks':>7} {'res':>5} {'placement':>10} " + " ".join(f"{stage[:14]:>14}" for stage in STAGES)
+          + f" {'total':>9} {'makespan':>8} {'util':>6} {'idle':>8}")
+
+def print_result(result):
+    stages = " ".join(f"{result['stages'][stage]:>14.4f}" for stage in STAGES)
+    print(f"{result['base_tasks']:>7} {result['tasks']:>7} {result['resources']:>5} {result['placement_policy']:>10} {stages}"
+          f" {result['total']:>9.4f} {result['makespan']:>8} {result['utilization']:>6.3f} {result['idle_days']:>8}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline stage across synthetic workload sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="Numbers of base tasks to sweep.")
+    parser.add_argument("--departments", type=int, default=8)
+    parser.add_argument("--resources", type=int, default=None, help="Resources per workload (default: base tasks / 20).")
+    parser.add_argument("--priorities", choices=list(PRIORITY_DISTRIBUTIONS), default="uniform")
+    parser.add_argument("--rule-density", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the fastest time of each stage is kept.")
+    parser.add_argument("--placement", choices=PLACEMENT_POLICIES, nargs="+", default=["first_fit"],
+                        help="Placement policies to compare on every workload (default: first_fit).")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to save the machine-readable results.")
+    parser.add_argument("--workdir", help="Keep the generated workbooks in this directory.")
+    args = parser.parse_args()
+
+    print_header()
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        results = run_sweep(args.sizes, args.departments, args.resources, args.priorities, args.rule_density, args.repeat, args.workdir,
+                                args.placement)
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            results = run_sweep(args.sizes, args.departments, args.resources, args.priorities, args.rule_density, args.repeat, workdir,
+                                args.placement)
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            "python": platform.python_version(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "workdir")},
+            "results": results,
+        }, f, indent=4)
+    print(f"Results saved to {args.output}")
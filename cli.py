@@ -0,0 +1,260 @@
+# cli.py
+# This file contains the command-line entry point for headless and batch scheduling runs.
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from main import main
+from output_writers import WRITERS
+from scheduler import PLACEMENT_POLICIES, PRIORITY_POLICIES
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Schedule tasks from Excel workbooks without the GUI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Schedule a single workbook.")
+    run_parser.add_argument("input", help="Excel file with the tasks (Sheet1) and resources (Sheet2).")
+    run_parser.add_argument("-o", "--output",
+                            help="Output file (default: output.xlsx, or output with the extension of --format).")
+    run_parser.add_argument("--open", action="store_true", help="Open the output file once it is written.")
+    run_parser.add_argument("--metrics", help="Write a JSON report of stage timings and hot-path counters to this file.")
+    run_parser.add_argument("--profile", help="Write a cProfile dump of the run to this file.")
+    run_parser.add_argument("--state", help="Save the finished schedule to this JSON file for later incremental runs.")
+    run_parser.add_argument("--incremental", action="store_true",
+                            help="Re-place only tasks that changed since the schedule saved in --state, and their dependents.")
+    run_parser.add_argument("--optimize", type=float, metavar="SECONDS",
+                            help="Spend this many seconds improving the greedy schedule's makespan.")
+    run_parser.add_argument("--restarts", type=int, default=None,
+                            help="Parallel optimizer restarts (default: one per CPU).")
+    run_parser.add_argument("--partition", type=int, nargs="?", const=0, metavar="WORKERS",
+                            help="Schedule groups of tasks that share no dependencies or departments in parallel "
+                                 "processes, WORKERS at a time (default: one per CPU). The schedule is unchanged.")
+    add_common_arguments(run_parser)
+
+    batch_parser = subparsers.add_parser("batch", help="Schedule many independent workbooks in parallel.")
+    batch_parser.add_argument("inputs", nargs="+", help="Excel files to schedule.")
+    batch_parser.add_argument("--output-dir", default=".", help="Directory for the schedules (default: current directory).")
+    batch_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: one per CPU).")
+    batch_parser.add_argument("--summary", help="Also write the per-run summary to this JSON file.")
+    batch_parser.add_argument("--metrics", action="store_true", help="Write a <input>_metrics.json report next to each schedule.")
+    batch_parser.add_argument("--profile", action="store_true", help="Write a <input>.prof cProfile dump next to each schedule.")
+    add_common_arguments(batch_parser)
+
+    scenarios_parser = subparsers.add_parser("scenarios", help="Compare what-if variants of one workbook in parallel.")
+    scenarios_parser.add_argument("input", help="Excel file with the tasks (Sheet1) and resources (Sheet2).")
+    scenarios_parser.add_argument("scenarios", help="JSON list of scenarios (rules, add_resources, remove_resources, priority_weights).")
+    scenarios_parser.add_argument("--rules", default="dependency_rules.json", help="Base dependency rules JSON file (default: dependency_rules.json).")
+    scenarios_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: one per CPU).")
+    scenarios_parser.add_argument("-o", "--output", help="Also write the comparison table to this CSV file.")
+
+    portfolio_parser = subparsers.add_parser("portfolio", help="Schedule several project workbooks against one shared resource pool.")
+    portfolio_parser.add_argument("inputs", nargs="+", help="Project workbooks; only their tasks sheets (Sheet1) are read.")
+    portfolio_parser.add_argument("--resources", required=True, help="Excel file whose resources sheet (Sheet2) every project shares.")
+    portfolio_parser.add_argument("--weights", type=float, nargs="+",
+                                  help="Share of the resources of each project, in input order (default: 1 each).")
+    portfolio_parser.add_argument("-o", "--output",
+                                  help="Combined schedule (default: portfolio.xlsx, or portfolio with the extension of --format).")
+    portfolio_parser.add_argument("--summary", help="Also write the per-project completion days to this CSV file.")
+    portfolio_parser.add_argument("--open", action="store_true", help="Open the output file once it is written.")
+    add_common_arguments(portfolio_parser)
+
+    serve_parser = subparsers.add_parser("serve", help="Keep a schedule in memory and answer JSON requests on localhost.")
+    serve_parser.add_argument("--load", metavar="INPUT", help="Excel file to load and schedule at start-up.")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1).")
+    serve_parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765).")
+    serve_parser.add_argument("--socket", help="Listen on this Unix socket instead of a TCP port.")
+    add_common_arguments(serve_parser)
+
+    return parser
+
+def add_common_arguments(parser):
+    parser.add_argument("--rules", default="dependency_rules.json", help="Dependency rules JSON file (default: dependency_rules.json).")
+    parser.add_argument("--format", choices=list(WRITERS), help="Output format (default: taken from the output file extension).")
+    parser.add_argument("--policy", choices=PRIORITY_POLICIES, default="list",
+                        help="Order of placing ready tasks: list keeps the sorted order, critical_path places the "
+                             "longest remaining chains first within each priority, heft ignores priority (default: list).")
+    parser.add_argument("--placement", choices=PLACEMENT_POLICIES, default="first_fit",
+                        help="How a task picks its resource: first_fit starts it earliest, backfill finishes it earliest, "
+                             "filling gaps in calendars (default: first_fit).")
+    parser.add_argument("--split-tasks", action="store_true",
+                        help="Divide tasks across up to their Max Split resources of the same department.")
+    parser.add_argument("--analytics", action="store_true",
+                        help="Add utilization, idle gap, department load and makespan sheets (xlsx output only).")
+
+def run_job(tasks_file, output_file, output_format, rules_file, metrics_file=None, profile_file=None,
+            state_file=None, incremental=False, analytics=False, optimize=None, restarts=None,
+            priority_policy="list", placement_policy="first_fit", partition=None, split_tasks=False):
+    """Schedule one workbook and report its outcome instead of raising, so a batch keeps going."""
+    start = time.perf_counter()
+    try:
+        main(tasks_file, output_file, output_format=output_format, auto_open=False, rules_file=rules_file,
+             metrics_file=metrics_file, profile_file=profile_file, state_file=state_file, incremental=incremental,
+             analytics=analytics, optimize=optimize, restarts=restarts, priority_policy=priority_policy,
+             placement_policy=placement_policy, partition=partition, split_tasks=split_tasks)
+        status, error = "ok", None
+    except Exception as e:
+        status, error = "failed", f"{type(e).__name__}: {e}"
+    return {
+        "input": tasks_file,
+        "output": output_file,
+        "status": status,
+        "seconds": round(time.perf_counter() - start, 3),
+        "error": error,
+    }
+
+def output_file_for(output_file, output_format, default_stem):
+    """
+    The output file of a single run: output_file, or default_stem with the
+    extension of output_format. Raises ValueError when output_format is given
+    and output_file has another format's extension, which would be written
+    in the wrong format.
+    """
+    extension = WRITERS[output_format or "xlsx"].extension
+    if output_file is None:
+        return f"{default_stem}{extension}"
+    if output_format and os.path.splitext(output_file)[1].lower() != extension:
+        raise ValueError(f"--format {output_format} writes {extension} files, but the output file is {output_file}")
+    return output_file
+
+def batch_output_stems(tasks_files):
+    """
+    Output file stem of each workbook: its file name without the extension.
+    Workbooks whose names collide, such as a/plan.xlsx and b/plan.xlsx, get
+    their 1-based position in tasks_files appended, so no two runs of a batch
+    write to the same files.
+    """
+    stems = [os.path.splitext(os.path.basename(tasks_file))[0] for tasks_file in tasks_files]
+    unique = []
+    for i, stem in enumerate(stems, start=1):
+        if stems.count(stem) > 1:
+            # Also steer clear of another workbook that is already called plan_2
+            stem = f"{stem}_{i}"
+            while stem in stems:
+                stem += f"_{i}"
+        unique.append(stem)
+    return unique
+
+def batch_output_file(stem, output_dir, suffix):
+    return os.path.join(output_dir, f"{stem}{suffix}")
+
+def run_batch(tasks_files, output_dir, output_format=None, rules_file='dependency_rules.json', workers=None,
+              collect_metrics=False, profile=False, analytics=False, priority_policy="list",
+              placement_policy="first_fit", split_tasks=False):
+    """Fan independent workbooks out over a process pool and return one summary entry per workbook, in input order."""
+    os.makedirs(output_dir, exist_ok=True)
+    extension = WRITERS[output_format or "xlsx"].extension
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                run_job,
+                tasks_file,
+                batch_output_file(stem, output_dir, f"_schedule{extension}"),
+                output_format,
+                rules_file,
+                batch_output_file(stem, output_dir, "_metrics.json") if collect_metrics else None,
+                batch_output_file(stem, output_dir, ".prof") if profile else None,
+                analytics=analytics,
+                priority_policy=priority_policy,
+                placement_policy=placement_policy,
+                split_tasks=split_tasks,
+            )
+            for tasks_file, stem in zip(tasks_files, batch_output_stems(tasks_files))
+        ]
+        return [future.result() for future in futures]
+
+def print_summary(results, total_seconds):
+    print(f"\n{'status':<8} {'seconds':>8}  input -> output")
+    for result in results:
+        line = f"{result['status']:<8} {result['seconds']:>8.3f}  {result['input']} -> {result['output']}"
+        if result["error"]:
+            line += f"\n{'':<19}{result['error']}"
+        print(line)
+    failed = sum(result["status"] != "ok" for result in results)
+    print(f"\n{len(results) - failed} succeeded, {failed} failed in {total_seconds:.3f}s")
+
+def run_scenarios_command(args):
+    from scenarios import load_scenarios, run_scenarios
+
+    table = run_scenarios(args.input, load_scenarios(args.scenarios), args.rules, args.workers)
+    print(table.to_string())
+    if args.output:
+        table.to_csv(args.output)
+        print(f"Comparison saved to {args.output}")
+    return 0 if (table["status"] == "ok").all() else 1
+
+def run_portfolio_command(args):
+    from portfolio import schedule_portfolio
+
+    _, summary = schedule_portfolio(args.inputs, args.resources, args.output, args.weights, args.rules, args.format,
+                                    args.analytics, args.policy, args.placement, args.split_tasks, args.open)
+    print(summary.to_string())
+    if args.summary:
+        summary.to_csv(args.summary)
+        print(f"Project summary saved to {args.summary}")
+    return 0
+
+def run_serve_command(args):
+    from service import SchedulingService, serve
+
+    service = SchedulingService(args.policy, args.placement, args.format, args.analytics, args.split_tasks)
+    if args.load:
+        summary = service.load(args.load, args.rules)
+        print(f"Loaded {args.load}: {summary['tasks']} tasks, makespan {summary['makespan']} days")
+    serve(service, args.host, args.port, args.socket)
+    return 0
+
+def run_cli(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == "scenarios":
+        return run_scenarios_command(args)
+
+    if args.command == "serve":
+        return run_serve_command(args)
+
+    if args.command in ("run", "portfolio"):
+        try:
+            args.output = output_file_for(args.output, args.format, "output" if args.command == "run" else "portfolio")
+        except ValueError as e:
+            build_parser().error(str(e))
+
+    if args.command == "portfolio":
+        if args.weights and len(args.weights) != len(args.inputs):
+            build_parser().error("--weights needs one weight per project workbook")
+        return run_portfolio_command(args)
+
+    if args.command == "run":
+        if args.incremental and not args.state:
+            build_parser().error("--incremental needs --state")
+        if args.incremental and args.optimize:
+            build_parser().error("--optimize only applies to full runs, not --incremental")
+        if args.incremental and args.partition is not None:
+            build_parser().error("--partition only applies to full runs, not --incremental")
+        if args.optimize and args.partition is not None:
+            build_parser().error("--partition does not apply with --optimize, which schedules every candidate itself")
+        if args.restarts is not None and not args.optimize:
+            build_parser().error("--restarts only applies with --optimize")
+        result = run_job(args.input, args.output, args.format, args.rules, args.metrics, args.profile,
+                         args.state, args.incremental, args.analytics, args.optimize, args.restarts, args.policy,
+                         args.placement, args.partition, args.split_tasks)
+        if result["status"] == "ok" and args.open:
+            from utils import open_output_file
+            open_output_file(args.output)
+        print_summary([result], result["seconds"])
+        return 0 if result["status"] == "ok" else 1
+
+    start = time.perf_counter()
+    results = run_batch(args.inputs, args.output_dir, args.format, args.rules, args.workers, args.metrics, args.profile,
+                        args.analytics, args.policy, args.placement, args.split_tasks)
+    total_seconds = time.perf_counter() - start
+    print_summary(results, total_seconds)
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump({"seconds": round(total_seconds, 3), "runs": results}, f, indent=4)
+    return 0 if all(result["status"] == "ok" for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(run_cli())
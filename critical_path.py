@@ -0,0 +1,70 @@
+# critical_path.py
+# This file computes upward ranks: the longest remaining path from each task to the end of the plan.
+
+from collections import defaultdict
+from utils import build_dependency_graph
+
+def task_duration(task):
+    """Days of work a task needs; each task runs in a single department, so this is its department's duration."""
+    return sum(task.durations.values())
+
+def reverse_topological_order(tasks, dependents, in_degree):
+    """Tasks ordered so that every task comes after all of its dependents."""
+    in_degree = dict(in_degree)
+    order = [task for task in tasks if in_degree[task] == 0]
+    for task in order:
+        for dependent in dependents[task]:
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0:
+                order.append(dependent)
+    if len(order) != len(tasks):
+        raise ValueError("Circular dependency detected")
+    order.reverse()
+    return order
+
+def longest_remaining_paths(order, dependents, cost):
+    """One DP pass over a reverse topological order: cost of a task plus the longest path among its dependents."""
+    rank = {}
+    for task in order:
+        rank[task] = cost(task) + max((rank[dependent] for dependent in dependents[task]), default=0)
+    return rank
+
+def department_contention(tasks, resources, horizon):
+    """
+    Expected stretch of work in each department. A department whose work per
+    resource exceeds the dependency-only critical path length (horizon) is the
+    bottleneck, and its tasks effectively take that many times longer; other
+    departments keep a factor of 1.
+    """
+    work = defaultdict(float)
+    for task in tasks:
+        for department, duration in task.durations.items():
+            work[department] += duration
+    resource_counts = defaultdict(int)
+    for resource in resources:
+        resource_counts[resource.department] += 1
+    return {
+        department: max(1.0, total / resource_counts[department] / horizon) if resource_counts[department] and horizon else 1.0
+        for department, total in work.items()
+    }
+
+def upward_ranks(tasks, resources=None, graph=None):
+    """
+    HEFT-style upward rank of every task: the length of the longest chain of
+    work from the task's start to the end of the plan, in linear time.
+
+    With resources given, each department's durations are scaled by its
+    department_contention, so chains through overloaded departments rank
+    higher. A graph prebuilt with build_dependency_graph can be passed in.
+    """
+    dependents, in_degree = graph or build_dependency_graph(tasks)
+    order = reverse_topological_order(tasks, dependents, in_degree)
+    rank = longest_remaining_paths(order, dependents, task_duration)
+    if not resources:
+        return rank
+
+    contention = department_contention(tasks, resources, max(rank.values(), default=0))
+    return longest_remaining_paths(
+        order, dependents,
+        lambda task: sum(duration * contention.get(department, 1.0) for department, duration in task.durations.items()),
+    )
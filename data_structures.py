@@ -2,13 +2,20 @@
 # This file contains the core data structures used in the scheduling application.
 
 from collections import defaultdict
+import math
+from instrumentation import metrics
+from schedule_index import ScheduleIndex
+
+# A day counts towards a booking window only while at least this much of it is free
+MIN_WORKABLE_CAPACITY = 0.5
 
 class Task:
-    def __init__(self, name, durations, priority=0, dependencies=None):
+    def __init__(self, name, durations, priority=0, dependencies=None, max_split=1):
         self.name = name
         self.durations = durations
         self.priority = priority
         self.dependencies = dependencies or []
+        self.max_split = max_split  # Resources the task may be divided across when splitting is enabled
         self.start_day = None
         self.end_day = None
 
@@ -22,10 +29,179 @@ class Resource:
     def __init__(self, name, department):
         self.name = name
         self.department = department
-        self.availability = defaultdict(lambda: 1)
+        self.availability = AvailabilityCalendar()
 
     def __repr__(self):
-        return f"Resource(name={self.name}, department={self.department}, availability={dict(self.availability)})"
+        return f"Resource(name={self.name}, department={self.department}, availability={self.availability.booked_days()})"
+
+class AvailabilityCalendar:
+    """
+    Free-time index of a single resource, with one unit of capacity per day.
+
+    Days are the leaves of a segment tree. Every node keeps the workable capacity
+    of its span along with the capacity of its leading run, its trailing run and
+    its largest run, where a run is a stretch of consecutive days that each have
+    at least MIN_WORKABLE_CAPACITY left. Days past the end of the tree are fully
+    free, so the tree only grows as far as the latest booking.
+    """
+
+    def __init__(self, horizon=64):
+        self._size = 1
+        while self._size < horizon:
+            self._size *= 2
+        self._capacity = {}  # Remaining capacity of every day that has been booked
+        self._build()
+
+    def __getitem__(self, day):
+        return self._capacity.get(day, 1)
+
+    def booked_days(self):
+        return dict(self._capacity)
+
+    def book(self, day, work_time):
+        """Take work_time off the remaining capacity of a day."""
+        self._capacity[day] = self[day] - work_time
+        if day >= self._size:
+            while self._size <= day:
+                self._size *= 2
+            self._build()
+        else:
+            self._update(day)
+
+    def release(self, day, work_time):
+        """Give work_time back to a day booked earlier."""
+        capacity = self[day] + work_time
+        if capacity >= 1:
+            self._capacity.pop(day, None)
+        else:
+            self._capacity[day] = capacity
+        if day < self._size:
+            self._update(day)
+
+    def restore(self, booked_days):
+        """Replace every booking with the remaining capacities from booked_days()."""
+        self._capacity = dict(booked_days)
+        while self._size <= max(self._capacity, default=0):
+            self._size *= 2
+        self._build()
+
+    def find_window(self, duration, start_day):
+        """
+        Return the earliest run of workable days at or after start_day whose
+        capacity adds up to duration, in O(log horizon).
+        """
+        if duration <= 0:
+            return []
+        end_day, carry = self._search(1, 0, self._size, start_day, duration, 0)
+        if end_day is None:
+            # Everything past the tree is free, so the window closes a whole number of days later
+            end_day = max(start_day, self._size) + math.ceil(duration - carry) - 1
+        blocked_day = self._last_blocked(1, 0, self._size, start_day, end_day)
+        first_day = start_day if blocked_day is None else blocked_day + 1
+        return list(range(first_day, end_day + 1))
+
+    def largest_run(self, first_day, last_day):
+        """
+        Capacity of the largest run of workable days between first_day and
+        last_day, in O(log horizon). A window of up to this much work found
+        from first_day ends by last_day.
+        """
+        if last_day < first_day:
+            return 0
+        free_days = max(0, last_day - max(first_day, self._size) + 1)
+        if first_day >= self._size:
+            return free_days
+        _, _, suffix, best, _ = self._query(1, 0, self._size, first_day, min(last_day, self._size - 1))
+        return max(best, suffix + free_days)
+
+    def _build(self):
+        size = self._size
+        self._total = [0] * (2 * size)
+        self._prefix = [0] * (2 * size)
+        self._suffix = [0] * (2 * size)
+        self._best = [0] * (2 * size)
+        self._blocked = [False] * (2 * size)
+        for day in range(size):
+            self._set_leaf(size + day, self[day])
+        for node in range(size - 1, 0, -1):
+            self._pull(node)
+
+    def _update(self, day):
+        node = self._size + day
+        self._set_leaf(node, self[day])
+        node //= 2
+        while node:
+            self._pull(node)
+            node //= 2
+
+    def _set_leaf(self, node, capacity):
+        if capacity >= MIN_WORKABLE_CAPACITY:
+            self._total[node] = self._prefix[node] = self._suffix[node] = self._best[node] = capacity
+            self._blocked[node] = False
+        else:
+            self._total[node] = self._prefix[node] = self._suffix[node] = self._best[node] = 0
+            self._blocked[node] = True
+
+    def _pull(self, node):
+        left, right = 2 * node, 2 * node + 1
+        self._total[node] = self._total[left] + self._total[right]
+        self._blocked[node] = self._blocked[left] or self._blocked[right]
+        self._prefix[node] = self._prefix[left] if self._blocked[left] else self._total[left] + self._prefix[right]
+        self._suffix[node] = self._suffix[right] if self._blocked[right] else self._suffix[left] + self._total[right]
+        self._best[node] = max(self._best[left], self._best[right], self._suffix[left] + self._prefix[right])
+
+    def _query(self, node, lo, hi, first_day, last_day):
+        """(total, prefix, suffix, best, blocked) of the days in [first_day, last_day] within the node's span [lo, hi)."""
+        if first_day <= lo and hi - 1 <= last_day:
+            return self._total[node], self._prefix[node], self._suffix[node], self._best[node], self._blocked[node]
+        mid = (lo + hi) // 2
+        if last_day < mid:
+            return self._query(2 * node, lo, mid, first_day, last_day)
+        if first_day >= mid:
+            return self._query(2 * node + 1, mid, hi, first_day, last_day)
+        left_total, left_prefix, left_suffix, left_best, left_blocked = self._query(2 * node, lo, mid, first_day, last_day)
+        right_total, right_prefix, right_suffix, right_best, right_blocked = self._query(2 * node + 1, mid, hi, first_day, last_day)
+        return (
+            left_total + right_total,
+            left_prefix if left_blocked else left_total + right_prefix,
+            right_suffix if right_blocked else left_suffix + right_total,
+            max(left_best, right_best, left_suffix + right_prefix),
+            left_blocked or right_blocked,
+        )
+
+    def _search(self, node, lo, hi, start_day, duration, carry):
+        """
+        Find the first day in [lo, hi) that closes a window, given the capacity
+        carried over from the run that reaches lo. Returns (day, carry), with
+        day set to None and carry updated when the window does not close here.
+        """
+        if hi <= start_day:
+            return None, carry
+        if lo >= start_day:
+            if not self._blocked[node]:
+                if carry + self._total[node] < duration:
+                    return None, carry + self._total[node]
+            elif carry + self._prefix[node] < duration and self._best[node] < duration:
+                return None, self._suffix[node]
+            if hi - lo == 1:
+                return lo, carry
+        mid = (lo + hi) // 2
+        day, carry = self._search(2 * node, lo, mid, start_day, duration, carry)
+        if day is not None:
+            return day, carry
+        return self._search(2 * node + 1, mid, hi, start_day, duration, carry)
+
+    def _last_blocked(self, node, lo, hi, first_day, last_day):
+        """Return the latest blocked day in [first_day, last_day], or None."""
+        if hi <= first_day or lo > last_day or not self._blocked[node]:
+            return None
+        if hi - lo == 1:
+            return lo
+        mid = (lo + hi) // 2
+        day = self._last_blocked(2 * node + 1, mid, hi, first_day, last_day)
+        if day is None:
+            day = self._last_blocked(2 * node, lo, mid, first_day, last_day)
+        return day
 
 class Schedule:
     def __init__(self, resources):
@@ -34,43 +210,54 @@ class Schedule:
         self.resource_workloads = defaultdict(list)
         self.task_resource_map = {}
         self.qc_task_resource_map = {}
+        self.task_assignments = defaultdict(list)  # Every (resource, day, work_time) booked for a task
 
     def find_available_days(self, resource, duration, start_day):
-        available_days = []
-        consecutive_count = 0
-        current_day = start_day
-        while consecutive_count < duration:
-            if resource.availability[current_day] >= 0.5:
-                consecutive_count += resource.availability[current_day]
-                available_days.append(current_day)
-            else:
-                consecutive_count = 0
-                available_days = []
-            current_day += 1
+        available_days = resource.availability.find_window(duration, start_day)
+        if metrics.enabled:
+            metrics.count("find_available_days.calls")
+            metrics.count("find_available_days.window_days", len(available_days))
         return available_days
 
-    def assign_task_to_resource(self, task, resource, days):
-        duration = task.durations[resource.department]
+    def assign_task_to_resource(self, task, resource, days, duration=None):
+        """Book duration (default: the task's whole duration in the resource's department) on the given days."""
+        if duration is None:
+            duration = task.durations[resource.department]
         remaining_duration = duration
         for day in days:
             if remaining_duration > 0:
                 work_time = min(resource.availability[day], remaining_duration)
                 self.assignments[resource.name].append((task, day, work_time))
-                resource.availability[day] -= work_time
+                self.task_assignments[task].append((resource, day, work_time))
+                resource.availability.book(day, work_time)
                 remaining_duration -= work_time
             if remaining_duration <= 0:
                 break
         task.start_day = days[0]
         task.end_day = days[-1]
 
+    def release_task(self, task):
+        """Give back every booking of a task and return the resources it was booked on."""
+        resources = []
+        for resource, day, work_time in self.task_assignments.pop(task, []):
+            resource.availability.release(day, work_time)
+            if resource not in resources:
+                resources.append(resource)
+        for resource in resources:
+            self.assignments[resource.name] = [a for a in self.assignments[resource.name] if a[0] is not task]
+        self.task_resource_map.pop(task.name, None)
+        task.start_day = None
+        task.end_day = None
+        return resources
+
+    def index(self):
+        """Index the current assignments for lookups by resource, day and task (see schedule_index.ScheduleIndex)."""
+        return ScheduleIndex(self)
+
     def print_schedule(self):
+        index = self.index()
         print("Schedule:")
-        task_total_durations = defaultdict(float)
-        for assignments in self.assignments.values():
-            for task, _, work_time in assignments:
-                task_total_durations[task.name] += work_time
-        for resource_name, assignments in self.assignments.items():
+        for resource_name in self.assignments:
             print(f"\nResource: {resource_name}")
-            for task, day, work_time in assignments:
-                task_duration = task_total_durations.get(task.name, 'N/A')
-                print(f"  Task: {task.name}, Day: {day}, Work Time: {work_time}, Duration: {task_duration:.1f}")
\ No newline at end of file
+            for _, task, day, work_time in index.resource_bookings(resource_name):
+                print(f"  Task: {task.name}, Day: {day}, Work Time: {work_time}, Duration: {index.task_work(task.name):.1f}")
\ No newline at end of file
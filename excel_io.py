@@ -1,35 +1,200 @@
 # excel_io.py
 # This file handles reading from and writing to Excel files.
 
+from copy import copy
+import hashlib
 import json
-import platform
+from collections import OrderedDict, defaultdict
+import numpy as np
 import pandas as pd
 import os
-from openpyxl.styles import PatternFill, Alignment, Border, Side
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 import random
+from analytics import ScheduleAnalytics
 from data_structures import Task, Resource
-from utils import resource_path
+from utils import resource_path, get_base_task_name, open_output_file
 
 
 
+# Parsed workbooks, keyed by (path, tasks sheet, resources sheet) and checked against mtime and content hash
+_input_cache = OrderedDict()
+INPUT_CACHE_SIZE = 8
+
+# Rows or records written between two calls of an export's progress callback
+WRITE_PROGRESS_INTERVAL = 1024
+
+# Optional column of the tasks sheet: how many resources each feature's tasks may be split across
+MAX_SPLIT_COLUMN = "Max Split"
+
+
+class ParsedInput:
+    """Column-oriented contents of a workbook's tasks and resources sheets."""
+
+    def __init__(self, departments, task_names, task_departments, task_durations, task_priorities, resources,
+                 task_max_splits=None):
+        self.departments = departments
+        self.task_names = task_names
+        self.task_departments = task_departments
+        self.task_durations = task_durations
+        self.task_priorities = task_priorities
+        self.resources = resources  # (resource name, department) pairs
+        self.task_max_splits = task_max_splits or [1] * len(task_names)
+
+
+def load_input(filename, tasks_sheet="Sheet1", resources_sheet="Sheet2", streaming=False):
+    """
+    Parse the tasks and resources sheets of a workbook, opening it only once.
+    Results are cached by path, modification time and content hash, so reading
+    an unchanged file again skips parsing. With streaming=True, rows are read
+    one at a time from a read-only workbook to keep memory bounded on very
+    large sheets.
+    """
+    path = os.path.abspath(filename)
+    mtime = os.stat(path).st_mtime_ns
+    digest = _file_digest(path)
+    key = (path, tasks_sheet, resources_sheet)
+
+    cached = _input_cache.get(key)
+    if cached and cached[0] == mtime and cached[1] == digest:
+        _input_cache.move_to_end(key)
+        return cached[2]
+
+    if streaming:
+        parsed = _parse_workbook_streaming(path, tasks_sheet, resources_sheet)
+    else:
+        parsed = _parse_workbook(path, tasks_sheet, resources_sheet)
+
+    _input_cache[key] = (mtime, digest, parsed)
+    if len(_input_cache) > INPUT_CACHE_SIZE:
+        _input_cache.popitem(last=False)
+    return parsed
+
+
+def clear_input_cache():
+    _input_cache.clear()
+
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_workbook(path, tasks_sheet, resources_sheet):
+    with pd.ExcelFile(path) as workbook:
+        df = workbook.parse(tasks_sheet)
+        resources_df = workbook.parse(resources_sheet) if resources_sheet in workbook.sheet_names else pd.DataFrame()
+
+    # Task name is the first column, priority the second and durations start from the third, apart from Max Split
+    department_columns = [col for col in range(2, len(df.columns)) if df.columns[col] != MAX_SPLIT_COLUMN]
+    departments = [df.columns[col] for col in department_columns]
+    durations = df.iloc[:, department_columns].to_numpy()
+    rows, cols = np.nonzero(pd.notna(durations))  # Row-major, so tasks keep the sheet order
+    features = df.iloc[:, 0].to_numpy()[rows]
+    task_departments = np.array(departments, dtype=object)[cols]
+    task_names = [f"{department}: {feature}" for department, feature in zip(task_departments, features)]
+    max_splits = None
+    if MAX_SPLIT_COLUMN in df.columns:
+        max_splits = [_max_split(value) for value in df[MAX_SPLIT_COLUMN].to_numpy()[rows]]
+
+    resources = _resource_pairs(resources_df)
+    return ParsedInput(
+        departments,
+        task_names,
+        task_departments.tolist(),
+        durations[rows, cols].tolist(),
+        df.iloc[:, 1].to_numpy()[rows].tolist(),
+        resources,
+        max_splits,
+    )
+
+
+def _resource_pairs(resources_df):
+    """(resource name, department) pairs of a resources sheet, one department per column, column by column."""
+    return [
+        (resource_name, department)
+        for department in resources_df.columns
+        for resource_name in resources_df[department].dropna()
+    ]
+
+
+def _parse_workbook_streaming(path, tasks_sheet, resources_sheet):
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[tasks_sheet].iter_rows(values_only=True)
+        header = next(rows, ())
+        department_columns = [col for col in range(2, len(header)) if header[col] != MAX_SPLIT_COLUMN]
+        departments = [header[col] for col in department_columns]
+        split_column = header.index(MAX_SPLIT_COLUMN) if MAX_SPLIT_COLUMN in header else None
+        task_names, task_departments, task_durations, task_priorities, task_max_splits = [], [], [], [], []
+        for row in rows:
+            max_split = _max_split(row[split_column] if split_column is not None and split_column < len(row) else None)
+            for department, col in zip(departments, department_columns):
+                duration = row[col] if col < len(row) else None
+                if duration is not None:
+                    task_names.append(f"{department}: {row[0]}")
+                    task_departments.append(department)
+                    task_durations.append(duration)
+                    task_priorities.append(row[1])
+                    task_max_splits.append(max_split)
+
+        resources = []
+        if resources_sheet in workbook.sheetnames:
+            columns = list(zip(*workbook[resources_sheet].iter_rows(values_only=True)))
+            for column in columns:
+                resources.extend((resource_name, column[0]) for resource_name in column[1:] if resource_name is not None)
+    finally:
+        workbook.close()
+    return ParsedInput(departments, task_names, task_departments, task_durations, task_priorities, resources,
+                       task_max_splits)
+
+
+def _max_split(value):
+    """Read a Max Split cell; an empty cell keeps the task on one resource."""
+    if value is None or pd.isna(value):
+        return 1
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        raise ValueError(f"{MAX_SPLIT_COLUMN} must be a whole number of resources, not {value!r}")
+
+
+def build_tasks(parsed):
+    """Create one Task per non-empty duration cell of a parsed workbook."""
+    return [
+        Task(name, {department: duration}, priority, max_split=max_split)
+        for name, department, duration, priority, max_split in zip(
+            parsed.task_names, parsed.task_departments, parsed.task_durations, parsed.task_priorities,
+            parsed.task_max_splits
+        )
+    ]
+
+
+def build_resources(parsed):
+    return [Resource(resource_name, department) for resource_name, department in parsed.resources]
+
+
+def load_dependency_rules(filename):
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+
+def read_workbook(filename, rules_file='dependency_rules.json', streaming=False):
+    """Read tasks, with dependencies set up, and resources from a single pass over an Excel file."""
+    parsed = load_input(filename, streaming=streaming)
+    tasks = build_tasks(parsed)
+    set_up_dependencies(tasks, load_dependency_rules(rules_file))
+    return tasks, build_resources(parsed)
+
+
 def read_tasks_from_excel(filename, sheet_name="Sheet1"):
     """Read tasks from an Excel file and return a list of Task objects."""
-    df = pd.read_excel(filename)
-    tasks = []
-    
-    for _, row in df.iterrows():
-        task_name = row.iloc[0] #  Task name is the first column
-        priority = row.iloc[1]  #  priority is the second column
-        for col in df.columns[2:]:  # Start from the third column for durations
-            if pd.notna(row[col]):
-                durations = {col: row[col]}
-                full_task_name = f"{col}: {task_name}"
-                task = Task(full_task_name, durations, priority)
-                tasks.append(task)
-    def load_dependency_rules(filename):
-        with open(filename, 'r') as file:
-            return json.load(file)
+    tasks = build_tasks(load_input(filename, tasks_sheet=sheet_name))
     dependency_rules = load_dependency_rules('dependency_rules.json')
     set_up_dependencies(tasks, dependency_rules)
     return tasks
@@ -37,139 +202,197 @@ def read_tasks_from_excel(filename, sheet_name="Sheet1"):
 
 def set_up_dependencies(tasks, rules):
     """Set up dependencies between tasks based on dynamic rules."""
-    def get_base_task_name(task):
-        return task.name.split(": ")[1].split(" (")[0]
-
-    def find_dependent_tasks(task, keywords):
-        base_task_name = get_base_task_name(task)
-        return [
-            t for t in tasks
-            if any(keyword in t.durations for keyword in keywords) and get_base_task_name(t) == base_task_name
-        ]
-
-    def add_dependencies(task, keywords):
-        dependent_tasks = find_dependent_tasks(task, keywords)
-        for dependent in dependent_tasks:
-            dependent.dependencies.append(task)
+    # Index tasks by (base task name, department) once so each rule resolves with a lookup
+    tasks_by_key = defaultdict(list)
+    base_names = {}
+    for task in tasks:
+        base_names[task] = get_base_task_name(task)
+        for department in task.durations:
+            tasks_by_key[(base_names[task], department)].append(task)
 
     for task in tasks:
-        task_keywords = [key for key, value in rules.items() if key in task.durations]
-        for keyword in task_keywords:
-            dependent_keywords = rules[keyword]
-            add_dependencies(task, dependent_keywords)
+        for keyword in rules:
+            if keyword not in task.durations:
+                continue
+            added = set()
+            for dependent_keyword in rules[keyword]:
+                for dependent in tasks_by_key.get((base_names[task], dependent_keyword), ()):
+                    if dependent not in added:
+                        added.add(dependent)
+                        dependent.dependencies.append(task)
 
 
             
 def read_resources_from_excel(filename, sheet_name="Sheet2"):
     """Read resources from an Excel file, processing all rows in the first column, then the second, and so on."""
-    df = pd.read_excel(filename, sheet_name=sheet_name)
-    resources = []
-    
-    for department in df.columns:
-        for resource_name in df[department].dropna():
-            resource = Resource(resource_name, department)
-            resources.append(resource)
-    
-    return resources
+    return build_resources(load_input(filename, resources_sheet=sheet_name))
+
+def read_resource_sheet(filename, sheet_name="Sheet2"):
+    """Read only the resources sheet of a workbook, which then needs no tasks sheet."""
+    resources_df = pd.read_excel(filename, sheet_name=sheet_name)
+    return [Resource(resource_name, department) for resource_name, department in _resource_pairs(resources_df)]
 
 def read_departments_from_excel(filename, sheet_name="Sheet1"):
-    df = pd.read_excel(filename, sheet_name=sheet_name)
-    return list(df.columns[2:])
+    return list(load_input(filename, tasks_sheet=sheet_name).departments)
 
-def generate_excel_output(schedule, filename):
-    """Generates an Excel schedule report with merged department headers and automatically opens it.
+def generate_excel_output(schedule, filename, auto_open=True, analytics=False, progress=None):
+    """Generates an Excel schedule report with merged department headers and optionally opens it.
+
+    The day x resource grid is filled day by day from a ScheduleIndex and
+    streamed to a write-only workbook whose cells share pre-built named styles.
+    Each piece of a split task shows in its resource's column, numbered in the
+    order the pieces start.
 
     Args:
         schedule: Scheduling data object.
         filename: Name of the output Excel file.
+        auto_open: Open the file with the platform's default application once saved.
+        analytics: Add Utilization, Idle Gaps, Department Load and Makespan sheets.
+        progress: Called as progress(days written, days) about every
+            WRITE_PROGRESS_INTERVAL cells and before saving; an exception it
+            raises stops the export.
     """
-    # Create a list of department names corresponding to each resource
-    departments = ['Days'] + [r.department for r in schedule.resources]
-
-    # Create the DataFrame with an extra row for departments
-    df = pd.DataFrame(columns=['Days'] + [r.name for r in schedule.resources])
+    resources = schedule.resources
+    columns_by_name = defaultdict(list)
+    for col, resource in enumerate(resources):
+        columns_by_name[resource.name].append(col)
 
-    max_day = max((a[1] for assignments in schedule.assignments.values() for a in assignments), default=0)
+    index = schedule.index()
+    max_day = index.last_day
 
     task_colors = {}
-    for assignments in schedule.assignments.values():
-        for task, _, _ in assignments:
-            base_task_name = task.name.split(": ")[1].split(" (")[0]
-            if base_task_name not in task_colors:
-                task_colors[base_task_name] = ''.join(random.choices('ABCDEF0123456789', k=6))
-
-    for day in range(1, max_day + 1):
-        row = {'Days': day}
-        for resource in schedule.resources:
-            tasks = [f"{a[0].name} ({a[2]:.1f})" for a in schedule.assignments[resource.name] if a[1] == day]
-            row[resource.name] = '\n'.join(tasks) if tasks else ''
-        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-
-    # Write data to Excel
-    writer = pd.ExcelWriter(filename, engine='openpyxl')
-    df.to_excel(writer, index=False, sheet_name='Schedule', startrow=1)  # Start writing from row 2
-    worksheet = writer.sheets['Schedule']
-
-    # Insert the department names row at the top
-    current_dept = None
-    merge_start = 2  # Start from column 2 since column 1 is "Days"
-    for col, dept in enumerate(departments[1:], start=2):  # Skip the "Days" column
-        if dept != current_dept:
-            if current_dept is not None:
-                if merge_start < col - 1:
-                    worksheet.merge_cells(start_row=1, start_column=merge_start, end_row=1, end_column=col-1)
-                cell = worksheet.cell(row=1, column=merge_start, value=current_dept)
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-            current_dept = dept
+    pieces = {}  # Split task name -> {resource name: piece number}, numbered by start day
+    for task in index.tasks:
+        base_task_name = get_base_task_name(task)
+        if base_task_name not in task_colors:
+            task_colors[base_task_name] = ''.join(random.choices('ABCDEF0123456789', k=6))
+        if task.max_split > 1:
+            resource_names = index.task_span(task.name)[2]
+            if len(resource_names) > 1:
+                pieces[task.name] = {name: number for number, name in enumerate(resource_names, start=1)}
+
+    # Each grid cell holds the tasks a resource works on that day, and the first one picks the cell color
+    grid = [[None] * len(resources) for _ in range(max_day)]
+    for day, bookings in index.iter_days():
+        for resource_name, task, _, work_time in bookings:
+            if task.name in pieces:
+                text = f"{task.name} [{pieces[task.name][resource_name]}/{len(pieces[task.name])}] ({work_time:.1f})"
+            else:
+                text = f"{task.name} ({work_time:.1f})"
+            for col in columns_by_name.get(resource_name, ()):
+                cell = grid[day - 1][col]
+                if cell is None:
+                    grid[day - 1][col] = [get_base_task_name(task), text]
+                else:
+                    cell.append(text)
+
+    max_lengths = [0] * len(resources)
+    for row in grid:
+        for col, cell in enumerate(row):
+            if cell is not None:
+                row[col] = (cell[0], '\n'.join(cell[1:]))
+                max_lengths[col] = max(max_lengths[col], len(row[col][1]))
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Schedule')
+    styles, task_styles = _add_schedule_styles(workbook, worksheet, task_colors)
+
+    worksheet.column_dimensions['A'].width = max(len(str(max_day)), len('Days')) * 1.2
+    for col, max_length in enumerate(max_lengths, start=2):
+        worksheet.column_dimensions[get_column_letter(col)].width = max(max_length * 1.2, 15)
+
+    # Department names go in the top row, merged across each run of resources from the same department
+    department_row = [_styled_cell(worksheet, None, styles['border'])]
+    merge_start = 2
+    for col, resource in enumerate(resources, start=2):
+        if col > 2 and resource.department == resources[col - 3].department:
+            department_row.append(_styled_cell(worksheet, None, styles['department']))
+        else:
+            department_row.append(_styled_cell(worksheet, resource.department, styles['department']))
             merge_start = col
-        
-        if col == len(departments):  # Handle the last department
-            if merge_start <= col:
-                worksheet.merge_cells(start_row=1, start_column=merge_start, end_row=1, end_column=col)
-            cell = worksheet.cell(row=1, column=merge_start, value=current_dept)
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    # Set cell styles for data rows
-    center_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        if col == len(resources) + 1 or resources[col - 1].department != resource.department:
+            if merge_start < col:
+                worksheet.merged_cells.add(f"{get_column_letter(merge_start)}1:{get_column_letter(col)}1")
+    worksheet.append(department_row)
+
+    worksheet.append([_styled_cell(worksheet, name, styles['border']) for name in ['Days'] + [r.name for r in resources]])
 
-    for col in range(2, len(schedule.resources) + 2):
-        col_letter = get_column_letter(col)
-        max_length = 0
-        for row in range(3, max_day + 3):  # Start from row 3 due to the new department and resource name rows
-            cell = worksheet.cell(row=row, column=col)
-            if cell.value:
-                base_task_name = cell.value.split(": ")[1].split(" (")[0]
-                if base_task_name in task_colors:
-                    cell.fill = PatternFill(start_color=task_colors[base_task_name], end_color=task_colors[base_task_name], fill_type="solid")
+    progress_days = max(WRITE_PROGRESS_INTERVAL // max(len(resources), 1), 1)
+    try:
+        for day, row in enumerate(grid, start=1):
+            cells = [_styled_cell(worksheet, day, styles['border'])]
+            for cell in row:
+                if cell is None:
+                    cells.append(_styled_cell(worksheet, None, styles['cell']))
                 else:
-                    print(f"Warning: No color found for task '{base_task_name}'")
-            cell.alignment = center_alignment
-            max_length = max(max_length, len(str(cell.value)))
-        worksheet.column_dimensions[col_letter].width = max(max_length * 1.2, 15)
-
-    max_days_length = max(df['Days'].astype(str).map(len).max(), len('Days')) * 1.2
-    worksheet.column_dimensions['A'].width = max_days_length
-
-    # Define border style
-    border_style = Border(left=Side(style='thin'), 
-                          right=Side(style='thin'), 
-                          top=Side(style='thin'), 
-                          bottom=Side(style='thin'))
+                    cells.append(_styled_cell(worksheet, cell[1], task_styles[cell[0]]))
+            worksheet.append(cells)
+            if progress and (day % progress_days == 0 or day == max_day):
+                progress(day, max_day)
+    except BaseException:
+        # Finish the sheet's temporary file so a cancelled export leaves nothing open
+        worksheet.close()
+        raise
 
-    # Apply border style to each cell, including the new department and resource name rows
-    for row in worksheet.iter_rows(min_row=1, max_row=max_day + 2, min_col=1, max_col=len(schedule.resources) + 1):
-        for cell in row:
-            cell.border = border_style
+    if analytics:
+        _add_analytics_sheets(workbook, ScheduleAnalytics(schedule))
 
     # Save the workbook
-    writer._save()
+    workbook.save(filename)
+
+    if auto_open:
+        open_output_file(filename)
+
+    print(f"Schedule exported to {filename}")
+
+
+def _add_schedule_styles(workbook, worksheet, task_colors):
+    """
+    Register the shared named styles of the schedule sheet and pre-build the
+    fill of each base task on top of them. Returns the base styles ('border',
+    'department' and 'cell') and the style of each base task, ready to be
+    copied onto cells without a per-cell style lookup.
+    """
+    border_style = Border(left=Side(style='thin'),
+                          right=Side(style='thin'),
+                          top=Side(style='thin'),
+                          bottom=Side(style='thin'))
+    center_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+    named_styles = {
+        'border': NamedStyle(name='schedule_border', border=border_style),
+        'department': NamedStyle(name='schedule_department', border=border_style,
+                                 alignment=Alignment(horizontal="center", vertical="center")),
+        'cell': NamedStyle(name='schedule_cell', border=border_style, alignment=center_alignment),
+    }
+    styles = {}
+    for key, named_style in named_styles.items():
+        workbook.add_named_style(named_style)
+        prototype = WriteOnlyCell(worksheet)
+        prototype.style = named_style.name
+        styles[key] = prototype._style
+
+    task_styles = {}
+    for base_task_name, color in task_colors.items():
+        prototype = WriteOnlyCell(worksheet)
+        prototype.style = 'schedule_cell'
+        prototype.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+        task_styles[base_task_name] = prototype._style
+    return styles, task_styles
+
+
+def _add_analytics_sheets(workbook, analytics):
+    """Append one sheet per analytics table, with a named index written as the first column."""
+    for sheet_name, df in analytics.sheets().items():
+        worksheet = workbook.create_sheet(sheet_name)
+        if df.index.name is not None:
+            df = df.reset_index()
+        worksheet.append([str(column) for column in df.columns])
+        for values in df.itertuples(index=False, name=None):
+            worksheet.append([value.item() if isinstance(value, np.generic) else value for value in values])
 
-    # Use platform-specific commands to open the Excel file automatically
-    if platform.system() == "Windows":
-        os.startfile(filename)
-    elif platform.system() == "Darwin":  # macOS
-        os.system("open " + filename)
-    else:
-        print(f"Warning: Automatic opening not supported for your platform. Please open {filename} manually.")
 
-    print(f"Schedule exported to {filename}")
\ No newline at end of file
+def _styled_cell(worksheet, value, style):
+    cell = WriteOnlyCell(worksheet, value=value)
+    cell._style = copy(style)
+    return cell
\ No newline at end of file
@@ -0,0 +1,102 @@
+# gantt.py
+# This file lays a finished schedule out as Gantt bars and finds the bars inside a viewport.
+
+import zlib
+from bisect import bisect_right
+from utils import get_base_task_name
+
+class GanttBar:
+    """One task's consecutive days on one resource, drawn in one lane of the resource's row."""
+    __slots__ = ("task", "resource_name", "start_day", "end_day", "work_time", "lane")
+
+    def __init__(self, task, resource_name, start_day, end_day, work_time):
+        self.task = task
+        self.resource_name = resource_name
+        self.start_day = start_day
+        self.end_day = end_day
+        self.work_time = work_time
+        self.lane = 0
+
+class GanttLayout:
+    """
+    Rows and bars of a Gantt chart of a schedule.
+
+    rows lists ("department", name) header rows, each followed by the
+    ("resource", name) rows of that department, in the order departments
+    first appear in schedule.resources. Each resource's bookings are
+    coalesced into one bar per run of consecutive days of the same task, and
+    bars that overlap, when a resource splits a day between tasks, go to
+    separate lanes of the row. bars_in_view finds the bars of a row within a
+    day range by bisection, so drawing a viewport costs the bars in it.
+    """
+
+    def __init__(self, schedule):
+        index = schedule.index()
+        self.last_day = index.last_day
+        departments = {}
+        for resource in schedule.resources:
+            names = departments.setdefault(resource.department, [])
+            if resource.name not in names:
+                names.append(resource.name)
+        self.rows = []
+        for department, names in departments.items():
+            self.rows.append(("department", department))
+            self.rows.extend(("resource", name) for name in names)
+
+        self._bars = {}
+        self._starts = {}
+        self._longest = {}
+        self.lanes = {}
+        for _, name in self.rows:
+            bars = self._coalesce(name, index.resource_bookings(name))
+            self.lanes[name] = self._assign_lanes(bars)
+            self._bars[name] = bars
+            self._starts[name] = [bar.start_day for bar in bars]
+            self._longest[name] = max((bar.end_day - bar.start_day for bar in bars), default=0)
+
+    @staticmethod
+    def _coalesce(resource_name, bookings):
+        """Merge day-sorted bookings into bars, extending a task's open bar while its days follow on."""
+        bars = []
+        open_bars = {}  # Task -> its bar that ended on the previous booked day
+        for _, task, day, work_time in bookings:
+            bar = open_bars.get(task)
+            if bar is not None and bar.end_day == day - 1:
+                bar.end_day = day
+                bar.work_time += work_time
+            else:
+                bar = GanttBar(task, resource_name, day, day, work_time)
+                bars.append(bar)
+                open_bars[task] = bar
+        bars.sort(key=lambda bar: (bar.start_day, bar.end_day))
+        return bars
+
+    @staticmethod
+    def _assign_lanes(bars):
+        """Put each bar in the first lane that is free from its start day; returns the number of lanes."""
+        lane_ends = []
+        for bar in bars:
+            for lane, end_day in enumerate(lane_ends):
+                if end_day < bar.start_day:
+                    break
+            else:
+                lane = len(lane_ends)
+                lane_ends.append(0)
+            lane_ends[lane] = bar.end_day
+            bar.lane = lane
+        return max(len(lane_ends), 1)
+
+    def bars_in_view(self, resource_name, first_day, last_day):
+        """Bars of a resource with at least one day from first_day to last_day."""
+        bars, starts = self._bars[resource_name], self._starts[resource_name]
+        # No bar starting before first_day - longest can still reach first_day
+        lo = bisect_right(starts, first_day - self._longest[resource_name] - 1)
+        hi = bisect_right(starts, last_day)
+        return [bar for bar in bars[lo:hi] if bar.end_day >= first_day]
+
+def feature_color(task):
+    """A stable color per feature, so every task of a feature shares it across runs."""
+    hue = zlib.crc32(get_base_task_name(task).encode("utf-8"))
+    red, green, blue = (hue >> 16) & 0xFF, (hue >> 8) & 0xFF, hue & 0xFF
+    # Lift dark colors so black text stays readable
+    return "#%02X%02X%02X" % tuple(96 + channel * 159 // 255 for channel in (red, green, blue))
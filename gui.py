@@ -1,14 +1,52 @@
+import time
+# Taken before any other import, so the startup time includes them
+STARTUP_START = time.perf_counter()
+
 import json
+import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from tkinter.font import Font
 import webbrowser
-from PIL import Image, ImageTk
-from excel_io import read_departments_from_excel
-from main import main as run_scheduler
 import os
 import logging
+from assets import load_image
+from gantt import GanttLayout, feature_color
 from utils import resource_path
+from worker import SchedulerWorker
+
+# How often the Tk loop drains the worker's event queue, in milliseconds
+POLL_INTERVAL = 100
+
+# Delay after the first paint before the worker starts importing the pandas/openpyxl pipeline, in milliseconds
+WARMUP_DELAY = 50
+
+# Side of one cell of the dependency rules matrix, in pixels, and the color of rules that form a cycle
+CELL_SIZE = 22
+CONFLICT_COLOR = '#C0392B'
+
+# Gantt preview geometry, in pixels: row height, day header height, and the default and allowed day widths
+GANTT_ROW_HEIGHT = 24
+GANTT_HEADER_HEIGHT = 22
+GANTT_DAY_WIDTH = 24
+GANTT_DAY_WIDTH_RANGE = (2, 120)
+
+STAGE_LABELS = {
+    'read_workbook': "Reading workbook",
+    'load_state': "Loading saved schedule",
+    'topological_sort': "Ordering tasks",
+    'schedule_tasks': "Placing tasks",
+    'optimize': "Optimizing makespan",
+    'save_state': "Saving schedule state",
+    'write_output': "Writing output",
+}
+
+# What the done/total counts of a stage's progress reports measure
+STAGE_UNITS = {
+    'schedule_tasks': "tasks placed",
+    'optimize': "seconds",
+    'write_output': "rows written",
+}
 
 class Themes:
     def __init__(self):
@@ -46,6 +84,13 @@ class SchedulerGUI:
     def __init__(self, master):
         self.master = master
         self.themes = Themes()
+        # Started once the window has painted (see report_startup), so its imports do not delay the first frame
+        self.worker = None
+        self.startup_seconds = None
+        self.current_job = None
+        self.current_output = None
+        self.last_schedule = None
+        self.gantt_window = None
         self.create_titlebar()
         self.create_main_frame()
         self.create_widgets()
@@ -57,13 +102,8 @@ class SchedulerGUI:
         self.titlebar.pack(fill=tk.X)
 
         # Load icons for dark and light mode
-        self.dark_icon_image = Image.open(resource_path('light_mode_icon.png'))
-        self.dark_icon_image = self.dark_icon_image.resize((20, 20), Image.Resampling.LANCZOS)
-        self.dark_icon = ImageTk.PhotoImage(self.dark_icon_image)
-
-        self.light_icon_image = Image.open(resource_path('dark_mode_icon.png'))
-        self.light_icon_image = self.light_icon_image.resize((20, 20), Image.Resampling.LANCZOS)
-        self.light_icon = ImageTk.PhotoImage(self.light_icon_image)
+        self.dark_icon = load_image('light_mode_icon.png', (20, 20), self.master)
+        self.light_icon = load_image('dark_mode_icon.png', (20, 20), self.master)
 
         # Initialize with the correct icon based on the current theme
         initial_icon = self.dark_icon if self.themes.current_theme == self.themes.dark_mode else self.light_icon
@@ -95,6 +135,9 @@ class SchedulerGUI:
 
         self.style.configure("TLabel", font=("Helvetica Neue", 12), background=self.themes.current_theme['label_bg'], foreground=self.themes.current_theme['fg'])
 
+        self.style.configure("TCheckbutton", font=("Helvetica Neue", 12), background=self.themes.current_theme['bg'], foreground=self.themes.current_theme['fg'])
+        self.style.map("TCheckbutton", background=[("active", self.themes.current_theme['bg'])])
+
         self.style.configure("TEntry", font=("Helvetica Neue", 12), fieldbackground=self.themes.current_theme['entry_bg'], foreground=self.themes.current_theme['fg'], padding=5, borderwidth=0)
 
     def toggle_mode(self, event=None):
@@ -124,6 +167,9 @@ class SchedulerGUI:
         self.create_output_schedule_file()
         self.create_run_button()
         self.create_dependency_rules_button()
+        self.create_preview_button()
+        self.create_metrics_option()
+        self.create_progress_display()
         self.create_tooltips()
 
     def create_tutorial_link(self):
@@ -133,9 +179,7 @@ class SchedulerGUI:
         self.tutorial_link.bind("<Button-1>", self.open_tutorial)
   
     def create_logo(self):
-        logo_image = Image.open(resource_path('53876.png'))
-        logo_image = logo_image.resize((100, 100), Image.Resampling.LANCZOS)
-        self.logo = ImageTk.PhotoImage(logo_image)
+        self.logo = load_image('53876.png', (100, 100), self.master)
 
         self.logo_label = tk.Label(self.main_frame, image=self.logo,bg=self.themes.current_theme['bg'])  # Keep this as a tk.Label because it uses images
         self.logo_label.grid(row=0, column=0, columnspan=3, pady=5)
@@ -166,6 +210,9 @@ class SchedulerGUI:
     def create_run_button(self):
         self.run_button = ttk.Button(self.main_frame, text="Run Scheduler", command=self.run_scheduler, style="TButton")
         self.run_button.grid(row=5, column=1, pady=20)
+
+        self.cancel_button = ttk.Button(self.main_frame, text="Cancel", command=self.cancel_scheduler, style="TButton", state=tk.DISABLED)
+        self.cancel_button.grid(row=5, column=2, padx=5, pady=20)
     
     def create_dependency_rules_button(self):
         self.dependency_rules_button = ttk.Button(
@@ -175,10 +222,26 @@ class SchedulerGUI:
             style="TButton"
         )
         self.dependency_rules_button.grid(row=6, column=1, pady=10)
+
+    def create_preview_button(self):
+        self.preview_button = ttk.Button(self.main_frame, text="Preview", command=self.open_gantt_window, style="TButton", state=tk.DISABLED)
+        self.preview_button.grid(row=6, column=2, padx=5, pady=10)
     
+    def create_metrics_option(self):
+        self.collect_metrics = tk.BooleanVar(value=False)
+        self.metrics_check = ttk.Checkbutton(self.main_frame, text="Save run metrics and profile", variable=self.collect_metrics, style="TCheckbutton")
+        self.metrics_check.grid(row=7, column=1, pady=5)
+
+    def create_progress_display(self):
+        self.progress_bar = ttk.Progressbar(self.main_frame, orient=tk.HORIZONTAL, mode='determinate', length=300)
+        self.progress_bar.grid(row=8, column=0, columnspan=3, pady=(10, 0))
+
+        self.status_label = ttk.Label(self.main_frame, text="Ready", style="TLabel")
+        self.status_label.grid(row=9, column=0, columnspan=3, pady=5)
+
     def create_tooltips(self):
         self.tasks_entry_tooltip = self.create_tooltip(self.tasks_entry, "Select the Excel file containing your tasks and resources")
-        self.output_entry_tooltip = self.create_tooltip(self.output_entry, "Choose where to save the generated schedule")
+        self.output_entry_tooltip = self.create_tooltip(self.output_entry, "Choose where to save the generated schedule, or leave empty to only preview it")
 
     def create_tooltip(self, widget, text):
         def enter(event):
@@ -203,7 +266,7 @@ class SchedulerGUI:
         self.output_entry_tooltip.unbind('<Leave>')
 
         self.tasks_entry_tooltip = self.create_tooltip(self.tasks_entry, "Select the Excel file containing your tasks and resources")
-        self.output_entry_tooltip = self.create_tooltip(self.output_entry, "Choose where to save the generated schedule")
+        self.output_entry_tooltip = self.create_tooltip(self.output_entry, "Choose where to save the generated schedule, or leave empty to only preview it")
 
     def update_widgets(self):
         self.titlebar.config(bg=self.themes.current_theme['bg'])
@@ -219,7 +282,13 @@ class SchedulerGUI:
         self.output_entry.configure(style="TEntry")
         self.output_browse_button.configure(style="TButton")
         self.run_button.configure(style="TButton")
+        self.cancel_button.configure(style="TButton")
+        self.status_label.configure(style="TLabel")
         self.dependency_rules_button.configure(style="TButton")
+        self.preview_button.configure(style="TButton")
+        self.metrics_check.configure(style="TCheckbutton")
+        if self.gantt_window and self.gantt_window.window.winfo_exists():
+            self.gantt_window.update_theme()
 
 
 
@@ -253,36 +322,112 @@ class SchedulerGUI:
         entry.insert(0, filename)
 
     def save_file(self, entry):
-        filename = filedialog.asksaveasfilename(initialfile="output.xlsx", defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
+        filetypes = [("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"), ("Parquet files", "*.parquet"), ("Feather files", "*.feather")]
+        filename = filedialog.asksaveasfilename(initialfile="output.xlsx", defaultextension=".xlsx", filetypes=filetypes)
         entry.delete(0, tk.END)
         entry.insert(0, filename)
 
     def run_scheduler(self):
         input_file = self.tasks_entry.get()
-        output_file = self.output_entry.get()
+        # Without an output file the schedule is only previewed
+        output_file = self.output_entry.get() or None
 
-        if not input_file or not output_file:
-            messagebox.showerror("Error", "Please select all required files.")
+        if not input_file:
+            messagebox.showerror("Error", "Please select an input file.")
             return
 
-        try:
-            self.master.after(100, self._run_scheduler_thread, input_file, output_file)
-        except Exception as e:
-            logging.exception("An error occurred while running the scheduler")
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
-
-    def _run_scheduler_thread(self, input_file, output_file):
-        try:
-            run_scheduler(input_file, output_file)
-            messagebox.showinfo("Success", "Scheduling completed successfully!")
-        except Exception as e:
-            logging.exception("An error occurred while running the scheduler")
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+        metrics_file = profile_file = None
+        if self.collect_metrics.get():
+            # Reports go next to the output file, or the input file when there is none
+            output_base = os.path.splitext(output_file or input_file)[0]
+            metrics_file, profile_file = f"{output_base}_metrics.json", f"{output_base}.prof"
+
+        # The run happens on the worker thread; the Tk loop only polls its events.
+        # A written schedule opens once the run is done; a preview-only run shows the Gantt window instead
+        self.current_job = self.start_worker().submit(input_file, output_file, auto_open=bool(output_file),
+                                                      metrics_file=metrics_file, profile_file=profile_file)
+        self.current_output = output_file
+        self.run_button.configure(state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.progress_bar.configure(mode='indeterminate')
+        self.progress_bar.start()
+        self.status_label.configure(text="Starting...")
+        self.master.after(POLL_INTERVAL, self._poll_worker)
+
+    def report_startup(self):
+        """Record the time from launch to the first painted window, then warm up the worker."""
+        self.master.update_idletasks()
+        self.startup_seconds = time.perf_counter() - STARTUP_START
+        logging.info("Window shown %.3fs after launch", self.startup_seconds)
+        self.master.after(WARMUP_DELAY, self.start_worker)
+
+    def start_worker(self):
+        if self.worker is None:
+            self.worker = SchedulerWorker()
+        return self.worker
+
+    def cancel_scheduler(self):
+        if self.current_job is not None:
+            self.worker.cancel(self.current_job)
+            self.cancel_button.configure(state=tk.DISABLED)
+            self.status_label.configure(text="Cancelling...")
+
+    def _poll_worker(self):
+        while not self.worker.events.empty():
+            event = self.worker.events.get_nowait()
+            if event[1] != self.current_job:
+                continue
+            if event[0] == "progress":
+                self._show_progress(*event[2:])
+                continue
+
+            self._finish_run()
+            if event[0] == "done":
+                self.status_label.configure(text=f"Completed in {event[2]:.1f}s")
+                self.last_schedule = event[3]
+                self.preview_button.configure(state=tk.NORMAL)
+                if self.current_output:
+                    messagebox.showinfo("Success", "Scheduling completed successfully!")
+                else:
+                    self.open_gantt_window()
+            elif event[0] == "cancelled":
+                self.status_label.configure(text=f"Cancelled after {event[2]:.1f}s")
+            else:
+                self.status_label.configure(text="Failed")
+                messagebox.showerror("Error", f"An error occurred: {event[2]}")
+            return
+        self.master.after(POLL_INTERVAL, self._poll_worker)
+
+    def _show_progress(self, stage, done, total, elapsed):
+        text = STAGE_LABELS.get(stage, stage)
+        if total:
+            # Stages with a known length can show how far along they are
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode='determinate', maximum=total, value=done)
+            text += f": {done}/{total} {STAGE_UNITS.get(stage, '')}".rstrip()
+        elif str(self.progress_bar['mode']) != 'indeterminate':
+            self.progress_bar.configure(mode='indeterminate')
+            self.progress_bar.start()
+        self.status_label.configure(text=f"{text} ({elapsed:.1f}s)")
+
+    def _finish_run(self):
+        self.current_job = None
+        self.progress_bar.stop()
+        self.progress_bar.configure(mode='determinate', value=0)
+        self.run_button.configure(state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.DISABLED)
 
     def open_tutorial(self, event):
         tutorial_path = resource_path('instructions.html')
         webbrowser.open_new("file://" + os.path.abspath(tutorial_path))
     
+    def open_gantt_window(self):
+        if self.last_schedule is None:
+            return
+        if self.gantt_window and self.gantt_window.window.winfo_exists():
+            self.gantt_window.window.destroy()
+        self.gantt_window = GanttWindow(self.master, self.last_schedule, self.themes)
+
     def open_dependency_rules_window(self):
         input_file = self.tasks_entry.get()
         if not input_file:
@@ -294,11 +439,207 @@ class SchedulerGUI:
         else:
             self.dependency_rules_window.window.lift()
 
+class GanttWindow:
+    """
+    Gantt preview of an in-memory schedule: resources as rows, grouped under
+    their department, and days as columns.
+
+    Only the rows and days in view are drawn, from a gantt.GanttLayout whose
+    bars already merge consecutive days of a task, so scrolling stays smooth
+    with thousands of bars. Ctrl+wheel or the +/- buttons zoom around the
+    pointer, the scrollbars, wheel or dragging pan, and clicking a bar shows
+    its task in the status line.
+    """
+
+    def __init__(self, parent, schedule, themes):
+        self.themes = themes
+        self.layout = GanttLayout(schedule)
+        self.top_row = 0
+        self.first_day = 1
+        self.day_width = GANTT_DAY_WIDTH
+        self.drag_start = None
+        self.bar_items = {}  # Canvas item -> the bar it draws, for the items in view
+        self.window = tk.Toplevel(parent)
+        self.window.title("Schedule Preview")
+        self.window.geometry("900x500")
+        self.configure_styles()
+        self.create_widgets()
+        self.window.iconphoto(False, tk.PhotoImage(file=resource_path('Orange_small_logo.png')))
+
+    def configure_styles(self):
+        self.style = ttk.Style()
+        self.style.configure("GanttFrame.TFrame", background=self.themes.current_theme['bg'])
+        self.window.configure(bg=self.themes.current_theme['bg'])
+
+    def create_widgets(self):
+        self.font = Font(family="Helvetica Neue", size=9)
+        self.bold_font = Font(family="Helvetica Neue", size=9, weight="bold")
+        self.label_width = max((self.font.measure(name) for _, name in self.layout.rows), default=0) + 16
+
+        toolbar = ttk.Frame(self.window, style="GanttFrame.TFrame")
+        toolbar.pack(fill=tk.X, padx=10, pady=(10, 0))
+        ttk.Button(toolbar, text="−", width=3, command=lambda: self.zoom(1 / 1.5), style="TButton").pack(side=tk.LEFT)
+        ttk.Button(toolbar, text="+", width=3, command=lambda: self.zoom(1.5), style="TButton").pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Fit", command=self.zoom_to_fit, style="TButton").pack(side=tk.LEFT)
+
+        self.status_label = ttk.Label(self.window, text=f"{self.layout.last_day} days. Click a bar for details.", style="TLabel")
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=5)
+
+        self.gantt_frame = ttk.Frame(self.window, style="GanttFrame.TFrame")
+        self.gantt_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.canvas = tk.Canvas(self.gantt_frame, bg=self.themes.current_theme['bg'], highlightthickness=0)
+        self.v_scrollbar = ttk.Scrollbar(self.gantt_frame, orient="vertical", command=self.scroll_rows)
+        self.h_scrollbar = ttk.Scrollbar(self.gantt_frame, orient="horizontal", command=self.scroll_days)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.v_scrollbar.grid(row=0, column=1, sticky="ns")
+        self.h_scrollbar.grid(row=1, column=0, sticky="ew")
+        self.gantt_frame.rowconfigure(0, weight=1)
+        self.gantt_frame.columnconfigure(0, weight=1)
+
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll_rows("scroll", -1 if event.delta > 0 else 1, "units"))
+        self.canvas.bind("<Shift-MouseWheel>", lambda event: self.scroll_days("scroll", -1 if event.delta > 0 else 1, "units"))
+        self.canvas.bind("<Control-MouseWheel>", lambda event: self.zoom(1.25 if event.delta > 0 else 0.8, event.x))
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_rows("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_rows("scroll", 1, "units"))
+        self.canvas.bind("<Control-Button-4>", lambda event: self.zoom(1.25, event.x))
+        self.canvas.bind("<Control-Button-5>", lambda event: self.zoom(0.8, event.x))
+
+    def in_view(self):
+        """Number of whole (rows, days) that fit on the canvas."""
+        return (max((self.canvas.winfo_height() - GANTT_HEADER_HEIGHT) // GANTT_ROW_HEIGHT, 1),
+                max(int((self.canvas.winfo_width() - self.label_width) // self.day_width), 1))
+
+    def day_x(self, day):
+        return self.label_width + (day - self.first_day) * self.day_width
+
+    def redraw(self):
+        """Draw the day header, row labels and bars in view; everything else is left undrawn."""
+        theme = self.themes.current_theme
+        self.canvas.delete("all")
+        self.bar_items = {}
+        rows_in_view, days_in_view = self.in_view()
+        last_day = self.first_day + days_in_view
+        width = self.canvas.winfo_width()
+
+        # Label every step-th day, with at least 40 pixels between labels
+        step = max(1, -(-40 // int(self.day_width)))
+        for day in range(self.first_day + (1 - self.first_day) % step, last_day + 1, step):
+            x = self.day_x(day)
+            self.canvas.create_line(x, GANTT_HEADER_HEIGHT, x, self.canvas.winfo_height(), fill=theme['entry_bg'])
+            self.canvas.create_text(x + 2, GANTT_HEADER_HEIGHT // 2, text=str(day), anchor="w", fill=theme['fg'], font=self.font)
+
+        for i, (kind, name) in enumerate(self.layout.rows[self.top_row:self.top_row + rows_in_view + 1]):
+            y = GANTT_HEADER_HEIGHT + i * GANTT_ROW_HEIGHT
+            if kind == "department":
+                self.canvas.create_rectangle(0, y, width, y + GANTT_ROW_HEIGHT, fill=theme['entry_bg'], outline="")
+                self.canvas.create_text(6, y + GANTT_ROW_HEIGHT // 2, text=name, anchor="w", fill=theme['fg'], font=self.bold_font)
+                continue
+            self.canvas.create_text(6, y + GANTT_ROW_HEIGHT // 2, text=name, anchor="w", fill=theme['fg'], font=self.font)
+            lane_height = (GANTT_ROW_HEIGHT - 4) / self.layout.lanes[name]
+            for bar in self.layout.bars_in_view(name, self.first_day, last_day):
+                x0, x1 = max(self.day_x(bar.start_day), self.label_width), self.day_x(bar.end_day + 1)
+                y0 = y + 2 + bar.lane * lane_height
+                item = self.canvas.create_rectangle(x0, y0, x1, y0 + lane_height, fill=feature_color(bar.task), outline=theme['bg'])
+                self.bar_items[item] = bar
+                # Bars wide enough for a few characters carry as much of the task name as fits
+                characters = int((x1 - x0 - 6) // 7)
+                if characters >= 4 and lane_height >= 12:
+                    self.canvas.create_text(x0 + 3, y0 + lane_height / 2, text=bar.task.name[:characters], anchor="w", fill="#000000", font=self.font)
+
+        self.v_scrollbar.set(*view_fractions(self.top_row, rows_in_view, len(self.layout.rows)))
+        self.h_scrollbar.set(*view_fractions(self.first_day - 1, days_in_view, self.layout.last_day))
+
+    def scroll_rows(self, *args):
+        self.top_row = scrolled(args, self.top_row, self.in_view()[0], len(self.layout.rows))
+        self.redraw()
+
+    def scroll_days(self, *args):
+        self.first_day = scrolled(args, self.first_day - 1, self.in_view()[1], self.layout.last_day) + 1
+        self.redraw()
+
+    def zoom(self, factor, x=None):
+        """Scale the day width by factor, keeping the day under x (default: the left edge) in place."""
+        x = self.label_width if x is None else max(x, self.label_width)
+        anchor_day = self.first_day + (x - self.label_width) / self.day_width
+        low, high = GANTT_DAY_WIDTH_RANGE
+        self.day_width = min(max(self.day_width * factor, low), high)
+        self.first_day = max(1, round(anchor_day - (x - self.label_width) / self.day_width))
+        self.redraw()
+
+    def zoom_to_fit(self):
+        available = self.canvas.winfo_width() - self.label_width
+        low, high = GANTT_DAY_WIDTH_RANGE
+        self.day_width = min(max(available / max(self.layout.last_day, 1), low), high)
+        self.first_day = 1
+        self.redraw()
+
+    def on_press(self, event):
+        self.drag_start = (event.x, event.y, self.first_day, self.top_row)
+
+    def on_drag(self, event):
+        x, y, first_day, top_row = self.drag_start
+        rows_in_view, days_in_view = self.in_view()
+        self.first_day = max(1, min(first_day + round((x - event.x) / self.day_width), max(self.layout.last_day - days_in_view + 1, 1)))
+        self.top_row = max(0, min(top_row + (y - event.y) // GANTT_ROW_HEIGHT, max(len(self.layout.rows) - rows_in_view, 0)))
+        self.redraw()
+
+    def on_release(self, event):
+        x, y = self.drag_start[:2]
+        if abs(event.x - x) < 4 and abs(event.y - y) < 4:
+            self.inspect(event.x, event.y)
+
+    def inspect(self, x, y):
+        """Show the task of the bar under (x, y) in the status line."""
+        for item in reversed(self.canvas.find_overlapping(x, y, x, y)):
+            bar = self.bar_items.get(item)
+            if bar is not None:
+                task = bar.task
+                self.status_label.configure(
+                    text=f"{task.name} (priority {task.priority}) on {bar.resource_name}: days {bar.start_day}-{bar.end_day}, "
+                         f"{bar.work_time:.1f} days of work. The task runs from day {task.start_day} to {task.end_day}."
+                )
+                return
+
+    def update_theme(self):
+        """Update theme styles and redraw the view."""
+        self.configure_styles()
+        self.canvas.configure(bg=self.themes.current_theme['bg'])
+        self.redraw()
+
+def view_fractions(first, in_view, count):
+    """The (first, last) fractions a Scrollbar shows for in_view items from first out of count."""
+    if not count:
+        return 0.0, 1.0
+    return first / count, min(first + in_view, count) / count
+
+def scrolled(args, first, in_view, count):
+    """Apply a Scrollbar command ("moveto", fraction) or ("scroll", n, "units"/"pages") to the first index in view."""
+    if args[0] == "moveto":
+        first = int(float(args[1]) * count)
+    else:
+        first += int(args[1]) * (in_view if args[2] == "pages" else 1)
+    return max(0, min(first, count - in_view))
+
 class DependencyRulesWindow:
+    """
+    Adjacency-matrix editor for the department dependency rules: a filled cell
+    in row A and column B means A must be completed before B.
+
+    The matrix is drawn on a single Canvas and only the cells in view are
+    drawn, so opening, scrolling and re-theming cost the same with any number
+    of departments. Every toggle is checked for cycles by rule_graph.RuleGraph.
+    """
+
     def __init__(self, parent, input_file, themes):
         self.parent = parent
         self.input_file = input_file
         self.themes = themes
+        self.top_row = 0
+        self.left_column = 0
         self.window = tk.Toplevel(parent)
         self.window.title("Department Dependency Rules")
         self.window.geometry("600x400")
@@ -312,44 +653,58 @@ class DependencyRulesWindow:
 
         # Configure styles using current theme
         self.style.configure("DepartmentFrame.TFrame", background=self.themes.current_theme['bg'])
-        self.style.configure("ScrollableFrame.TFrame", background=self.themes.current_theme['bg'])
         self.style.configure("TButton", font=("Helvetica Neue", 12), padding=10, borderwidth=0, background=self.themes.current_theme['button_bg'], foreground=self.themes.current_theme['fg'])
         self.style.map("TButton", background=[("active", self.themes.current_theme['button_hover'])])
         self.style.configure("TLabel", font=("Helvetica Neue", 12), background=self.themes.current_theme['bg'], foreground=self.themes.current_theme['fg'])
-        self.style.configure("TCheckbutton", font=("Helvetica Neue", 12), background=self.themes.current_theme['bg'], foreground=self.themes.current_theme['fg'])
-        self.style.map("TCheckbutton", background=[("hover", self.themes.current_theme['button_hover'])])
-        
+
         self.window.configure(bg=self.themes.current_theme['bg'])
 
     def create_widgets(self):
-        self.create_department_frame()
+        self.create_filter_bar()
         self.create_save_button()
+        self.create_status_label()
+        self.create_department_frame()
 
-    def create_department_frame(self):
-        self.dept_frame = ttk.Frame(self.window, style="DepartmentFrame.TFrame")
-        self.dept_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    def create_filter_bar(self):
+        self.filter_frame = ttk.Frame(self.window, style="DepartmentFrame.TFrame")
+        self.filter_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
 
-        self.canvas = tk.Canvas(self.dept_frame, bg=self.themes.current_theme['bg'])
-        self.scrollbar = ttk.Scrollbar(self.dept_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas, style="ScrollableFrame.TFrame")
+        self.row_filter = tk.StringVar()
+        self.column_filter = tk.StringVar()
+        for text, variable in (("Departments", self.row_filter), ("Before", self.column_filter)):
+            ttk.Label(self.filter_frame, text=text, style="TLabel").pack(side=tk.LEFT, padx=(0, 5))
+            ttk.Entry(self.filter_frame, textvariable=variable, width=18).pack(side=tk.LEFT, padx=(0, 15))
+            variable.trace_add("write", lambda *args: self.apply_filters())
 
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
+    def create_status_label(self):
+        self.status_label = ttk.Label(self.window, text="", style="TLabel", wraplength=560)
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X, padx=10)
 
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+    def create_department_frame(self):
+        self.dept_frame = ttk.Frame(self.window, style="DepartmentFrame.TFrame")
+        self.dept_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        self.dept_frame.pack(fill=tk.BOTH, expand=True)
-        self.canvas.pack(side="left", fill=tk.BOTH, expand=True)
-        self.scrollbar.pack(side="right", fill="y")
+        self.canvas = tk.Canvas(self.dept_frame, bg=self.themes.current_theme['bg'], highlightthickness=0)
+        self.v_scrollbar = ttk.Scrollbar(self.dept_frame, orient="vertical", command=self.scroll_rows)
+        self.h_scrollbar = ttk.Scrollbar(self.dept_frame, orient="horizontal", command=self.scroll_columns)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.v_scrollbar.grid(row=0, column=1, sticky="ns")
+        self.h_scrollbar.grid(row=1, column=0, sticky="ew")
+        self.dept_frame.rowconfigure(0, weight=1)
+        self.dept_frame.columnconfigure(0, weight=1)
+
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll_rows("scroll", -1 if event.delta > 0 else 1, "units"))
+        self.canvas.bind("<Shift-MouseWheel>", lambda event: self.scroll_columns("scroll", -1 if event.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_rows("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_rows("scroll", 1, "units"))
 
         self.load_dependencies()
 
     def create_save_button(self):
         save_button = ttk.Button(self.window, text="Save Dependencies", command=self.save_dependencies, style="TButton")
-        save_button.pack(pady=10)
+        save_button.pack(side=tk.BOTTOM, pady=10)
 
     def load_dependencies(self):
         try:
@@ -358,33 +713,90 @@ class DependencyRulesWindow:
         except FileNotFoundError:
             self.dependencies = {}
 
+        # Imported here so opening the main window does not pay for pandas and openpyxl
+        from excel_io import read_departments_from_excel
+        from rule_graph import RuleGraph
         self.departments = read_departments_from_excel(self.input_file)
-        self.dependency_vars = {}
-
-        # Create header
-        ttk.Label(self.scrollable_frame, text="Department", font=("Helvetica", 10, "bold"), style="TLabel").grid(row=0, column=0, sticky="w", padx=5, pady=2)
-        ttk.Label(self.scrollable_frame, text="Must be completed before", font=("Helvetica", 10, "bold"), style="TLabel").grid(row=0, column=1, sticky="w", padx=5, pady=2)
-
-        for i, dept in enumerate(self.departments, start=1):
-            label = ttk.Label(self.scrollable_frame, text=dept, style="TLabel")
-            label.grid(row=i, column=0, sticky="w", padx=5, pady=2)
-            
-            self.dependency_vars[dept] = {}
-            dep_frame = ttk.Frame(self.scrollable_frame, style="ScrollableFrame.TFrame")
-            dep_frame.grid(row=i, column=1, sticky="w", padx=5, pady=2)
-
-            for j, dep_dept in enumerate(self.departments):
-                if dept != dep_dept:
-                    var = tk.BooleanVar(value=dep_dept in self.dependencies.get(dept, []))
-                    self.dependency_vars[dept][dep_dept] = var
-                    check = ttk.Checkbutton(dep_frame, text=dep_dept, variable=var, style="TCheckbutton")
-                    check.grid(row=0, column=j, sticky="w", padx=2, pady=2)
+        self.graph = RuleGraph(self.departments, self.dependencies)
+
+        # Row headers sit left of the matrix and column headers, drawn upright, above it
+        self.font = Font(family="Helvetica Neue", size=10)
+        self.header_size = max((self.font.measure(department) for department in self.departments), default=0) + 12
+        self.apply_filters()
+        if self.graph.conflicts:
+            self.status_label.configure(text=f"{len(self.graph.conflicts)} saved rule(s) form a cycle and are shown in red.")
+
+    def apply_filters(self):
+        row_text = self.row_filter.get().strip().lower()
+        column_text = self.column_filter.get().strip().lower()
+        self.rows = [department for department in self.departments if row_text in department.lower()]
+        self.columns = [department for department in self.departments if column_text in department.lower()]
+        self.top_row = self.left_column = 0
+        self.redraw()
+
+    def cells_in_view(self):
+        """Number of whole (rows, columns) of cells that fit on the canvas."""
+        return (max((self.canvas.winfo_height() - self.header_size) // CELL_SIZE, 1),
+                max((self.canvas.winfo_width() - self.header_size) // CELL_SIZE, 1))
+
+    def redraw(self):
+        """Draw the headers and cells in view; everything else is left undrawn."""
+        if not hasattr(self, 'graph'):
+            return
+        theme = self.themes.current_theme
+        self.canvas.delete("all")
+        rows_in_view, columns_in_view = self.cells_in_view()
+        rows = self.rows[self.top_row:self.top_row + rows_in_view + 1]
+        columns = self.columns[self.left_column:self.left_column + columns_in_view + 1]
+
+        for j, column in enumerate(columns):
+            x = self.header_size + j * CELL_SIZE + CELL_SIZE // 2
+            self.canvas.create_text(x, self.header_size - 6, text=column, angle=90, anchor="w", fill=theme['fg'], font=self.font)
+        for i, row in enumerate(rows):
+            y = self.header_size + i * CELL_SIZE
+            self.canvas.create_text(self.header_size - 6, y + CELL_SIZE // 2, text=row, anchor="e", fill=theme['fg'], font=self.font)
+            for j, column in enumerate(columns):
+                x = self.header_size + j * CELL_SIZE
+                if row == column:
+                    fill = theme['entry_bg']
+                elif (row, column) in self.graph.conflicts:
+                    fill = CONFLICT_COLOR
+                elif self.graph.has_rule(row, column):
+                    fill = theme['button_bg']
+                else:
+                    fill = theme['bg']
+                self.canvas.create_rectangle(x, y, x + CELL_SIZE, y + CELL_SIZE, fill=fill, outline=theme['fg'])
+
+        self.v_scrollbar.set(*view_fractions(self.top_row, rows_in_view, len(self.rows)))
+        self.h_scrollbar.set(*view_fractions(self.left_column, columns_in_view, len(self.columns)))
+
+    def scroll_rows(self, *args):
+        self.top_row = scrolled(args, self.top_row, self.cells_in_view()[0], len(self.rows))
+        self.redraw()
+
+    def scroll_columns(self, *args):
+        self.left_column = scrolled(args, self.left_column, self.cells_in_view()[1], len(self.columns))
+        self.redraw()
+
+    def on_click(self, event):
+        i = (event.y - self.header_size) // CELL_SIZE + self.top_row
+        j = (event.x - self.header_size) // CELL_SIZE + self.left_column
+        if event.x < self.header_size or event.y < self.header_size or i >= len(self.rows) or j >= len(self.columns):
+            return
+        source, target = self.rows[i], self.columns[j]
+        if source == target:
+            return
+        cycle = self.graph.toggle(source, target)
+        if cycle:
+            self.status_label.configure(text=f"{source} before {target} would form a cycle: {' → '.join(cycle)}")
+        else:
+            state = "must" if self.graph.has_rule(source, target) else "no longer has to"
+            self.status_label.configure(text=f"{source} {state} be completed before {target}.")
+        self.redraw()
 
     def save_dependencies(self):
-        new_dependencies = {}
-        for dept, deps in self.dependency_vars.items():
-            new_dependencies[dept] = [d for d, v in deps.items() if v.get()]
-        
+        new_dependencies = self.graph.rules()
+
         with open('dependency_rules.json', 'w') as f:
             json.dump(new_dependencies, f, indent=4)
         
@@ -392,24 +804,10 @@ class DependencyRulesWindow:
         messagebox.showinfo("Success", "Dependency rules saved successfully!")
 
     def update_theme(self):
-        """Update theme styles and widget configurations."""
+        """Update theme styles and redraw the cells in view."""
         self.configure_styles()
-        
-        # Update the background and styles of all existing widgets
-        self.window.configure(bg=self.themes.current_theme['bg'])
-        self.dept_frame.configure(style="DepartmentFrame.TFrame")
         self.canvas.configure(bg=self.themes.current_theme['bg'])
-        self.scrollable_frame.configure(style="ScrollableFrame.TFrame")
-        
-        for child in self.scrollable_frame.winfo_children():
-            if isinstance(child, ttk.Label):
-                child.configure(style="TLabel")
-            elif isinstance(child, ttk.Checkbutton):
-                child.configure(style="TCheckbutton")
-
-        for child in self.window.winfo_children():
-            if isinstance(child, ttk.Button):
-                child.configure(style="TButton")
+        self.redraw()
 
 
 
@@ -417,6 +815,10 @@ class DependencyRulesWindow:
 def main():
     root = tk.Tk()
     app = SchedulerGUI(root)
+    root.after_idle(app.report_startup)
+    if "--startup-time" in sys.argv:
+        # Print the time to the first painted window and exit, for tracking startup cost
+        root.after_idle(lambda: (print(f"Startup time: {app.startup_seconds:.3f}s"), root.destroy()))
     root.mainloop()
 
 if __name__ == "__main__":
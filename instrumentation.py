@@ -0,0 +1,78 @@
+# instrumentation.py
+# This file contains the opt-in run metrics: per-stage wall-clock timers and hot-path counters.
+
+import cProfile
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+class Metrics:
+    """
+    Counters and stage timers for a single run.
+    Hot paths guard their calls with `if metrics.enabled:` so a disabled
+    instance costs one attribute check per call site.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.counters = defaultdict(int)
+        self.stages = {}
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] += amount
+
+    def record_max(self, name, value):
+        if self.enabled and value > self.counters[name]:
+            self.counters[name] = value
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as a pipeline stage."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0) + time.perf_counter() - start
+
+    def report(self):
+        return {
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "total_seconds": round(sum(self.stages.values()), 6),
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+metrics = Metrics()
+
+@contextmanager
+def instrumented_run(metrics_file=None, profile_file=None):
+    """
+    Collect metrics for the enclosed run when metrics_file or profile_file is set.
+    The JSON report goes to metrics_file and a cProfile dump to profile_file.
+    """
+    if not metrics_file and not profile_file:
+        yield metrics
+        return
+
+    metrics.reset()
+    metrics.enabled = True
+    profiler = cProfile.Profile() if profile_file else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+        metrics.enabled = False
+        if metrics_file:
+            with open(metrics_file, 'w') as f:
+                json.dump(metrics.report(), f, indent=4)
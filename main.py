@@ -1,30 +1,157 @@
 # main.py
 # This is the entry point of the application. It orchestrates the overall flow of the program.
 
-from excel_io import read_tasks_from_excel, read_resources_from_excel, generate_excel_output
-from scheduler import Scheduler
-from utils import topological_sort
-
-def main(tasks_file, output_file):
-    # Read tasks and resources from Excel files
-    tasks = read_tasks_from_excel(tasks_file)
-    resources = read_resources_from_excel(tasks_file)
-    
-    # Combine QC Creation and QC execution tasks
+import os
+import sys
+from excel_io import read_workbook
+from instrumentation import instrumented_run, metrics
+from output_writers import get_writer
+from schedule_state import load_state, merge_task_changes, same_resources, save_state
+from optimizer import optimize_schedule
+from partition import schedule_partitioned
+from scheduler import Scheduler, check_policies
+from utils import topological_sort, open_output_file
+
+def combine_qc_tasks(tasks):
+    """Run QC Creation and QC execution tasks on the QC resources, with their durations combined."""
     for task in tasks:
         if "QC Creation" in task.durations or "QC execution" in task.durations:
             task.durations = {"QC": task.durations.get("QC Creation", 0) + task.durations.get("QC execution", 0)}
-    
-    # Sort tasks topologically and by duration
-    sorted_tasks = topological_sort(tasks)
-    
-    # Create a schedule and assign tasks
-    schedule = Scheduler(resources)  
-    schedule.schedule_tasks(sorted_tasks)
-    # schedule.print_schedule()
-    
-    # Generate and save the Excel output
-    generate_excel_output(schedule, output_file)
+
+def _stage(name, progress):
+    """Report the start of a pipeline stage to the progress callback, then time it."""
+    if progress:
+        progress(name, 0, 0)
+    return metrics.stage(name)
+
+def _stage_progress(name, progress):
+    """Adapt the progress callback to the (done, total) calls of a single stage."""
+    if progress:
+        return lambda done, total: progress(name, done, total)
+    return None
+
+def main(tasks_file, output_file, output_format=None, auto_open=True, rules_file='dependency_rules.json',
+         metrics_file=None, profile_file=None, state_file=None, incremental=False, analytics=False,
+         progress=None, optimize=None, restarts=None, priority_policy="list",
+         placement_policy="first_fit", partition=None, split_tasks=False):
+    """
+    Schedule the tasks of tasks_file and write the result to output_file, or
+    only return it when output_file is None.
+    output_format picks a writer from output_writers.WRITERS and defaults to the
+    output file's extension. Set auto_open=False for headless runs.
+    metrics_file and profile_file turn on instrumentation and receive the JSON
+    metrics report and a cProfile dump of the run.
+    state_file saves the finished schedule. With incremental=True and an
+    existing state_file, only tasks that changed since that schedule, and their
+    dependents, are re-placed; everything else keeps its placement. If the
+    resources sheet no longer matches the saved resources, the run schedules
+    everything from scratch instead, with a warning.
+    analytics adds utilization, idle gap, department load and makespan sheets
+    to Excel output.
+    optimize, a number of seconds, improves the makespan of a full run with
+    that much simulated annealing per restart, starting from the greedy
+    schedule; restarts run in parallel and default to one per CPU. The
+    optimizer then replaces the greedy run, so partition does not apply.
+    priority_policy picks the order in which ready tasks are placed, one of
+    scheduler.PRIORITY_POLICIES, and placement_policy how each picks its
+    resource, one of scheduler.PLACEMENT_POLICIES.
+    split_tasks divides each task whose Max Split allows it across up to that
+    many resources of its department, so it finishes as early as possible.
+    partition, a number of worker processes (0 for one per CPU), schedules
+    independent components of a full run in parallel; the schedule is the
+    same as without it. optimize and partition are rejected for incremental runs,
+    and restarts without optimize.
+    progress, if given, is called as progress(stage, done, total) when each
+    stage starts and as it advances: tasks placed, seconds of the optimize
+    budget spent and rows written. An exception it raises, such as
+    worker.RunCancelled, stops the run at that point. Returns the
+    finished schedule.
+    """
+    if incremental and (optimize or partition is not None):
+        raise ValueError("optimize and partition only apply to full runs, not incremental ones")
+    if restarts is not None and not optimize:
+        raise ValueError("restarts only applies with optimize")
+    check_policies(priority_policy, placement_policy)
+
+    with instrumented_run(metrics_file, profile_file):
+        # Read tasks and resources from the Excel file in one pass
+        with _stage("read_workbook", progress):
+            tasks, resources = read_workbook(tasks_file, rules_file)
+
+        # Combine QC Creation and QC execution tasks
+        combine_qc_tasks(tasks)
+
+        schedule = None
+        if incremental and state_file and os.path.exists(state_file):
+            with _stage("load_state", progress):
+                schedule, placed_tasks = load_state(state_file)
+                if same_resources(schedule.resources, resources):
+                    schedule.priority_policy = priority_policy
+                    schedule.placement_policy = placement_policy
+                    schedule.split_tasks = split_tasks
+                    tasks, changed_tasks, removed_tasks = merge_task_changes(placed_tasks, tasks)
+                else:
+                    # The saved calendars belong to other resources, so nothing of them can be kept
+                    print(f"Warning: the resources of {tasks_file} differ from those saved in {state_file}. "
+                          "Scheduling all tasks from scratch.")
+                    schedule = None
+
+        if schedule is not None:
+            # Re-place only what changed against the saved calendars
+            with _stage("topological_sort", progress):
+                sorted_tasks = topological_sort(tasks)
+            with _stage("schedule_tasks", progress):
+                replanned = schedule.reschedule(sorted_tasks, changed_tasks, removed_tasks,
+                                                _stage_progress("schedule_tasks", progress))
+            if metrics.enabled:
+                metrics.count("incremental.tasks_replanned", len(replanned))
+        else:
+            # Sort tasks topologically and by duration
+            with _stage("topological_sort", progress):
+                sorted_tasks = topological_sort(tasks)
+
+            if optimize:
+                # The optimizer builds the greedy schedule itself, as its starting point and baseline
+                with _stage("optimize", progress):
+                    schedule, report = optimize_schedule(sorted_tasks, resources, optimize, restarts,
+                                                         priority_policy=priority_policy,
+                                                         placement_policy=placement_policy,
+                                                         split_tasks=split_tasks,
+                                                         progress=_stage_progress("optimize", progress))
+                print(f"Optimized makespan: {report['makespan']} days, down from {report['greedy_makespan']} "
+                      f"({report['improvement_percent']}%) after {report['evaluations']} evaluations")
+            else:
+                # Create a schedule and assign tasks
+                with _stage("schedule_tasks", progress):
+                    if partition is not None:
+                        schedule = schedule_partitioned(sorted_tasks, resources, partition,
+                                                        priority_policy=priority_policy,
+                                                        placement_policy=placement_policy,
+                                                        progress=_stage_progress("schedule_tasks", progress),
+                                                        split_tasks=split_tasks)
+                    else:
+                        schedule = Scheduler(resources, priority_policy=priority_policy,
+                                             placement_policy=placement_policy, split_tasks=split_tasks)
+                        schedule.schedule_tasks(sorted_tasks, _stage_progress("schedule_tasks", progress))
+            # schedule.print_schedule()
+
+        if state_file:
+            with _stage("save_state", progress):
+                save_state(schedule, tasks, state_file)
+
+        # Write the schedule in the requested format
+        if output_file:
+            with _stage("write_output", progress):
+                get_writer(output_format, output_file, analytics).write(schedule, output_file,
+                                                                        _stage_progress("write_output", progress))
+        if metrics.enabled:
+            metrics.count("tasks", len(tasks))
+            metrics.count("resources", len(resources))
+
+    if auto_open and output_file:
+        open_output_file(output_file)
+    return schedule
 
 if __name__ == "__main__":
-    main("input_tasks.xlsx", "output_schedule.xlsx")
\ No newline at end of file
+    from cli import run_cli
+    sys.exit(run_cli())
\ No newline at end of file
@@ -0,0 +1,193 @@
+# optimizer.py
+# This file improves the makespan of the greedy schedule with simulated annealing over task order and resource choices.
+
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from data_structures import Resource, Task
+from instrumentation import metrics
+from scheduler import Scheduler
+
+# Seconds between two calls of the optimize_schedule progress callback
+PROGRESS_SECONDS = 1.0
+
+# Set in each worker process by _init_worker; once set, the restarts return their best so far
+_stop = None
+
+def _init_worker(stop):
+    global _stop
+    _stop = stop
+
+def optimize_schedule(sorted_tasks, resources, budget=10.0, restarts=None, seed=0, max_evaluations=None,
+                      priority_policy="list", placement_policy="first_fit", split_tasks=False, progress=None):
+    """
+    Start from the greedy schedule of sorted_tasks and search for a shorter one
+    within budget seconds of wall-clock time.
+
+    A candidate is a task order plus resource hints (task name -> resource
+    name), decoded by the regular Scheduler. The ready heap still only places a
+    task once its dependencies have ended, and hints that would split a
+    feature's QC work across resources are ignored, so every candidate keeps
+    the existing constraints. Independent annealing restarts run in parallel,
+    one per process; restarts defaults to one per CPU. Under the rank
+    priority policies the order only breaks ties, so the resource hints do
+    most of the work. A hint keeps a split task on the hinted resource alone.
+
+    progress, if given, is called as progress(seconds spent, budget) about
+    every PROGRESS_SECONDS. An exception it raises stops every restart at its
+    next evaluation and is passed on.
+
+    Returns the best schedule, placed on copies of resources with the task
+    objects updated to match, and a report comparing it to the greedy baseline.
+    """
+    start = time.perf_counter()
+    problem = _encode(sorted_tasks, resources)
+    restarts = restarts or os.cpu_count() or 1
+    policies = (priority_policy, placement_policy, split_tasks)
+    jobs = [(problem, budget, seed + restart, max_evaluations, policies) for restart in range(restarts)]
+    if restarts == 1:
+        results = [_anneal(*jobs[0], progress=progress)]
+    else:
+        stop = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=restarts, initializer=_init_worker, initargs=(stop,)) as executor:
+            futures = [executor.submit(_anneal, *job) for job in jobs]
+            try:
+                while True:
+                    done, not_done = wait(futures, timeout=PROGRESS_SECONDS, return_when=FIRST_EXCEPTION)
+                    if not not_done or any(future.exception() for future in done):
+                        break
+                    if progress:
+                        progress(min(int(time.perf_counter() - start), math.ceil(budget)), math.ceil(budget))
+                results = [future.result() for future in futures]
+            except BaseException:
+                # Let the other restarts return early instead of running out their budget
+                stop.set()
+                raise
+
+    greedy_cost = results[0]["greedy_cost"]
+    best = min(results, key=lambda result: result["cost"])
+    # Replay the winner on the caller's tasks so their start and end days describe the returned schedule
+    order = [sorted_tasks[i] for i in best["order"]]
+    schedule = Scheduler([Resource(r.name, r.department) for r in resources], best["hints"], *policies)
+    schedule.schedule_tasks(order)
+
+    evaluations = sum(result["evaluations"] for result in results)
+    if metrics.enabled:
+        metrics.count("optimizer.evaluations", evaluations)
+    makespan = max((task.end_day for task in sorted_tasks), default=0)
+    return schedule, {
+        "greedy_makespan": greedy_cost[0],
+        "makespan": makespan,
+        "improvement_days": greedy_cost[0] - makespan,
+        "improvement_percent": round(100 * (greedy_cost[0] - makespan) / greedy_cost[0], 2) if greedy_cost[0] else 0.0,
+        "restarts": restarts,
+        "restart_makespans": [result["cost"][0] for result in results],
+        "evaluations": evaluations,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+def _encode(sorted_tasks, resources):
+    """Plain-data copy of the problem, which pickles cheaply and without deep recursion for the worker processes."""
+    index = {task: i for i, task in enumerate(sorted_tasks)}
+    tasks = [(task.name, task.durations, task.priority, [index[dep] for dep in task.dependencies], task.max_split)
+             for task in sorted_tasks]
+    return tasks, [(resource.name, resource.department) for resource in resources]
+
+def _decode(problem):
+    task_rows, resource_rows = problem
+    tasks = [Task(name, durations, priority, max_split=max_split) for name, durations, priority, _, max_split in task_rows]
+    for task, (_, _, _, dependencies, _) in zip(tasks, task_rows):
+        task.dependencies = [tasks[i] for i in dependencies]
+    return tasks, resource_rows
+
+def _evaluate(tasks, resource_rows, order, hints, policies):
+    """Schedule tasks in the given order with the given hints; the cost is (makespan, sum of end days)."""
+    schedule = Scheduler([Resource(name, department) for name, department in resource_rows], hints, *policies)
+    schedule.schedule_tasks([tasks[i] for i in order])
+    end_days = [task.end_day for task in tasks]
+    return max(end_days, default=0), sum(end_days)
+
+def _energy(cost, n_tasks):
+    # Makespan first; the mean end day breaks the many makespan ties so the search has a gradient
+    return cost[0] + 0.1 * cost[1] / max(n_tasks, 1)
+
+def _critical_tasks(tasks, dependencies, makespan):
+    """Indices of tasks ending on the makespan, followed back through dependencies that ended just before them."""
+    stack = [i for i, task in enumerate(tasks) if task.end_day == makespan]
+    critical = set()
+    while stack:
+        i = stack.pop()
+        if i in critical:
+            continue
+        critical.add(i)
+        stack.extend(dep for dep in dependencies[i] if tasks[dep].end_day == tasks[i].start_day - 1)
+    return list(critical)
+
+def _anneal(problem, budget, seed, max_evaluations=None, policies=("list", "first_fit", False), progress=None):
+    """
+    One simulated annealing run from the greedy solution. Returns its best
+    order, hints and cost. progress is called as in optimize_schedule when the
+    run is in-process; in a worker process, the run stops early once the
+    parent sets the stop event.
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    tasks, resource_rows = _decode(problem)
+    dependencies = [row[3] for row in problem[0]]
+    resources_by_department = {}
+    for name, department in resource_rows:
+        resources_by_department.setdefault(department, []).append(name)
+    # Resources each task could be moved to
+    alternatives = [
+        sorted({name for department, duration in task.durations.items() if duration > 0
+                for name in resources_by_department.get(department, ())})
+        for task in tasks
+    ]
+    movable = {i for i, names in enumerate(alternatives) if len(names) > 1}
+
+    order, hints = list(range(len(tasks))), {}
+    cost = greedy_cost = _evaluate(tasks, resource_rows, order, hints, policies)
+    best_order, best_hints, best_cost = order, hints, cost
+    critical = _critical_tasks(tasks, dependencies, cost[0])
+    initial_temperature = max(1.0, 0.05 * cost[0])
+    evaluations = 1
+    reported = 0
+
+    while time.perf_counter() - start < budget and (max_evaluations is None or evaluations < max_evaluations):
+        if _stop is not None and _stop.is_set():
+            break
+        if progress and time.perf_counter() - start >= reported + PROGRESS_SECONDS:
+            reported = int(time.perf_counter() - start)
+            progress(reported, math.ceil(budget))
+        # Half of the moves target the chain that ends on the makespan, where a change can shorten it
+        pool = critical if critical and rng.random() < 0.5 else range(len(tasks))
+        i = rng.choice(pool)
+        candidate_order, candidate_hints = order, hints
+        if i in movable and rng.random() < 0.5:
+            candidate_hints = dict(hints)
+            candidate_hints[tasks[i].name] = rng.choice(alternatives[i])
+        else:
+            candidate_order = list(order)
+            candidate_order.remove(i)
+            candidate_order.insert(rng.randrange(len(candidate_order) + 1), i)
+
+        candidate_cost = _evaluate(tasks, resource_rows, candidate_order, candidate_hints, policies)
+        evaluations += 1
+        temperature = initial_temperature * max(1 - (time.perf_counter() - start) / budget, 0.01)
+        delta = _energy(candidate_cost, len(tasks)) - _energy(cost, len(tasks))
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            order, hints, cost = candidate_order, candidate_hints, candidate_cost
+            critical = _critical_tasks(tasks, dependencies, cost[0])
+            if cost < best_cost:
+                best_order, best_hints, best_cost = order, hints, cost
+
+    return {
+        "order": best_order,
+        "hints": best_hints,
+        "cost": best_cost,
+        "greedy_cost": greedy_cost,
+        "evaluations": evaluations,
+    }
@@ -0,0 +1,134 @@
+# output_writers.py
+# This file contains the writers that export a finished schedule to the supported output formats.
+
+import csv
+import json
+import os
+from itertools import islice
+from excel_io import WRITE_PROGRESS_INTERVAL, generate_excel_output
+
+RECORD_FIELDS = ["resource", "department", "task", "day", "work_time"]
+
+def iter_assignment_records(schedule):
+    """Yield one (resource, department, task, day, work_time) record per entry of schedule.assignments."""
+    departments = {}
+    for resource in schedule.resources:
+        departments.setdefault(resource.name, resource.department)
+    for resource_name, assignments in schedule.assignments.items():
+        department = departments.get(resource_name)
+        for task, day, work_time in assignments:
+            yield resource_name, department, task.name, day, float(work_time)
+
+def iter_record_chunks(schedule, progress=None):
+    """
+    Yield the records of iter_assignment_records in lists of up to
+    WRITE_PROGRESS_INTERVAL, calling progress(records written, records) after
+    each list has been written.
+    """
+    total = sum(len(assignments) for assignments in schedule.assignments.values())
+    records = iter_assignment_records(schedule)
+    written = 0
+    while True:
+        chunk = list(islice(records, WRITE_PROGRESS_INTERVAL))
+        if not chunk:
+            return
+        yield chunk
+        written += len(chunk)
+        if progress:
+            progress(written, total)
+
+class ScheduleWriter:
+    """
+    Base class of the output sinks. Subclasses write schedule.assignments to a file.
+    analytics asks for the analytics tables as well; only formats with room for
+    extra tables (the Excel workbook) honour it.
+    write's progress, if given, is called as progress(done, total) as rows are
+    written; an exception it raises stops the export.
+    """
+    extension = None
+
+    def __init__(self, analytics=False):
+        self.analytics = analytics
+
+    def write(self, schedule, filename, progress=None):
+        raise NotImplementedError
+
+class ExcelScheduleWriter(ScheduleWriter):
+    """Formatted day x resource workbook for people to read."""
+    extension = ".xlsx"
+
+    def write(self, schedule, filename, progress=None):
+        generate_excel_output(schedule, filename, auto_open=False, analytics=self.analytics, progress=progress)
+
+class CsvScheduleWriter(ScheduleWriter):
+    """Long-format CSV with one row per record, streamed to disk."""
+    extension = ".csv"
+
+    def write(self, schedule, filename, progress=None):
+        with open(filename, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(RECORD_FIELDS)
+            for chunk in iter_record_chunks(schedule, progress):
+                writer.writerows(chunk)
+        print(f"Schedule exported to {filename}")
+
+class JsonLinesScheduleWriter(ScheduleWriter):
+    """JSON Lines with one object per record, streamed to disk."""
+    extension = ".jsonl"
+
+    def write(self, schedule, filename, progress=None):
+        with open(filename, 'w', encoding='utf-8') as file:
+            for chunk in iter_record_chunks(schedule, progress):
+                for record in chunk:
+                    file.write(json.dumps(dict(zip(RECORD_FIELDS, record))) + "\n")
+        print(f"Schedule exported to {filename}")
+
+class ColumnarScheduleWriter(ScheduleWriter):
+    """
+    Columnar file written through pandas, which needs pyarrow installed. The
+    file is written in one call, so progress is only reported before it.
+    """
+
+    def write(self, schedule, filename, progress=None):
+        import pandas as pd
+
+        df = pd.DataFrame.from_records(list(iter_assignment_records(schedule)), columns=RECORD_FIELDS)
+        if progress:
+            progress(0, len(df))
+        try:
+            self._write_frame(df, filename)
+        except ImportError as e:
+            raise ImportError(f"Writing {self.extension} files requires pyarrow: {e}") from e
+        print(f"Schedule exported to {filename}")
+
+    def _write_frame(self, df, filename):
+        raise NotImplementedError
+
+class ParquetScheduleWriter(ColumnarScheduleWriter):
+    extension = ".parquet"
+
+    def _write_frame(self, df, filename):
+        df.to_parquet(filename, index=False)
+
+class FeatherScheduleWriter(ColumnarScheduleWriter):
+    extension = ".feather"
+
+    def _write_frame(self, df, filename):
+        df.to_feather(filename)
+
+WRITERS = {
+    "xlsx": ExcelScheduleWriter,
+    "csv": CsvScheduleWriter,
+    "jsonl": JsonLinesScheduleWriter,
+    "parquet": ParquetScheduleWriter,
+    "feather": FeatherScheduleWriter,
+}
+
+def get_writer(output_format=None, filename=None, analytics=False):
+    """Return the writer for output_format, or for the extension of filename when no format is given."""
+    if output_format is None:
+        extension = os.path.splitext(filename or "")[1].lower()
+        output_format = next((name for name, writer in WRITERS.items() if writer.extension == extension), "xlsx")
+    if output_format not in WRITERS:
+        raise ValueError(f"Unknown output format '{output_format}'. Choose one of: {', '.join(WRITERS)}")
+    return WRITERS[output_format](analytics=analytics)
@@ -0,0 +1,180 @@
+# partition.py
+# This file splits a plan into independent components and schedules them in parallel processes.
+
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from data_structures import Resource, Task
+from instrumentation import metrics
+from scheduler import Scheduler
+from utils import build_dependency_graph
+
+def find_components(tasks, resources):
+    """
+    Split tasks into groups that cannot affect each other's placement.
+
+    Two tasks belong together when a dependency links them or when they can
+    run in the same department, since they then compete for its resources.
+    Departments that share a resource name are joined too, as a name's
+    workload counts once across all of its departments.
+    Returns a list of (task indices, resource indices), with both index lists
+    in the order of tasks and resources and the components ordered by their
+    first task.
+    """
+    parent = list(range(len(tasks)))
+    department_ids = {}
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    def department_id(department):
+        if department not in department_ids:
+            department_ids[department] = len(parent)
+            parent.append(len(parent))
+        return department_ids[department]
+
+    index = {task: i for i, task in enumerate(tasks)}
+    for i, task in enumerate(tasks):
+        for dep in task.dependencies:
+            if dep in index:
+                union(i, index[dep])
+        for department in task.durations:
+            union(i, department_id(department))
+    departments_by_name = defaultdict(list)
+    for resource in resources:
+        departments_by_name[resource.name].append(department_id(resource.department))
+    for ids in departments_by_name.values():
+        for other in ids[1:]:
+            union(ids[0], other)
+
+    components = {}
+    for i in range(len(tasks)):
+        components.setdefault(find(i), ([], []))[0].append(i)
+    for i, resource in enumerate(resources):
+        root = find(department_ids[resource.department])
+        if root in components:
+            components[root][1].append(i)
+    return list(components.values())
+
+def schedule_partitioned(sorted_tasks, resources, workers=None, resource_hints=None, priority_policy="list",
+                         placement_policy="first_fit", progress=None, split_tasks=False):
+    """
+    Schedule sorted_tasks like Scheduler.schedule_tasks, with each independent
+    component (see find_components) placed in its own worker process.
+
+    Components keep the heap positions of the full plan, so each worker makes
+    the placements the sequential run would make. The placements are then
+    recorded in the order the sequential run would make them, and each
+    calendar is restored once from its worker, which leaves assignments,
+    task_resource_map, the workloads and the calendars identical to a
+    sequential run. Plans with a single component are scheduled sequentially.
+    progress is called once, after the merge. Returns the Scheduler.
+    """
+    schedule = Scheduler(resources, resource_hints, priority_policy, placement_policy, split_tasks)
+    dependents, in_degree = build_dependency_graph(sorted_tasks)
+    schedule._check_schedulable(sorted_tasks, dependents, in_degree)
+
+    components = find_components(sorted_tasks, resources)
+    workers = min(workers or os.cpu_count() or 1, len(components))
+    if workers < 2:
+        schedule.schedule_tasks(sorted_tasks, progress)
+        return schedule
+
+    position = schedule.heap_positions(sorted_tasks, (dependents, in_degree))
+    # Largest components first, so a big one does not start last
+    components.sort(key=lambda component: -len(component[0]))
+    jobs = [_encode(sorted_tasks, resources, task_indices, resource_indices, position, schedule.resource_hints)
+            for task_indices, resource_indices in components]
+    placements = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        policies = (priority_policy, placement_policy, split_tasks)
+        results = executor.map(_schedule_component, jobs, [policies] * len(jobs))
+        for (task_indices, resource_indices), (component_placements, calendars) in zip(components, results):
+            for i, start_day, end_day, bookings, workloads in component_placements:
+                placements[sorted_tasks[task_indices[i]]] = (
+                    start_day,
+                    end_day,
+                    [(resources[resource_indices[r]], day, work_time) for r, day, work_time in bookings],
+                    [(resources[resource_indices[r]], duration) for r, duration in workloads],
+                )
+            for r, booked_days in enumerate(calendars):
+                resources[resource_indices[r]].availability.restore(booked_days)
+    if metrics.enabled:
+        metrics.count("partition.components", len(components))
+
+    for _, task in schedule.ready_order(sorted_tasks, dependents, in_degree, position):
+        task.start_day, task.end_day, bookings, workloads = placements[task]
+        _record_placement(schedule, task, bookings, workloads)
+    schedule.restore_placements()
+    if progress:
+        progress(len(sorted_tasks), len(sorted_tasks))
+    return schedule
+
+def _record_placement(schedule, task, bookings, workloads):
+    """Add one placement made by a worker to the schedule's bookkeeping; the calendars are restored separately."""
+    for resource, day, work_time in bookings:
+        schedule.assignments[resource.name].append((task, day, work_time))
+        schedule.task_assignments[task].append((resource, day, work_time))
+    for resource, duration in workloads:
+        schedule.resource_workloads[resource.name].append(duration)
+    schedule.task_workloads[task] = workloads
+    schedule.task_resource_map[task.name] = workloads[0][0].name
+    schedule._handle_qc_task(task, workloads[0][0])
+
+def _encode(sorted_tasks, resources, task_indices, resource_indices, position, resource_hints):
+    """Plain-data copy of one component, which pickles cheaply and without deep recursion."""
+    local = {sorted_tasks[i]: j for j, i in enumerate(task_indices)}
+    task_rows = []
+    for i in task_indices:
+        task = sorted_tasks[i]
+        # Dependencies outside the plan are already placed; only the day they end matters
+        external_end = max((dep.end_day for dep in task.dependencies if dep not in local and dep.end_day is not None),
+                           default=None)
+        task_rows.append((task.name, task.durations, task.priority, [local[dep] for dep in task.dependencies if dep in local],
+                          external_end, position[task], task.max_split))
+    resource_rows = [(resources[i].name, resources[i].department, resources[i].availability.booked_days())
+                     for i in resource_indices]
+    hints = {row[0]: resource_hints[row[0]] for row in task_rows if row[0] in resource_hints}
+    return task_rows, resource_rows, hints
+
+def _schedule_component(job, policies):
+    """
+    Schedule one encoded component. Returns its placements, in the order they
+    were made, as (task, start day, end day, [(resource, day, work_time)],
+    [(resource, duration)]) with task and resources as indices into the
+    component, and the booked days of each of its resources.
+    """
+    task_rows, resource_rows, hints = job
+    tasks = [Task(name, durations, priority, max_split=max_split)
+             for name, durations, priority, _, _, _, max_split in task_rows]
+    for task, (_, _, _, dependencies, external_end, _, _) in zip(tasks, task_rows):
+        task.dependencies = [tasks[i] for i in dependencies]
+        if external_end is not None:
+            placed = Task("", {})
+            placed.end_day = external_end
+            task.dependencies.append(placed)
+    resources = []
+    for name, department, booked_days in resource_rows:
+        resource = Resource(name, department)
+        resource.availability.restore(booked_days)
+        resources.append(resource)
+
+    schedule = Scheduler(resources, hints, *policies)
+    schedule.schedule_tasks(tasks, position={task: row[5] for task, row in zip(tasks, task_rows)})
+    task_index = {task: i for i, task in enumerate(tasks)}
+    resource_index = {resource: r for r, resource in enumerate(resources)}
+    placements = [
+        (task_index[task], task.start_day, task.end_day,
+         [(resource_index[resource], day, work_time) for resource, day, work_time in bookings],
+         [(resource_index[resource], duration) for resource, duration in schedule.task_workloads[task]])
+        for task, bookings in schedule.task_assignments.items()
+    ]
+    return placements, [resource.availability.booked_days() for resource in resources]
@@ -0,0 +1,156 @@
+# portfolio.py
+# This file schedules several project workbooks in one run against a shared resource pool, sharing it fairly by project weight.
+
+import heapq
+import os
+import pandas as pd
+from critical_path import task_duration
+from excel_io import build_tasks, load_dependency_rules, load_input, read_resource_sheet, set_up_dependencies
+from instrumentation import metrics
+from main import combine_qc_tasks
+from output_writers import get_writer
+from scheduler import Scheduler
+from utils import open_output_file, topological_sort
+
+# Joins a project's name to its feature names, so features of different projects never share dependencies or QC resources
+PROJECT_SEPARATOR = " / "
+
+class PortfolioScheduler(Scheduler):
+    """
+    Scheduler for the tasks of several projects on one set of resources.
+
+    task_projects maps each task to its project and weights maps each project
+    to its share of the resources; weights also fixes the order of projects.
+    Only the order in which ready tasks are placed differs from Scheduler:
+    see ready_order.
+    """
+
+    def __init__(self, resources, task_projects, weights, priority_policy="list", placement_policy="first_fit",
+                 split_tasks=False):
+        super().__init__(resources, priority_policy=priority_policy, placement_policy=placement_policy,
+                         split_tasks=split_tasks)
+        self.task_projects = task_projects
+        self.weights = weights
+
+    def ready_order(self, sorted_tasks, dependents, unmet_dependencies, position):
+        """
+        Yield (pass, task) like Scheduler.ready_order, with weighted fair
+        queuing across projects.
+
+        Each project has its own ready heap, keyed by (pass, position) as in
+        Scheduler.ready_order. The next task comes from the project with the
+        least virtual time: the days of work placed for it so far divided by
+        its weight. A project whose heap ran empty catches up to the virtual
+        time of the project served last when a task of it becomes ready, so
+        time spent waiting on dependencies is not saved up as credit to crowd
+        the others out later. Ties go to the project listed first.
+        """
+        sweep = self.priority_policy == "list"
+        ready_pass = {}
+        project_order = {project: i for i, project in enumerate(self.weights)}
+        heaps = {project: [] for project in self.weights}
+        virtual_time = dict.fromkeys(self.weights, 0.0)
+        for task in sorted_tasks:
+            if unmet_dependencies[task] == 0:
+                heaps[self.task_projects[task]].append((0, position[task], task))
+        for heap in heaps.values():
+            heapq.heapify(heap)
+
+        while True:
+            waiting = [project for project, heap in heaps.items() if heap]
+            if not waiting:
+                return
+            project = min(waiting, key=lambda project: (virtual_time[project], project_order[project]))
+            now = virtual_time[project]
+            pass_number, index, task = heapq.heappop(heaps[project])
+            yield pass_number, task
+
+            virtual_time[project] += task_duration(task) / self.weights[project]
+            for dependent in dependents[task]:
+                release_pass = pass_number if not sweep or position[dependent] > index else pass_number + 1
+                ready_pass[dependent] = max(ready_pass.get(dependent, 0), release_pass)
+                unmet_dependencies[dependent] -= 1
+                if unmet_dependencies[dependent] == 0:
+                    dependent_project = self.task_projects[dependent]
+                    if not heaps[dependent_project]:
+                        virtual_time[dependent_project] = max(virtual_time[dependent_project], now)
+                    heapq.heappush(heaps[dependent_project], (ready_pass[dependent], position[dependent], dependent))
+                    if metrics.enabled:
+                        metrics.count("schedule_tasks.dependents_released")
+
+def project_name(tasks_file):
+    """A project's name: its workbook's file name without the extension."""
+    return os.path.splitext(os.path.basename(tasks_file))[0]
+
+def load_portfolio(tasks_files, resources_file, rules_file='dependency_rules.json'):
+    """
+    Read the tasks sheet of every project workbook and the resources sheet of
+    resources_file. Feature names are prefixed with the project's name, as in
+    "Department 1: Project A / Feature 3", and the dependency rules apply
+    within each project. Returns the tasks of all projects, with QC tasks
+    combined, the shared resources and a mapping of each task to its project.
+    """
+    names = [project_name(tasks_file) for tasks_file in tasks_files]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Project workbooks need distinct file names; repeated: {', '.join(duplicates)}")
+
+    tasks, task_projects = [], {}
+    for name, tasks_file in zip(names, tasks_files):
+        for task in build_tasks(load_input(tasks_file)):
+            department, feature = task.name.split(": ", 1)
+            task.name = f"{department}: {name}{PROJECT_SEPARATOR}{feature}"
+            task_projects[task] = name
+            tasks.append(task)
+    set_up_dependencies(tasks, load_dependency_rules(rules_file))
+    combine_qc_tasks(tasks)
+    return tasks, read_resource_sheet(resources_file), task_projects
+
+def project_summary(tasks, task_projects, weights):
+    """One row per project with its weight, task count, days of work, first start day and completion day."""
+    rows = {
+        project: {"weight": weight, "tasks": 0, "work_days": 0.0, "start_day": None, "completion_day": 0}
+        for project, weight in weights.items()
+    }
+    for task in tasks:
+        row = rows[task_projects[task]]
+        row["tasks"] += 1
+        row["work_days"] += task_duration(task)
+        row["start_day"] = task.start_day if row["start_day"] is None else min(row["start_day"], task.start_day)
+        row["completion_day"] = max(row["completion_day"], task.end_day)
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    table.index.name = "project"
+    return table
+
+def schedule_portfolio(tasks_files, resources_file, output_file=None, weights=None, rules_file='dependency_rules.json',
+                       output_format=None, analytics=False, priority_policy="list", placement_policy="first_fit",
+                       split_tasks=False, auto_open=False):
+    """
+    Schedule several project workbooks in one run against the resources of
+    resources_file, which every project shares, and write the combined
+    schedule to output_file when given.
+
+    weights gives each project's share, in the order of tasks_files, and
+    defaults to 1 for every project. A project with weight 2 has twice as much
+    work placed as a project with weight 1 while both have tasks ready (see
+    PortfolioScheduler.ready_order), so a large project cannot starve a small
+    one. Returns the schedule and a per-project summary table (see
+    project_summary).
+    """
+    names = [project_name(tasks_file) for tasks_file in tasks_files]
+    weights = list(weights) if weights is not None else [1.0] * len(names)
+    if len(weights) != len(names):
+        raise ValueError(f"Got {len(weights)} weights for {len(names)} projects")
+    if any(weight <= 0 for weight in weights):
+        raise ValueError("Project weights must be positive")
+
+    tasks, resources, task_projects = load_portfolio(tasks_files, resources_file, rules_file)
+    schedule = PortfolioScheduler(resources, task_projects, dict(zip(names, weights)), priority_policy,
+                                  placement_policy, split_tasks)
+    schedule.schedule_tasks(topological_sort(tasks))
+
+    if output_file:
+        get_writer(output_format, output_file, analytics).write(schedule, output_file)
+        if auto_open:
+            open_output_file(output_file)
+    return schedule, project_summary(tasks, task_projects, schedule.weights)
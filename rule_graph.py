@@ -0,0 +1,110 @@
+# rule_graph.py
+# This file keeps department dependency rules acyclic while they are edited, with an incrementally maintained topological order.
+
+class RuleGraph:
+    """
+    Department dependency rules as a directed graph: rules[a] = [b, ...]
+    means department a must be completed before each department b.
+
+    A topological order of the departments is kept up to date as edges are
+    added (Pearce-Kelly), so checking a new edge for a cycle only searches the
+    departments ordered between its two ends, and reordering only touches
+    those. Removing an edge never invalidates the order.
+
+    Loaded rules that already close a cycle are kept as conflicts: they are
+    saved unchanged but left out of the order, and are tried again whenever an
+    edge is removed.
+    """
+
+    def __init__(self, departments, rules=None):
+        rules = rules or {}
+        self.departments = list(dict.fromkeys(
+            list(departments) + list(rules) + [target for targets in rules.values() for target in targets]
+        ))
+        self._order = {department: i for i, department in enumerate(self.departments)}
+        self._successors = {department: set() for department in self.departments}
+        self._predecessors = {department: set() for department in self.departments}
+        self.conflicts = set()  # (source, target) rules that close a cycle
+        for source, targets in rules.items():
+            for target in targets:
+                if self.add(source, target) is not None:
+                    self.conflicts.add((source, target))
+
+    def has_rule(self, source, target):
+        return target in self._successors[source] or (source, target) in self.conflicts
+
+    def add(self, source, target):
+        """
+        Add the rule source -> target. Returns None once it is added, or, if it
+        would close a cycle, the cycle as a list of departments from source
+        back to source, and leaves the rules unchanged.
+        """
+        if source == target:
+            return [source, source]
+        if self.has_rule(source, target):
+            return None
+        lower, upper = self._order[target], self._order[source]
+        if lower < upper:
+            # Departments reachable from target that are ordered before source
+            parent = {target: None}
+            forward, stack = [], [target]
+            while stack:
+                node = stack.pop()
+                forward.append(node)
+                for successor in self._successors[node]:
+                    if successor == source:
+                        path = [node]
+                        while parent[path[-1]] is not None:
+                            path.append(parent[path[-1]])
+                        return [source] + path[::-1] + [source]
+                    if successor not in parent and self._order[successor] < upper:
+                        parent[successor] = node
+                        stack.append(successor)
+
+            # Departments that reach source and are ordered after target
+            seen = {source}
+            backward, stack = [], [source]
+            while stack:
+                node = stack.pop()
+                backward.append(node)
+                for predecessor in self._predecessors[node]:
+                    if predecessor not in seen and self._order[predecessor] > lower:
+                        seen.add(predecessor)
+                        stack.append(predecessor)
+
+            # Both groups move into the slots they held, the backward group first, each keeping its own order
+            backward.sort(key=self._order.get)
+            forward.sort(key=self._order.get)
+            slots = sorted(self._order[node] for node in backward + forward)
+            for node, slot in zip(backward + forward, slots):
+                self._order[node] = slot
+
+        self._successors[source].add(target)
+        self._predecessors[target].add(source)
+        return None
+
+    def remove(self, source, target):
+        """Remove the rule source -> target, then retry the conflicting rules it may have been part of."""
+        if (source, target) in self.conflicts:
+            self.conflicts.discard((source, target))
+            return
+        self._successors[source].discard(target)
+        self._predecessors[target].discard(source)
+        for conflict in sorted(self.conflicts, key=lambda rule: (self._order[rule[0]], self._order[rule[1]])):
+            self.conflicts.discard(conflict)
+            if self.add(*conflict) is not None:
+                self.conflicts.add(conflict)
+
+    def toggle(self, source, target):
+        """Remove the rule if it exists, otherwise add it. Returns the cycle that prevented adding it, if any."""
+        if self.has_rule(source, target):
+            self.remove(source, target)
+            return None
+        return self.add(source, target)
+
+    def rules(self):
+        """Rules in the dependency_rules.json form, with departments and their targets in department order."""
+        return {
+            source: [target for target in self.departments if self.has_rule(source, target)]
+            for source in self.departments
+        }
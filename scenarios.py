@@ -0,0 +1,140 @@
+# scenarios.py
+# This file runs what-if variants of one parsed input in parallel and compares their schedules.
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from analytics import ScheduleAnalytics
+from data_structures import Resource
+from excel_io import build_resources, build_tasks, load_dependency_rules, load_input, set_up_dependencies
+from main import combine_qc_tasks
+from scheduler import Scheduler
+from utils import topological_sort
+
+class Scenario:
+    """
+    One what-if variant of the base input.
+
+    rules: dependency rules to use instead of the base rules, as a dict or the
+        path of a rules JSON file.
+    add_resources: {department: count} of extra resources to add.
+    remove_resources: resource names to drop, or {department: count} to drop
+        that many resources from the end of each department's list.
+    priority_weights: {priority: new priority} applied to every task before
+        sorting, e.g. {3: 1} to treat priority 3 work as urgent.
+    priority_policy, placement_policy: one of scheduler.PRIORITY_POLICIES and
+        scheduler.PLACEMENT_POLICIES.
+    """
+
+    def __init__(self, name, rules=None, add_resources=None, remove_resources=None, priority_weights=None,
+                 priority_policy="list", placement_policy="first_fit"):
+        self.name = name
+        self.rules = rules
+        self.add_resources = add_resources or {}
+        self.remove_resources = remove_resources or []
+        self.priority_weights = {float(priority): weight for priority, weight in (priority_weights or {}).items()}
+        self.priority_policy = priority_policy
+        self.placement_policy = placement_policy
+
+    def __repr__(self):
+        return f"Scenario(name={self.name})"
+
+    def build_tasks(self, parsed):
+        tasks = build_tasks(parsed)
+        if self.priority_weights:
+            for task in tasks:
+                task.priority = self.priority_weights.get(float(task.priority), task.priority)
+        return tasks
+
+    def build_resources(self, parsed):
+        resources = build_resources(parsed)
+        if isinstance(self.remove_resources, dict):
+            for department, count in self.remove_resources.items():
+                in_department = [r for r in resources if r.department == department]
+                for resource in in_department[max(len(in_department) - count, 0):]:
+                    resources.remove(resource)
+        else:
+            removed = set(self.remove_resources)
+            resources = [r for r in resources if r.name not in removed]
+        for department, count in self.add_resources.items():
+            resources.extend(Resource(f"{department} extra {i}", department) for i in range(1, count + 1))
+        return resources
+
+def load_scenarios(filename):
+    """
+    Read scenarios from a JSON list of objects with a "name" and any of the
+    Scenario options. Relative rules paths are resolved against the file.
+    """
+    with open(filename, 'r') as f:
+        entries = json.load(f)
+    scenarios = []
+    for entry in entries:
+        rules = entry.get("rules")
+        if isinstance(rules, str):
+            rules = load_dependency_rules(os.path.join(os.path.dirname(os.path.abspath(filename)), rules))
+        scenarios.append(Scenario(entry["name"], rules, entry.get("add_resources"),
+                                  entry.get("remove_resources"), entry.get("priority_weights"),
+                                  entry.get("priority_policy", "list"), entry.get("placement_policy", "first_fit")))
+    return scenarios
+
+# Set once per worker process by _init_worker, so each scenario only ships its own options
+_parsed = None
+_base_rules = None
+
+def _init_worker(parsed, base_rules):
+    global _parsed, _base_rules
+    _parsed = parsed
+    _base_rules = base_rules
+
+def run_scenario(scenario, parsed=None, base_rules=None):
+    """
+    Schedule one scenario and summarize it. parsed and base_rules default to
+    the ones shared with the worker process. Returns a dict with the scenario's
+    makespan, overall utilization and per-department finish day and utilization.
+    """
+    parsed = parsed if parsed is not None else _parsed
+    base_rules = base_rules if base_rules is not None else _base_rules
+    summary = {"scenario": scenario.name}
+    try:
+        tasks = scenario.build_tasks(parsed)
+        resources = scenario.build_resources(parsed)
+        set_up_dependencies(tasks, scenario.rules if scenario.rules is not None else base_rules)
+        combine_qc_tasks(tasks)
+        schedule = Scheduler(resources, priority_policy=scenario.priority_policy,
+                             placement_policy=scenario.placement_policy)
+        schedule.schedule_tasks(topological_sort(tasks))
+    except Exception as e:
+        summary.update(status="failed", error=f"{type(e).__name__}: {e}")
+        return summary
+
+    analytics = ScheduleAnalytics(schedule)
+    breakdown = analytics.makespan_breakdown()
+    capacity = len(resources) * analytics.makespan
+    summary.update(
+        status="ok",
+        error=None,
+        makespan=analytics.makespan,
+        resources=len(resources),
+        utilization=float(analytics.work_time.sum() / capacity) if capacity else 0.0,
+    )
+    for department, row in breakdown.iterrows():
+        summary[f"{department} finish_day"] = int(row["finish_day"])
+        summary[f"{department} utilization"] = float(row["utilization"])
+    return summary
+
+def run_scenarios(tasks_file, scenarios, rules_file='dependency_rules.json', workers=None):
+    """
+    Parse tasks_file once and schedule every scenario in a process pool.
+    The parsed workbook and base rules are handed to each worker process once,
+    when it starts, rather than with every scenario. Returns a comparison
+    table with one row per scenario, in the given order.
+    """
+    parsed = load_input(tasks_file)
+    base_rules = load_dependency_rules(rules_file)
+    workers = min(workers or os.cpu_count() or 1, max(len(scenarios), 1))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(parsed, base_rules)) as executor:
+        summaries = list(executor.map(run_scenario, scenarios))
+    table = pd.DataFrame(summaries).set_index("scenario")
+    # Outcome columns go last so the metrics line up first
+    return table[[column for column in table.columns if column not in ("status", "error")] + ["status", "error"]]
@@ -0,0 +1,110 @@
+# schedule_index.py
+# This file indexes a finished schedule for fast lookups by resource, day and task.
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+class ScheduleIndex:
+    """
+    Read-only query layer over schedule.assignments, built in one
+    O(n log n) pass.
+
+    Three indexes are kept:
+        per resource - its bookings sorted by day, with the days in a parallel
+                       list for bisection
+        per day      - every booking of that day, with the days in a sorted list
+        per task     - the task's bookings sorted by day, with its total work
+    Bookings are (resource name, task, day, work_time) records and keep the
+    order of schedule.assignments among equal days. Build the index once the
+    schedule is finished; later placements are not seen.
+    """
+
+    def __init__(self, schedule):
+        self.resources = schedule.resources
+        self.resource_names = list(dict.fromkeys([r.name for r in schedule.resources] + list(schedule.assignments)))
+
+        self._resource_bookings = {name: [] for name in self.resource_names}
+        self._day_bookings = defaultdict(list)
+        self._task_bookings = {}
+        self.tasks = []  # Every placed task, in the order it first appears in schedule.assignments
+        for resource_name, assignments in schedule.assignments.items():
+            for task, day, work_time in assignments:
+                booking = (resource_name, task, day, work_time)
+                self._resource_bookings[resource_name].append(booking)
+                self._day_bookings[day].append(booking)
+                if task.name not in self._task_bookings:
+                    self._task_bookings[task.name] = []
+                    self.tasks.append(task)
+                self._task_bookings[task.name].append(booking)
+
+        # Stable sorts keep the assignment order among bookings of the same day
+        self._resource_days = {}
+        for name, bookings in self._resource_bookings.items():
+            bookings.sort(key=lambda booking: booking[2])
+            self._resource_days[name] = [booking[2] for booking in bookings]
+        for bookings in self._task_bookings.values():
+            bookings.sort(key=lambda booking: booking[2])
+        self._task_work = {name: sum(booking[3] for booking in bookings) for name, bookings in self._task_bookings.items()}
+        self.days = sorted(self._day_bookings)
+
+    @property
+    def last_day(self):
+        """The last booked day, or 0 for an empty schedule."""
+        return self.days[-1] if self.days else 0
+
+    def resource_bookings(self, resource_name):
+        """Every booking of a resource, sorted by day."""
+        return self._resource_bookings.get(resource_name, [])
+
+    def resource_on_day(self, resource_name, day):
+        """Bookings of a resource on one day, in O(log n)."""
+        return self.resource_in_range(resource_name, day, day)
+
+    def resource_in_range(self, resource_name, first_day, last_day):
+        """Bookings of a resource from first_day to last_day, sorted by day."""
+        days = self._resource_days.get(resource_name, [])
+        return self._resource_bookings.get(resource_name, [])[bisect_left(days, first_day):bisect_right(days, last_day)]
+
+    def bookings_on_day(self, day):
+        """Every booking of one day, in the order of schedule.assignments."""
+        return self._day_bookings.get(day, [])
+
+    def iter_days(self):
+        """Yield (day, bookings) for every booked day, in day order."""
+        for day in self.days:
+            yield day, self._day_bookings[day]
+
+    def tasks_active(self, first_day, last_day=None):
+        """Tasks with work booked from first_day to last_day (default: first_day only), in first-booking order."""
+        last_day = first_day if last_day is None else last_day
+        active = {}
+        for day in self.days[bisect_left(self.days, first_day):bisect_right(self.days, last_day)]:
+            for _, task, _, _ in self._day_bookings[day]:
+                active.setdefault(task.name, task)
+        return list(active.values())
+
+    def placements(self, task_name):
+        """Bookings of a task, sorted by day."""
+        return self._task_bookings.get(task_name, [])
+
+    def task_span(self, task_name):
+        """(start day, end day, resource names) of a task, or None if it is not placed."""
+        bookings = self._task_bookings.get(task_name)
+        if not bookings:
+            return None
+        return bookings[0][2], bookings[-1][2], list(dict.fromkeys(booking[0] for booking in bookings))
+
+    def task_work(self, task_name):
+        """Total work time booked for a task."""
+        return self._task_work.get(task_name, 0)
+
+    def free_resources(self, first_day, last_day, department=None):
+        """Resources, optionally of one department, with nothing booked from first_day to last_day."""
+        free = []
+        for resource in self.resources:
+            if department is not None and resource.department != department:
+                continue
+            days = self._resource_days.get(resource.name, [])
+            if bisect_left(days, first_day) == bisect_right(days, last_day):
+                free.append(resource)
+        return free
@@ -0,0 +1,138 @@
+# schedule_state.py
+# This file saves and restores a finished schedule so later runs can reschedule incrementally.
+
+import json
+from data_structures import Task, Resource
+from scheduler import Scheduler
+
+STATE_VERSION = 1
+
+def save_state(schedule, tasks, filename):
+    """Write the tasks, resource calendars and every placement of a schedule to a JSON file."""
+    task_index = {task: i for i, task in enumerate(tasks)}
+    resource_index = {resource: i for i, resource in enumerate(schedule.resources)}
+    state = {
+        "version": STATE_VERSION,
+        "resources": [
+            {
+                "name": resource.name,
+                "department": resource.department,
+                "availability": sorted(resource.availability.booked_days().items()),
+            }
+            for resource in schedule.resources
+        ],
+        "tasks": [
+            {
+                "name": task.name,
+                "durations": task.durations,
+                "priority": task.priority,
+                "max_split": task.max_split,
+                "dependencies": [task_index[dep] for dep in task.dependencies],
+                "start_day": task.start_day,
+                "end_day": task.end_day,
+            }
+            for task in tasks
+        ],
+        "assignments": {
+            resource_name: [[task_index[task], day, work_time] for task, day, work_time in assignments]
+            for resource_name, assignments in schedule.assignments.items()
+        },
+        "task_assignments": [
+            [task_index[task], resource_index[resource], day, work_time]
+            for task, entries in schedule.task_assignments.items()
+            for resource, day, work_time in entries
+        ],
+        "task_workloads": [
+            [task_index[task], resource_index[resource], duration]
+            for task, workloads in schedule.task_workloads.items()
+            for resource, duration in workloads
+        ],
+        "resource_workloads": schedule.resource_workloads,
+        "task_resource_map": schedule.task_resource_map,
+        "qc_task_resource_map": schedule.qc_task_resource_map,
+    }
+    with open(filename, 'w') as f:
+        f.write(json.dumps(state))
+
+def load_state(filename):
+    """Rebuild the Scheduler and task list saved by save_state."""
+    with open(filename, 'r') as f:
+        state = json.load(f)
+    if state.get("version") != STATE_VERSION:
+        raise ValueError(f"Unsupported schedule state version in {filename}")
+
+    resources = []
+    for entry in state["resources"]:
+        resource = Resource(entry["name"], entry["department"])
+        resource.availability.restore({day: capacity for day, capacity in entry["availability"]})
+        resources.append(resource)
+
+    tasks = [Task(entry["name"], entry["durations"], entry["priority"], max_split=entry.get("max_split", 1))
+             for entry in state["tasks"]]
+    for task, entry in zip(tasks, state["tasks"]):
+        task.dependencies = [tasks[i] for i in entry["dependencies"]]
+        task.start_day = entry["start_day"]
+        task.end_day = entry["end_day"]
+
+    schedule = Scheduler(resources)
+    for resource_name, assignments in state["assignments"].items():
+        schedule.assignments[resource_name] = [(tasks[i], day, work_time) for i, day, work_time in assignments]
+    for i, r, day, work_time in state["task_assignments"]:
+        schedule.task_assignments[tasks[i]].append((resources[r], day, work_time))
+    for i, r, duration in state["task_workloads"]:
+        schedule.task_workloads.setdefault(tasks[i], []).append((resources[r], duration))
+    for resource_name, workloads in state["resource_workloads"].items():
+        schedule.resource_workloads[resource_name] = list(workloads)
+    schedule.task_resource_map = dict(state["task_resource_map"])
+    schedule.qc_task_resource_map = dict(state["qc_task_resource_map"])
+    schedule.restore_placements()
+    return schedule, tasks
+
+def same_resources(saved_resources, resources):
+    """Whether two resource lists name the same people in the same departments and order."""
+    return ([(resource.name, resource.department) for resource in saved_resources]
+            == [(resource.name, resource.department) for resource in resources])
+
+def _keyed_by_name(tasks):
+    """Key tasks by (name, occurrence) so repeated names still match one to one."""
+    seen = {}
+    for task in tasks:
+        occurrence = seen.get(task.name, 0)
+        seen[task.name] = occurrence + 1
+        yield (task.name, occurrence), task
+
+def merge_task_changes(placed_tasks, new_tasks):
+    """
+    Carry the placed tasks of a saved schedule over to a freshly read task list.
+
+    Tasks are matched by name. Matched tasks keep their placed Task object, with
+    durations, priority, split limit and dependencies updated in place, so their bookings stay
+    attached. Returns the merged task list in the order of new_tasks, the tasks
+    that changed or were added, and the placed tasks that no longer exist.
+    """
+    placed_by_key = dict(_keyed_by_name(placed_tasks))
+    merged = {}
+    changed = []
+    for key, new_task in _keyed_by_name(new_tasks):
+        placed_task = placed_by_key.pop(key, None)
+        if placed_task is None:
+            merged[new_task] = new_task
+            changed.append(new_task)
+        else:
+            merged[new_task] = placed_task
+
+    for new_task, task in merged.items():
+        dependencies = [merged[dep] for dep in new_task.dependencies]
+        if task is not new_task and (
+            task.durations != new_task.durations
+            or task.priority != new_task.priority
+            or task.max_split != new_task.max_split
+            or task.dependencies != dependencies
+        ):
+            task.durations = new_task.durations
+            task.priority = new_task.priority
+            task.max_split = new_task.max_split
+            changed.append(task)
+        task.dependencies = dependencies
+
+    return [merged[task] for task in new_tasks], changed, list(placed_by_key.values())
@@ -1,56 +1,429 @@
 # scheduler.py
 # This file contains the Scheduler class which handles the task scheduling logic.
 
-from data_structures import Schedule
+import heapq
+import math
+from bisect import bisect_left, insort
+from collections import defaultdict, deque
+from critical_path import upward_ranks
+from data_structures import MIN_WORKABLE_CAPACITY, Schedule
+from instrumentation import metrics
+from utils import build_dependency_graph, get_base_task_name
+
+# Number of placements between two calls of the schedule_tasks progress callback
+PROGRESS_INTERVAL = 256
+
+# Order in which ready tasks are placed:
+#   list          - the order of sorted_tasks, swept repeatedly (the original behaviour)
+#   critical_path - by priority, then longest remaining chain of work first
+#   heft          - longest remaining chain of work first, ignoring priority
+PRIORITY_POLICIES = ("list", "critical_path", "heft")
+
+# How a task picks its resource among those of its department:
+#   first_fit - the resource that can start it earliest (the original behaviour)
+#   backfill  - the resource, and gap in its calendar, where the whole task finishes earliest.
+#               Committed bookings never move, so filling a gap cannot delay an earlier-placed task.
+PLACEMENT_POLICIES = ("first_fit", "backfill")
+
+# Work below this is treated as placed, so rounding in capacity sums does not add an empty piece
+SPLIT_TOLERANCE = 1e-9
+
+def check_policies(priority_policy, placement_policy):
+    """Raise ValueError unless both policies are known."""
+    if priority_policy not in PRIORITY_POLICIES:
+        raise ValueError(f"Unknown priority policy '{priority_policy}'. Choose one of: {', '.join(PRIORITY_POLICIES)}")
+    if placement_policy not in PLACEMENT_POLICIES:
+        raise ValueError(f"Unknown placement policy '{placement_policy}'. Choose one of: {', '.join(PLACEMENT_POLICIES)}")
 
 class Scheduler(Schedule):
-    def __init__(self, resources):
+    def __init__(self, resources, resource_hints=None, priority_policy="list", placement_policy="first_fit",
+                 split_tasks=False):
+        check_policies(priority_policy, placement_policy)
         super().__init__(resources)
+        self.priority_policy = priority_policy
+        self.placement_policy = placement_policy
+        self.split_tasks = split_tasks  # Divide tasks with max_split > 1 across resources of their department
+        self.task_workloads = {}  # The (resource, duration) pieces each placed task added to resource_workloads
+        self.resource_hints = resource_hints or {}  # Task name -> resource name to use instead of the greedy pick
+        self._qc_placed = defaultdict(int)
+        self._build_department_index()
+
+    def schedule_tasks(self, sorted_tasks, progress=None, position=None):
+        """
+        Place every task once all of its dependencies have ended.
+
+        Each task keeps a counter of unmet dependencies and placing a task only
+        releases its direct dependents. Ready tasks are popped from a heap keyed
+        by (pass, position in sorted_tasks), which reproduces the placement order
+        of repeatedly sweeping the list: a dependent released by a task earlier
+        in the list is picked up in the same sweep, otherwise in the next one.
+        The critical_path and heft policies replace the sweep with a single
+        ranking by upward rank (see critical_path.upward_ranks).
+
+        progress, if given, is called as progress(placed, total) every
+        PROGRESS_INTERVAL placements and after the last one. An exception it
+        raises aborts the run.
+
+        position, if given, replaces the heap position of every task; the
+        partitioner passes the positions of the full plan to each component.
+        """
+        dependents, unmet_dependencies = build_dependency_graph(sorted_tasks)
+
+        self._check_schedulable(sorted_tasks, dependents, unmet_dependencies)
+
+        if position is None:
+            position = self.heap_positions(sorted_tasks, (dependents, unmet_dependencies))
+
+        placed = 0
+        for pass_number, task in self.ready_order(sorted_tasks, dependents, unmet_dependencies, position):
+            start_day = max((dep.end_day for dep in task.dependencies), default=0) + 1
+            if not self._assign_task(task, start_day):
+                raise Exception(f"Unable to schedule all tasks. No resource could take {task.name}.")
+            if metrics.enabled:
+                metrics.count("schedule_tasks.tasks_placed")
+                metrics.record_max("schedule_tasks.passes", pass_number + 1)
+            placed += 1
+            if progress and (placed % PROGRESS_INTERVAL == 0 or placed == len(sorted_tasks)):
+                progress(placed, len(sorted_tasks))
+
+    def ready_order(self, sorted_tasks, dependents, unmet_dependencies, position):
+        """
+        Yield (pass, task) in placement order, releasing a task's dependents once
+        the caller resumes the generator after placing it. Counts down
+        unmet_dependencies in place.
+        """
+        sweep = self.priority_policy == "list"
+        ready_pass = {}
+        ready = [(0, position[task], task) for task in sorted_tasks if unmet_dependencies[task] == 0]
+        heapq.heapify(ready)
+        while ready:
+            pass_number, index, task = heapq.heappop(ready)
+            yield pass_number, task
+
+            for dependent in dependents[task]:
+                release_pass = pass_number if not sweep or position[dependent] > index else pass_number + 1
+                ready_pass[dependent] = max(ready_pass.get(dependent, 0), release_pass)
+                unmet_dependencies[dependent] -= 1
+                if unmet_dependencies[dependent] == 0:
+                    heapq.heappush(ready, (ready_pass[dependent], position[dependent], dependent))
+                    if metrics.enabled:
+                        metrics.count("schedule_tasks.dependents_released")
+
+    def heap_positions(self, sorted_tasks, graph=None):
+        """
+        Heap position of each task: its index in sorted_tasks under the list
+        policy, otherwise its place in the ranking by upward rank, weighted by
+        department contention.
+        """
+        if self.priority_policy == "list":
+            return {task: index for index, task in enumerate(sorted_tasks)}
+        rank = upward_ranks(sorted_tasks, self.resources, graph)
+        if self.priority_policy == "critical_path":
+            key = lambda index: (sorted_tasks[index].priority, -rank[sorted_tasks[index]], index)
+        else:
+            key = lambda index: (-rank[sorted_tasks[index]], index)
+        ranked = sorted(range(len(sorted_tasks)), key=key)
+        return {sorted_tasks[index]: position for position, index in enumerate(ranked)}
+
+    def reschedule(self, sorted_tasks, changed_tasks, removed_tasks=(), progress=None):
+        """
+        Re-place changed or added tasks and everything downstream of them against
+        the existing calendars, leaving every other placement where it is.
+
+        sorted_tasks is the full plan in scheduling order and removed_tasks are
+        tasks that left the plan, whose bookings are simply given back. Returns
+        the tasks that were re-placed. progress is passed on to schedule_tasks.
+        The tasks to re-place are checked before any booking is given back, so
+        a plan that cannot be scheduled leaves the existing placements intact.
+        """
+        dependents, _ = build_dependency_graph(sorted_tasks)
+        affected = set()
+        stack = [task for task in changed_tasks if task in dependents]
+        while stack:
+            task = stack.pop()
+            if task not in affected:
+                affected.add(task)
+                stack.extend(dependents[task])
+
+        replanned = [task for task in sorted_tasks if task in affected]
+        self._check_schedulable(replanned, *build_dependency_graph(replanned))
+        for task in removed_tasks:
+            self.release_task(task)
+        for task in replanned:
+            self.release_task(task)
+        self.schedule_tasks(replanned, progress)
+        return replanned
+
+    def release_task(self, task):
+        """Give back a task's bookings and its share of the resource workloads."""
+        resources = super().release_task(task)
+        for resource, duration in self.task_workloads.pop(task, []):
+            self.resource_workloads[resource.name].remove(duration)
+            self._update_workload(resource.name, -duration)
+        if resources and "QC" in task.durations:
+            base_task_name = get_base_task_name(task)
+            self._qc_placed[base_task_name] -= 1
+            if not self._qc_placed[base_task_name]:
+                # No QC work of this feature is left, so it may go to any QC resource next time
+                self.qc_task_resource_map.pop(base_task_name, None)
+        return resources
+
+    def restore_placements(self):
+        """Rebuild the resource index and QC bookkeeping after assignments were loaded from saved state."""
+        self._qc_placed = defaultdict(int)
+        for task in self.task_workloads:
+            if "QC" in task.durations:
+                self._qc_placed[get_base_task_name(task)] += 1
+        self._build_department_index()
+
+    def _check_schedulable(self, tasks, dependents, unmet_dependencies):
+        """Reject dependency cycles and tasks that no resource can run before anything is placed."""
+        remaining = dict(unmet_dependencies)
+        queue = deque(task for task in tasks if remaining[task] == 0)
+        visited = 0
+        while queue:
+            task = queue.popleft()
+            visited += 1
+            for dependent in dependents[task]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    queue.append(dependent)
+        if visited != len(tasks):
+            cyclic = [task.name for task in tasks if remaining[task] > 0]
+            raise ValueError(f"Circular dependency detected between: {', '.join(cyclic)}")
 
-    def schedule_tasks(self, sorted_tasks):
-        unassigned_tasks = sorted_tasks[:]
-        
-        while unassigned_tasks:
-            progress_made = False
-            for task in unassigned_tasks[:]:
-                if all(dep.end_day is not None for dep in task.dependencies):
-                    start_day = max((dep.end_day for dep in task.dependencies), default=0) + 1
-                    if self._assign_task(task, start_day):
-                        unassigned_tasks.remove(task)
-                        progress_made = True
-            
-            if not progress_made:
-                raise Exception("Unable to schedule all tasks. Resource constraints or circular dependencies may exist.")
+        departments = {resource.department for resource in self.resources}
+        blocked = [
+            task for task in tasks
+            if not any(dept in departments and duration > 0 for dept, duration in task.durations.items())
+            or any(dep not in unmet_dependencies and dep.end_day is None for dep in task.dependencies)
+        ]
+        if blocked:
+            raise Exception(
+                "Unable to schedule all tasks. No resource can run, or an unscheduled dependency blocks: "
+                + ", ".join(task.name for task in blocked)
+            )
 
     def _assign_task(self, task, start_day):
-        sorted_resources = self._sort_resources(task, start_day)
-        
-        for resource in sorted_resources:
-            if resource.department in task.durations:
-                if self._handle_qc_task(task, resource):
-                    duration = task.durations[resource.department]
-                    available_days = self.find_available_days(resource, duration, start_day)
-                    
-                    if available_days:
-                        self.assign_task_to_resource(task, resource, available_days)
-                        self.resource_workloads[resource.name].append(duration)
-                        self.task_resource_map[task.name] = resource.name
-                        return True
-        return False
-
-    def _sort_resources(self, task, start_day):
-        def resource_sort_key(resource):
-            available_days = self.find_available_days(resource, 1, start_day)
-            if available_days:
-                return available_days[0], sum(self.resource_workloads[resource.name])
+        if self._splittable(task):
+            return self._assign_split_task(task, start_day)
+        return self._assign_whole_task(task, start_day)
+
+    def _assign_whole_task(self, task, start_day):
+        """Place all of task on the one resource _select_resource picks."""
+        resource = self._select_resource(task, start_day)
+        if resource is None or not self._handle_qc_task(task, resource):
+            return False
+
+        duration = task.durations[resource.department]
+        available_days = self.find_available_days(resource, duration, start_day)
+        if not available_days:
+            return False
+
+        self.assign_task_to_resource(task, resource, available_days)
+        self.resource_workloads[resource.name].append(duration)
+        self._update_workload(resource.name, duration)
+        self.task_workloads[task] = [(resource, duration)]
+        self.task_resource_map[task.name] = resource.name
+        if "QC" in task.durations:
+            self._qc_placed[get_base_task_name(task)] += 1
+        return True
+
+    def _splittable(self, task):
+        """Whether task may be divided: splitting is on, the task allows it and is a single non-QC department without a hint."""
+        return (
+            self.split_tasks
+            and task.max_split > 1
+            and len(task.durations) == 1
+            and "QC" not in task.durations
+            and task.name not in self.resource_hints
+        )
+
+    def _assign_split_task(self, task, start_day):
+        """
+        Water-fill a task across up to task.max_split resources of its
+        department so that its last piece ends as early as possible.
+
+        By a given last day, a resource can take at most the capacity of its
+        largest run of workable days from start_day (see
+        AvailabilityCalendar.largest_run). The earliest last day on which the
+        max_split roomiest resources cover the duration is found by bisection,
+        between the day no faster split could beat and the day the best single
+        resource would finish. The roomiest resources then take a piece each,
+        in order of room, workload and position, until the duration is covered,
+        so the task uses as few pieces as that day allows. Should they fall
+        short of it all the same, the task goes whole to one resource instead.
+
+        As in _select_resource, a resource's first workable day of the whole
+        plan bounds when any piece can start on it, so resources that cannot
+        start by a given day are left out without a calendar query.
+        """
+        department, duration = next(iter(task.durations.items()))
+        candidates = []  # (earliest possible start, rank, resource), in (workload, position) order
+        names = set()
+        for _, _, resource in self._department_index.get(department, ()):
+            # A name listed twice in a department is still one person
+            if resource.name not in names:
+                names.add(resource.name)
+                candidates.append((max(start_day, self._first_free_day[resource]), len(candidates), resource))
+        if not candidates:
+            return False
+        candidates.sort(key=lambda candidate: candidate[:2])
+
+        def room(last_day):
+            """The max_split (capacity, -rank, resource) with the most room by last_day, roomiest first."""
+            entries = []
+            for earliest, rank, resource in candidates:
+                if earliest > last_day:
+                    break
+                capacity = resource.availability.largest_run(start_day, last_day)
+                if capacity > 0:
+                    entries.append((capacity, -rank, resource))
+            entries.sort(key=lambda entry: entry[:2], reverse=True)
+            return entries[:task.max_split]
+
+        high = None
+        for earliest, _, resource in candidates:
+            # A window cannot end before its first day plus one day per unit of work
+            if high is not None and earliest + math.ceil(duration) - 1 >= high:
+                break
+            end_day = self.find_available_days(resource, duration, start_day)[-1]
+            if high is None or end_day < high:
+                high = end_day
+        low = start_day + math.ceil(duration / min(task.max_split, len(candidates))) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if sum(capacity for capacity, _, _ in room(middle)) >= duration - SPLIT_TOLERANCE:
+                high = middle
             else:
-                return float('inf'), sum(self.resource_workloads[resource.name])
-        
-        return sorted(self.resources, key=resource_sort_key)
+                low = middle + 1
+
+        pieces = []
+        remaining = duration
+        for capacity, _, resource in room(high):
+            if remaining <= SPLIT_TOLERANCE:
+                break
+            piece = min(capacity, remaining)
+            pieces.append((resource, piece))
+            remaining -= piece
+        if not pieces or remaining > SPLIT_TOLERANCE:
+            return self._assign_whole_task(task, start_day)
+
+        days = []
+        for resource, piece in pieces:
+            available_days = self.find_available_days(resource, piece, start_day)
+            self.assign_task_to_resource(task, resource, available_days, piece)
+            self.resource_workloads[resource.name].append(piece)
+            self._update_workload(resource.name, piece)
+            days.extend((available_days[0], available_days[-1]))
+        task.start_day, task.end_day = min(days), max(days)
+        self.task_workloads[task] = pieces
+        # The resource with the largest piece stands for the task where one name is expected
+        self.task_resource_map[task.name] = pieces[0][0].name
+        if metrics.enabled and len(pieces) > 1:
+            metrics.count("schedule_tasks.tasks_split")
+            metrics.count("schedule_tasks.split_pieces", len(pieces))
+        return True
+
+    def _select_resource(self, task, start_day):
+        """
+        Pick the resource that can start the task earliest, breaking ties by the
+        lowest cumulative workload and then by the order of self.resources.
+        With the backfill placement policy, the resource on which the whole
+        task finishes earliest, wherever the gap that fits it lies.
+
+        Only the task's own departments are searched, in order of workload. The
+        next free day of a resource can never be before its first workable day
+        of the whole plan, so resources that cannot beat the best key found so
+        far are skipped without a calendar query, and the search stops as soon
+        as a resource can take the task from start_day itself. This holds for
+        the backfill probe too, which may fit a sub-day task into a half-day
+        gap. A usable entry of resource_hints for the task takes precedence
+        over all of this.
+        """
+        if metrics.enabled:
+            metrics.count("select_resource.calls")
+        qc_resource_name = None
+        if "QC" in task.durations:
+            qc_resource_name = self.qc_task_resource_map.get(get_base_task_name(task))
+
+        if task.name in self.resource_hints:
+            # A hint is followed when the resource can run the task and keeps the QC work of a feature together
+            hinted_name = self.resource_hints[task.name]
+            if qc_resource_name is None or hinted_name == qc_resource_name:
+                for resource in self._resources_by_name.get(hinted_name, ()):
+                    if task.durations.get(resource.department, 0) > 0:
+                        return resource
+
+        # The list policy compares resources by their next free day; the rank policies by where the
+        # whole task fits, so a short gap early in a calendar does not attract work that cannot use it
+        backfill = self.placement_policy == "backfill"
+        if self.priority_policy == "list" and not backfill:
+            probe_days = dict.fromkeys(task.durations, 1)
+        else:
+            probe_days = task.durations
+
+        best_key, best_resource = None, None
+        for department in task.durations:
+            for workload, position, resource in self._department_index.get(department, ()):
+                if qc_resource_name is not None and resource.name != qc_resource_name:
+                    continue
+                if best_key is not None and (max(start_day, self._first_free_day[resource]), workload, position) >= best_key:
+                    if metrics.enabled:
+                        metrics.count("select_resource.resources_skipped")
+                    continue
+                if metrics.enabled:
+                    metrics.count("select_resource.resources_evaluated")
+                available_days = self.find_available_days(resource, probe_days[department], start_day)
+                if not available_days:
+                    day = float('inf')
+                else:
+                    day = available_days[-1] if backfill else available_days[0]
+                key = (day, workload, position)
+                if best_key is None or key < best_key:
+                    best_key, best_resource = key, resource
+                # Nothing can start before start_day, or finish before its last day if started then
+                if best_key[0] == (start_day + math.ceil(task.durations[department]) - 1 if backfill else start_day):
+                    break
+        return best_resource
+
+    def _build_department_index(self):
+        """Group resources by department, each group ordered by (workload, position)."""
+        self._position = {resource: position for position, resource in enumerate(self.resources)}
+        self._workload_totals = defaultdict(float)
+        self._first_free_day = {}
+        self._resources_by_name = defaultdict(list)
+        self._department_index = defaultdict(list)
+        for resource in self.resources:
+            self._resources_by_name[resource.name].append(resource)
+            self._first_free_day[resource] = self._first_workable_day(resource)
+            workload = sum(self.resource_workloads[resource.name])
+            self._workload_totals[resource.name] = workload
+            insort(self._department_index[resource.department], (workload, self._position[resource], resource))
+
+    def _first_workable_day(self, resource):
+        """
+        First day of the plan with at least MIN_WORKABLE_CAPACITY free. Every
+        booking window lies on workable days, so no window of the resource,
+        however short, can start before it.
+        """
+        return self.find_available_days(resource, MIN_WORKABLE_CAPACITY, 1)[0]
+
+    def _update_workload(self, resource_name, duration):
+        """Move every resource sharing this name to its new place in its department group."""
+        old_workload = self._workload_totals[resource_name]
+        new_workload = old_workload + duration
+        self._workload_totals[resource_name] = new_workload
+        for resource in self._resources_by_name[resource_name]:
+            group = self._department_index[resource.department]
+            position = self._position[resource]
+            del group[bisect_left(group, (old_workload, position))]
+            insort(group, (new_workload, position, resource))
+            self._first_free_day[resource] = self._first_workable_day(resource)
 
     def _handle_qc_task(self, task, resource):
         if "QC" in task.durations:
-            base_task_name = task.name.split(": ")[1].split(" (")[0]
+            base_task_name = get_base_task_name(task)
             if base_task_name in self.qc_task_resource_map:
                 return self.qc_task_resource_map[base_task_name] == resource.name
             else:
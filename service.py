@@ -0,0 +1,378 @@
+# service.py
+# This file runs a local HTTP/JSON service that keeps the parsed input and the last schedule in memory between requests.
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import parse_qs, urlparse
+from data_structures import Task
+from excel_io import build_resources, load_dependency_rules, load_input, set_up_dependencies
+from main import combine_qc_tasks
+from output_writers import get_writer
+from schedule_state import merge_task_changes
+from scheduler import Scheduler
+from utils import topological_sort
+
+# Latencies kept per endpoint for the p50/p99 of the metrics endpoint
+LATENCY_WINDOW = 1000
+
+class SchedulingService:
+    """
+    The state of a long-running scheduling session: the task rows of the
+    loaded workbook with any submitted changes, its resources and rules, and
+    the last schedule. Every method that reads or changes that state takes
+    the same re-entrant lock, so requests handled on concurrent threads see
+    and leave it whole. Placement queries instead read the ScheduleIndex
+    published by the last schedule() call, which is never modified, so they
+    do not wait for a reschedule in progress.
+
+    Task rows are (name, department, duration, priority, max_split), one per
+    duration cell of the tasks sheet, as in excel_io.ParsedInput.
+    """
+
+    def __init__(self, priority_policy="list", placement_policy="first_fit", output_format=None, analytics=False,
+                 split_tasks=False):
+        self.priority_policy = priority_policy
+        self.placement_policy = placement_policy
+        self.split_tasks = split_tasks
+        self.output_format = output_format
+        self.analytics = analytics
+        self._lock = threading.RLock()
+        self._rows = None
+        self._rules = None
+        self._resources = None
+        self._schedule = None
+        self._tasks = []
+        self._index = None
+        self._pending = False
+        self._needs_full = False  # A failed schedule() may have left tasks released, so the next one starts over
+        self._latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self._latency_lock = threading.Lock()
+
+    def load(self, tasks_file, rules_file='dependency_rules.json', priority_policy=None, placement_policy=None):
+        """Read a workbook and its rules and schedule it from scratch."""
+        parsed = load_input(tasks_file)
+        rules = load_dependency_rules(rules_file)
+        with self._lock:
+            self.priority_policy = priority_policy or self.priority_policy
+            self.placement_policy = placement_policy or self.placement_policy
+            self._rows = list(zip(parsed.task_names, parsed.task_departments, parsed.task_durations,
+                                  parsed.task_priorities, parsed.task_max_splits))
+            self._rules = rules
+            self._resources = build_resources(parsed)
+            self._schedule = None
+            return self.schedule(full=True)
+
+    def tasks(self):
+        """The current task rows with their placement, if they have one."""
+        with self._lock:
+            self._check_loaded()
+            placed = {task.name: task for task in self._tasks}
+            return [
+                {
+                    "name": name,
+                    "department": department,
+                    "duration": duration,
+                    "priority": priority,
+                    "max_split": max_split,
+                    "start_day": placed[name].start_day if name in placed else None,
+                    "end_day": placed[name].end_day if name in placed else None,
+                    "resource": self._schedule.task_resource_map.get(name),
+                }
+                for name, department, duration, priority, max_split in self._rows
+            ]
+
+    def submit_tasks(self, tasks=(), remove=()):
+        """
+        Change task rows the way editing the tasks sheet would. Each entry of
+        tasks is a feature row, {"feature", "priority", "max_split", "durations":
+        {department: duration}}, whose durations add or replace that
+        department's task, or drop it when None. remove lists features to drop
+        entirely. The changes are placed by the next call of schedule().
+
+        Every entry is checked before any row changes, so a request with a bad
+        entry raises ValueError and leaves the rows as they were.
+        """
+        with self._lock:
+            self._check_loaded()
+            rows = list(self._rows)
+            position = {}
+            for i, row in enumerate(rows):
+                position.setdefault(row[0], i)
+            for entry in tasks:
+                _check_task_entry(entry, position)
+
+            dropped = set()
+            for entry in tasks:
+                for department, duration in entry["durations"].items():
+                    name = f"{department}: {entry['feature']}"
+                    if duration is None:
+                        dropped.add(name)
+                    elif name in position:
+                        _, _, _, priority, max_split = rows[position[name]]
+                        rows[position[name]] = (name, department, duration, entry.get("priority", priority),
+                                                entry.get("max_split", max_split))
+                    else:
+                        position[name] = len(rows)
+                        rows.append((name, department, duration, entry["priority"], entry.get("max_split", 1)))
+            removed_features = set(remove)
+            self._rows = [
+                row for row in rows
+                if row[0] not in dropped and row[0].split(": ", 1)[1] not in removed_features
+            ]
+            self._pending = True
+            return {"tasks": len(self._rows), "pending": True}
+
+    def schedule(self, full=False):
+        """
+        Place the submitted changes. Only changed tasks and their dependents are
+        re-placed against the existing calendars, as in an incremental run,
+        unless full is set, nothing has been scheduled yet or the last call
+        failed.
+        """
+        with self._lock:
+            self._check_loaded()
+            start = time.perf_counter()
+            new_tasks = [Task(name, {department: duration}, priority, max_split=max_split)
+                         for name, department, duration, priority, max_split in self._rows]
+            set_up_dependencies(new_tasks, self._rules)
+            combine_qc_tasks(new_tasks)
+            try:
+                if full or self._schedule is None or self._needs_full:
+                    for resource in self._resources:
+                        resource.availability.restore({})
+                    tasks = new_tasks
+                    self._schedule = Scheduler(self._resources, priority_policy=self.priority_policy,
+                                               placement_policy=self.placement_policy, split_tasks=self.split_tasks)
+                    self._schedule.schedule_tasks(topological_sort(tasks))
+                    replanned = tasks
+                else:
+                    tasks, changed_tasks, removed_tasks = merge_task_changes(self._tasks, new_tasks)
+                    replanned = self._schedule.reschedule(topological_sort(tasks), changed_tasks, removed_tasks)
+            except Exception:
+                self._needs_full = True
+                raise
+            self._needs_full = False
+            self._tasks = tasks
+            self._index = self._schedule.index()
+            self._pending = False
+            return {
+                "tasks": len(tasks),
+                "replanned": len(replanned),
+                "makespan": self._index.last_day,
+                "seconds": round(time.perf_counter() - start, 6),
+            }
+
+    def placements(self, task=None, resource=None, first_day=None, last_day=None):
+        """
+        Look placements up in the last schedule: a task's span and bookings, a
+        resource's bookings from first_day to last_day, or else the tasks with
+        work booked in that range.
+        """
+        index = self._published_index()
+        if task is not None:
+            span = index.task_span(task)
+            if span is None:
+                raise KeyError(f"Task '{task}' is not placed")
+            return {
+                "task": task,
+                "start_day": span[0],
+                "end_day": span[1],
+                "resources": span[2],
+                "bookings": [_booking(b) for b in index.placements(task)],
+            }
+        first_day = 1 if first_day is None else first_day
+        last_day = index.last_day if last_day is None else last_day
+        if resource is not None:
+            return {"resource": resource, "bookings": [_booking(b) for b in index.resource_in_range(resource, first_day, last_day)]}
+        return {"tasks": [t.name for t in index.tasks_active(first_day, last_day)]}
+
+    def free_resources(self, first_day, last_day, department=None):
+        """Names of the resources with nothing booked from first_day to last_day."""
+        index = self._published_index()
+        return {"resources": [r.name for r in index.free_resources(first_day, last_day, department)]}
+
+    def export(self, output_file, output_format=None, analytics=None):
+        """Write the last schedule with the writer for output_format, or the output file's extension."""
+        with self._lock:
+            self._check_loaded()
+            analytics = self.analytics if analytics is None else analytics
+            get_writer(output_format or self.output_format, output_file, analytics).write(self._schedule, output_file)
+            return {"output_file": output_file}
+
+    def record_latency(self, endpoint, seconds):
+        with self._latency_lock:
+            self._latencies[endpoint].append(seconds)
+
+    def metrics(self):
+        """Request count and p50/p99 latency in milliseconds per endpoint over the last LATENCY_WINDOW requests."""
+        with self._latency_lock:
+            latencies = {endpoint: sorted(values) for endpoint, values in self._latencies.items()}
+        with self._lock:
+            state = {
+                "loaded": self._rows is not None,
+                "tasks": len(self._rows or ()),
+                "pending_changes": self._pending,
+                "makespan": self._index.last_day if self._index else None,
+            }
+        return {
+            "state": state,
+            "endpoints": {
+                endpoint: {
+                    "requests": len(values),
+                    "p50_ms": round(1000 * _percentile(values, 50), 3),
+                    "p99_ms": round(1000 * _percentile(values, 99), 3),
+                }
+                for endpoint, values in latencies.items()
+            },
+        }
+
+    def _published_index(self):
+        index = self._index
+        if index is None:
+            raise ValueError("No workbook loaded. POST /load first.")
+        return index
+
+    def _check_loaded(self):
+        if self._rows is None:
+            raise ValueError("No workbook loaded. POST /load first.")
+
+def _check_task_entry(entry, position):
+    """Raise ValueError unless entry is a feature row submit_tasks can apply; position maps existing task names to rows."""
+    if not isinstance(entry, dict) or not isinstance(entry.get("feature"), str) or not entry["feature"]:
+        raise ValueError(f"Task entry needs a feature name: {entry!r}")
+    durations = entry.get("durations")
+    if not isinstance(durations, dict):
+        raise ValueError(f"Task entry for '{entry['feature']}' needs a durations object")
+    for department, duration in durations.items():
+        if duration is None:
+            continue
+        if isinstance(duration, bool) or not isinstance(duration, (int, float)) or not duration > 0:
+            raise ValueError(f"Duration of {department} for '{entry['feature']}' must be a positive number, "
+                             f"not {duration!r}")
+        if "priority" not in entry and f"{department}: {entry['feature']}" not in position:
+            raise ValueError(f"New task {department}: {entry['feature']} needs a priority")
+    if "priority" in entry and (isinstance(entry["priority"], bool) or not isinstance(entry["priority"], (int, float))):
+        raise ValueError(f"Priority of '{entry['feature']}' must be a number, not {entry['priority']!r}")
+    if "max_split" in entry and (isinstance(entry["max_split"], bool) or not isinstance(entry["max_split"], int)
+                                 or entry["max_split"] < 1):
+        raise ValueError(f"max_split of '{entry['feature']}' must be a whole number of at least 1, "
+                         f"not {entry['max_split']!r}")
+
+def _booking(booking):
+    resource_name, task, day, work_time = booking
+    return {"resource": resource_name, "task": task.name, "day": day, "work_time": float(work_time)}
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, -(-percent * len(sorted_values) // 100) - 1)]
+
+def _int_arg(query, name):
+    return int(query[name][0]) if name in query else None
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """Routes JSON requests to the server's SchedulingService."""
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        endpoint = f"{method} {url.path}"
+        service = self.server.service
+        try:
+            query = parse_qs(url.query)
+            body = self._read_body() if method == "POST" else {}
+            if endpoint == "POST /load":
+                result = service.load(body["tasks_file"], body.get("rules_file", 'dependency_rules.json'),
+                                      body.get("priority_policy"), body.get("placement_policy"))
+            elif endpoint == "GET /tasks":
+                result = service.tasks()
+            elif endpoint == "POST /tasks":
+                result = service.submit_tasks(body.get("tasks", ()), body.get("remove", ()))
+            elif endpoint == "POST /schedule":
+                result = service.schedule(body.get("full", False))
+            elif endpoint == "GET /placements":
+                result = service.placements(query.get("task", [None])[0], query.get("resource", [None])[0],
+                                            _int_arg(query, "first_day"), _int_arg(query, "last_day"))
+            elif endpoint == "GET /free":
+                result = service.free_resources(_int_arg(query, "first_day"), _int_arg(query, "last_day"),
+                                                query.get("department", [None])[0])
+            elif endpoint == "POST /export":
+                result = service.export(body["output_file"], body.get("format"), body.get("analytics"))
+            elif endpoint == "GET /metrics":
+                result = service.metrics()
+            else:
+                self._send(404, {"error": f"Unknown endpoint {endpoint}"})
+                return
+            status = 200
+        except (KeyError, ValueError, TypeError) as e:
+            status, result = 400, {"error": f"{type(e).__name__}: {e}"}
+        except Exception as e:
+            logging.exception("Service request %s failed", endpoint)
+            status, result = 500, {"error": f"{type(e).__name__}: {e}"}
+        self._send(status, result)
+        service.record_latency(endpoint, time.perf_counter() - start)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """ThreadingHTTPServer's counterpart on a Unix domain socket."""
+    daemon_threads = True
+
+    def server_bind(self):
+        UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+def create_server(service, host="127.0.0.1", port=8765, unix_socket=None):
+    """A threading HTTP server for service on host:port, or on unix_socket when given."""
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = UnixHTTPServer(unix_socket, ServiceRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+def serve(service, host="127.0.0.1", port=8765, unix_socket=None):
+    """Serve requests until interrupted."""
+    server = create_server(service, host, port, unix_socket)
+    print(f"Scheduling service listening on {unix_socket or f'http://{host}:{server.server_port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
@@ -0,0 +1,7 @@
+# conftest.py
+# This file puts the repository root on the import path, as the modules live at the top level.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,77 @@
+# test_analytics.py
+# This file checks the vectorized schedule analytics against a small schedule worked out by hand and a plain loop.
+
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from analytics import ScheduleAnalytics
+from data_structures import Resource, Schedule, Task
+from scheduler import Scheduler
+from utils import topological_sort
+from test_scheduler import build_workload
+
+def build_schedule():
+    """Two Dev and two QA resources over five days; Dee never works."""
+    resources = [Resource("Ann", "Dev"), Resource("Bob", "Dev"), Resource("Cy", "QA"), Resource("Dee", "QA")]
+    ann, bob, cy, _ = resources
+    dev1, dev2, dev3 = Task("Dev: F1", {"Dev": 2}), Task("Dev: F2", {"Dev": 0.5}), Task("Dev: F3", {"Dev": 0.5})
+    qa1 = Task("QA: F1", {"QA": 1.5})
+    schedule = Schedule(resources)
+    for task, resource, days in ((dev1, ann, [1, 2]), (dev2, ann, [5]), (dev3, bob, [2]), (qa1, cy, [4, 5])):
+        schedule.assign_task_to_resource(task, resource, days)
+    return schedule
+
+def test_metrics_of_a_known_schedule():
+    analytics = ScheduleAnalytics(build_schedule())
+    assert analytics.makespan == 5
+
+    utilization = analytics.utilization()
+    assert list(utilization.index) == ["Ann", "Bob", "Cy", "Dee"]
+    assert utilization["work_time"].tolist() == [2.5, 0.5, 1.5, 0.0]
+    assert utilization["active_days"].tolist() == [3, 1, 2, 0]
+    assert utilization["first_day"].tolist() == [1, 2, 4, 0]
+    assert utilization["last_day"].tolist() == [5, 2, 5, 0]
+    assert np.allclose(utilization["utilization"], [0.5, 0.1, 0.3, 0.0])
+
+    gaps = analytics.idle_gaps()
+    assert list(zip(gaps["resource"], gaps["start_day"], gaps["end_day"], gaps["length"])) == [
+        ("Ann", 3, 4, 2), ("Bob", 1, 1, 1), ("Bob", 3, 5, 3), ("Cy", 1, 3, 3), ("Dee", 1, 5, 5),
+    ]
+    assert len(analytics.idle_gaps(min_length=3)) == 3
+
+    load = analytics.department_load()
+    assert load["Dev"].tolist() == [1.0, 1.5, 0.0, 0.0, 0.5]
+    assert load["QA"].tolist() == [0.0, 0.0, 0.0, 1.0, 0.5]
+    assert analytics.department_load(normalize=True)["Dev"].tolist() == [0.5, 0.75, 0.0, 0.0, 0.25]
+
+    breakdown = analytics.makespan_breakdown()
+    assert breakdown.loc["Dev", ["resources", "tasks", "work_time", "start_day", "finish_day"]].tolist() == [2, 3, 3.0, 1, 5]
+    assert breakdown.loc["QA", ["resources", "tasks", "work_time", "start_day", "finish_day"]].tolist() == [2, 1, 1.5, 4, 5]
+    assert np.allclose(breakdown["utilization"], [0.3, 0.15])
+    assert breakdown["finishes_last"].tolist() == [True, True]
+
+def test_metrics_match_a_loop_over_assignments():
+    tasks, resources = build_workload(seed=3)
+    schedule = Scheduler(resources, placement_policy="backfill")
+    schedule.schedule_tasks(topological_sort(tasks))
+    analytics = ScheduleAnalytics(schedule)
+
+    makespan = max(day for entries in schedule.assignments.values() for _, day, _ in entries)
+    work, days = defaultdict(float), defaultdict(set)
+    load = pd.DataFrame(0.0, index=range(1, makespan + 1), columns=sorted({r.department for r in resources}))
+    for resource in resources:
+        for task, day, work_time in schedule.assignments[resource.name]:
+            work[resource.name] += work_time
+            days[resource.name].add(day)
+            load.loc[day, resource.department] += work_time
+
+    utilization = analytics.utilization()
+    gaps = analytics.idle_gaps()
+    for resource in resources:
+        row = utilization.loc[resource.name]
+        assert np.isclose(row["work_time"], work[resource.name])
+        assert row["active_days"] == len(days[resource.name])
+        assert (row["first_day"], row["last_day"]) == (min(days[resource.name]), max(days[resource.name]))
+        idle = [day for day in range(1, makespan + 1) if day not in days[resource.name]]
+        assert gaps.loc[gaps["resource"] == resource.name, "length"].sum() == len(idle)
+    assert np.allclose(analytics.department_load()[load.columns].to_numpy(), load.to_numpy())
@@ -0,0 +1,34 @@
+# test_cli.py
+# This file checks that the command line rejects options that would be ignored or contradict each other.
+
+import pytest
+from cli import output_file_for, run_cli
+
+@pytest.mark.parametrize("options, message", [
+    (["--incremental"], "--incremental needs --state"),
+    (["--state", "s.json", "--incremental", "--optimize", "1"], "--optimize only applies to full runs"),
+    (["--state", "s.json", "--incremental", "--partition"], "--partition only applies to full runs"),
+    (["--optimize", "1", "--partition"], "--partition does not apply with --optimize"),
+    (["--restarts", "2"], "--restarts only applies with --optimize"),
+])
+def test_run_rejects_ignored_options(options, message, capsys):
+    with pytest.raises(SystemExit) as error:
+        run_cli(["run", "input.xlsx"] + options)
+    assert error.value.code == 2
+    assert message in capsys.readouterr().err
+
+@pytest.mark.parametrize("output_file, output_format, expected", [
+    (None, None, "output.xlsx"),
+    (None, "csv", "output.csv"),
+    ("schedule.csv", None, "schedule.csv"),
+    ("schedule.JSONL", "jsonl", "schedule.JSONL"),
+])
+def test_output_file_follows_format(output_file, output_format, expected):
+    assert output_file_for(output_file, output_format, "output") == expected
+
+@pytest.mark.parametrize("command", [["run", "input.xlsx"], ["portfolio", "a.xlsx", "--resources", "r.xlsx"]])
+def test_format_mismatching_output_is_rejected(command, capsys):
+    with pytest.raises(SystemExit) as error:
+        run_cli(command + ["-o", "schedule.xlsx", "--format", "csv"])
+    assert error.value.code == 2
+    assert "--format csv writes .csv files" in capsys.readouterr().err
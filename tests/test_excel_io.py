@@ -0,0 +1,82 @@
+# test_excel_io.py
+# This file checks the workbook parsers against the original row-by-row reader and the input cache's invalidation.
+
+import os
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from excel_io import clear_input_cache, load_input
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_input_cache()
+    yield
+    clear_input_cache()
+
+def read_rows_one_by_one(filename):
+    """The tasks and resources of a workbook as the original reader built them, one DataFrame row at a time."""
+    df = pd.read_excel(filename)
+    tasks = []
+    for _, row in df.iterrows():
+        for col in df.columns[2:]:
+            if pd.notna(row[col]):
+                tasks.append((f"{col}: {row.iloc[0]}", col, row[col], row.iloc[1]))
+    resources_df = pd.read_excel(filename, sheet_name="Sheet2")
+    resources = [(name, department) for department in resources_df.columns for name in resources_df[department].dropna()]
+    return list(df.columns[2:]), tasks, resources
+
+def write_workbook(path, seed):
+    rng = random.Random(seed)
+    departments = ["BE API", "Android", "IOS", "QC Creation", "QC execution"]
+    tasks = pd.DataFrame({
+        "Feature": [f"Feature {i}" for i in range(60)],
+        "Priority": [rng.randint(1, 5) for _ in range(60)],
+        **{department: [rng.choice([np.nan, np.nan, 0.5, 1, 2.5, 4]) for _ in range(60)] for department in departments},
+    })
+    resources = pd.DataFrame({department: [f"{department} {i}" if i < rng.randint(1, 3) else None for i in range(3)]
+                              for department in ["BE API", "Android", "IOS", "QC"]})
+    with pd.ExcelWriter(path) as writer:
+        tasks.to_excel(writer, sheet_name="Sheet1", index=False)
+        resources.to_excel(writer, sheet_name="Sheet2", index=False)
+
+def parsed_rows(parsed):
+    tasks = list(zip(parsed.task_names, parsed.task_departments, parsed.task_durations, parsed.task_priorities))
+    return list(parsed.departments), tasks, list(parsed.resources)
+
+@pytest.mark.parametrize("streaming", [False, True])
+@pytest.mark.parametrize("workbook", ["input.xlsx", "generated"])
+def test_parsers_match_row_by_row_reader(workbook, streaming, tmp_path):
+    if workbook == "generated":
+        path = str(tmp_path / "generated.xlsx")
+        write_workbook(path, seed=11)
+    else:
+        path = os.path.join(ROOT, workbook)
+    assert parsed_rows(load_input(path, streaming=streaming)) == read_rows_one_by_one(path)
+
+def test_cache_is_invalidated_when_the_workbook_changes(tmp_path):
+    path = str(tmp_path / "plan.xlsx")
+    write_workbook(path, seed=1)
+    first = load_input(path)
+    assert load_input(path) is first
+
+    # Same contents written again: the new mtime means parsing again, to the same result
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    again = load_input(path)
+    assert again is not first
+    assert parsed_rows(again) == parsed_rows(first)
+
+    # Other contents with the mtime put back: the content hash still tells them apart
+    stat = os.stat(path)
+    write_workbook(path, seed=2)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    changed = load_input(path)
+    assert changed is not again
+    assert parsed_rows(changed) == read_rows_one_by_one(path)
+    assert parsed_rows(changed) != parsed_rows(first)
+
+    # Each sheet selection is cached on its own
+    assert load_input(path, resources_sheet="Sheet1") is not changed
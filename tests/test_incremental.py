@@ -0,0 +1,75 @@
+# test_incremental.py
+# This file checks that an incremental run re-places only changed and added tasks and their dependents.
+
+import os
+import pandas as pd
+import pytest
+from main import main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULES = os.path.join(ROOT, "dependency_rules.json")
+
+def write_workbook(path, tasks, resources):
+    with pd.ExcelWriter(path) as writer:
+        tasks.to_excel(writer, sheet_name="Sheet1", index=False)
+        resources.to_excel(writer, sheet_name="Sheet2", index=False)
+
+def placements(schedule):
+    return {
+        task.name: sorted((resource.name, day, work_time) for resource, day, work_time in entries)
+        for task, entries in schedule.task_assignments.items()
+    }
+
+def run(path, state_file, incremental, **options):
+    return main(str(path), None, auto_open=False, rules_file=RULES, state_file=str(state_file),
+                incremental=incremental, **options)
+
+@pytest.fixture
+def workbook(tmp_path):
+    sheets = pd.read_excel(os.path.join(ROOT, "input.xlsx"), sheet_name=None)
+    return tmp_path, sheets["Sheet1"], sheets["Sheet2"]
+
+def test_only_changed_dependent_and_new_tasks_move(workbook):
+    tmp_path, tasks, resources = workbook
+    write_workbook(tmp_path / "plan.xlsx", tasks, resources)
+    before = placements(run(tmp_path / "plan.xlsx", tmp_path / "state.json", False))
+
+    # A longer BE API task pushes back the Android, IOS and QC execution tasks of its feature
+    feature = tasks.columns[0]
+    tasks.loc[tasks[feature] == "VCN - Listing", "BE API"] = 2.0
+    tasks.loc[len(tasks)] = {feature: "New feature", "Priority": 3, "Android": 1.0}
+    write_workbook(tmp_path / "plan.xlsx", tasks, resources)
+    schedule = run(tmp_path / "plan.xlsx", tmp_path / "state.json", True)
+    after = placements(schedule)
+
+    moved = {"BE API: VCN - Listing", "Android: VCN - Listing", "IOS: VCN - Listing", "QC execution: VCN - Listing",
+             "Android: New feature"}
+    for name, entries in before.items():
+        if name not in moved:
+            assert after[name] == entries, name
+    assert set(after) == set(before) | {"Android: New feature"}
+    assert sum(work_time for _, _, work_time in after["BE API: VCN - Listing"]) == 2.0
+    be_api_end = max(day for _, day, _ in after["BE API: VCN - Listing"])
+    for name in ("Android: VCN - Listing", "IOS: VCN - Listing", "QC execution: VCN - Listing"):
+        assert after[name] != before[name], name
+        assert min(day for _, day, _ in after[name]) > be_api_end, name
+
+def test_changed_resources_schedule_from_scratch(workbook, capsys):
+    tmp_path, tasks, resources = workbook
+    write_workbook(tmp_path / "plan.xlsx", tasks, resources)
+    run(tmp_path / "plan.xlsx", tmp_path / "state.json", False)
+
+    resources.loc[2, "BE API"] = "Nour"
+    write_workbook(tmp_path / "plan.xlsx", tasks, resources)
+    schedule = run(tmp_path / "plan.xlsx", tmp_path / "state.json", True)
+    assert "Scheduling all tasks from scratch" in capsys.readouterr().out
+    assert [resource.name for resource in schedule.resources] == ["George", "Nour", "David", "Bahey", "Mohamed", "Sara",
+                                                                  "Abdullah", "Neyazy", "Ezz"]
+    assert placements(schedule) == placements(run(tmp_path / "plan.xlsx", tmp_path / "fresh.json", False))
+
+def test_unknown_policy_is_rejected_before_rescheduling(workbook):
+    tmp_path, tasks, resources = workbook
+    write_workbook(tmp_path / "plan.xlsx", tasks, resources)
+    run(tmp_path / "plan.xlsx", tmp_path / "state.json", False)
+    with pytest.raises(ValueError, match="Unknown placement policy"):
+        run(tmp_path / "plan.xlsx", tmp_path / "state.json", True, placement_policy="first-fit")
@@ -0,0 +1,60 @@
+# test_partition.py
+# This file checks that scheduling independent components in parallel gives the sequential schedule.
+
+import random
+import pytest
+from data_structures import Resource, Task
+from partition import find_components, schedule_partitioned
+from scheduler import Scheduler
+from utils import topological_sort
+
+def build_plan(seed, groups=3, features=20):
+    """Groups of departments with no tasks or resources in common, each with random dependencies."""
+    rng = random.Random(seed)
+    tasks, resources = [], []
+    for group in range(groups):
+        departments = [f"G{group}D{d}" for d in range(3)] + ["QC" if group == 0 else f"G{group}QC"]
+        for department in departments:
+            resources.extend(Resource(f"{department}-{r}", department) for r in range(rng.randint(1, 3)))
+        group_tasks = [
+            Task(f"{department}: F{group}_{feature}", {department: rng.choice([0.5, 1, 2, 3.5])},
+                 rng.randint(1, 3), max_split=rng.randint(1, 3))
+            for feature in range(features) for department in departments
+        ]
+        for i, task in enumerate(group_tasks[1:], start=1):
+            if rng.random() < 0.5:
+                task.dependencies.append(group_tasks[rng.randrange(i)])
+        tasks.extend(group_tasks)
+    rng.shuffle(resources)
+    return topological_sort(tasks), resources
+
+def snapshot(schedule, tasks):
+    return (
+        {name: [(task.name, day, work_time) for task, day, work_time in entries]
+         for name, entries in schedule.assignments.items()},
+        [(task.name, task.start_day, task.end_day) for task in tasks],
+        {resource.name: resource.availability.booked_days() for resource in schedule.resources},
+        dict(schedule.resource_workloads),
+        dict(schedule.task_resource_map),
+        dict(schedule.qc_task_resource_map),
+        {task.name: [(resource.name, duration) for resource, duration in workloads]
+         for task, workloads in schedule.task_workloads.items()},
+    )
+
+@pytest.mark.parametrize("seed, priority_policy, placement_policy, split_tasks", [
+    (0, "list", "first_fit", False),
+    (1, "critical_path", "backfill", False),
+    (2, "heft", "first_fit", True),
+])
+def test_partitioned_schedule_equals_sequential(seed, priority_policy, placement_policy, split_tasks):
+    tasks, resources = build_plan(seed)
+    sequential = Scheduler(resources, priority_policy=priority_policy, placement_policy=placement_policy,
+                           split_tasks=split_tasks)
+    sequential.schedule_tasks(tasks)
+    expected = snapshot(sequential, tasks)
+
+    tasks, resources = build_plan(seed)
+    assert len(find_components(tasks, resources)) == 3
+    partitioned = schedule_partitioned(tasks, resources, workers=2, priority_policy=priority_policy,
+                                       placement_policy=placement_policy, split_tasks=split_tasks)
+    assert snapshot(partitioned, tasks) == expected
@@ -0,0 +1,59 @@
+# test_portfolio.py
+# This file checks weighted fair queuing across projects and that project workbooks stay apart.
+
+import os
+import shutil
+from data_structures import Resource, Task
+from portfolio import PROJECT_SEPARATOR, PortfolioScheduler, load_portfolio, schedule_portfolio
+from utils import build_dependency_graph, get_base_task_name
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULES = os.path.join(ROOT, "dependency_rules.json")
+
+def test_ready_tasks_are_dispatched_in_proportion_to_weights():
+    tasks, task_projects = [], {}
+    for project, count in (("Alpha", 40), ("Beta", 40), ("Gamma", 5)):
+        for i in range(count):
+            task = Task(f"Dev: {project}{PROJECT_SEPARATOR}F{i}", {"Dev": 1})
+            tasks.append(task)
+            task_projects[task] = project
+    schedule = PortfolioScheduler([Resource("R", "Dev")], task_projects, {"Alpha": 2, "Beta": 1, "Gamma": 1})
+    dependents, unmet_dependencies = build_dependency_graph(tasks)
+    position = schedule.heap_positions(tasks)
+
+    order = [task_projects[task] for _, task in schedule.ready_order(tasks, dependents, unmet_dependencies, position)]
+    # While all three have work ready, every round of four goes 2:1:1
+    for start in range(0, 20, 4):
+        window = order[start:start + 4]
+        assert (window.count("Alpha"), window.count("Beta"), window.count("Gamma")) == (2, 1, 1)
+    # Once Gamma runs out, Alpha and Beta share 2:1
+    window = order[21:60]
+    assert (window.count("Alpha"), window.count("Beta")) == (26, 13)
+    assert sorted(order) == sorted(task_projects.values())
+
+def test_dependencies_and_qc_stay_within_each_project(tmp_path):
+    # Two copies of one workbook: same feature names, different projects
+    tasks_files = []
+    for name in ("Alpha", "Beta"):
+        tasks_files.append(str(tmp_path / f"{name}.xlsx"))
+        shutil.copy(os.path.join(ROOT, "input.xlsx"), tasks_files[-1])
+
+    tasks, resources, task_projects = load_portfolio(tasks_files, tasks_files[0], RULES)
+    assert len(tasks) == 2 * 24
+    assert all(task.name.split(": ", 1)[1].startswith(task_projects[task] + PROJECT_SEPARATOR) for task in tasks)
+    assert all(task_projects[dep] == task_projects[task] for task in tasks for dep in task.dependencies)
+    by_name = {task.name: task for task in tasks}
+    for project in ("Alpha", "Beta"):
+        feature = f"{project}{PROJECT_SEPARATOR}VCN - Listing"
+        assert by_name[f"Android: {feature}"].dependencies == [by_name[f"BE API: {feature}"]]
+
+    schedule, summary = schedule_portfolio(tasks_files, tasks_files[0], rules_file=RULES)
+    qc_resources = {}
+    for task, entries in schedule.task_assignments.items():
+        if "QC" in task.durations:
+            qc_resources.setdefault(get_base_task_name(task), set()).update(resource.name for resource, _, _ in entries)
+    # QC Creation and QC execution of a feature share one QC resource, separately in each project
+    assert len(qc_resources) == 2 * 6
+    assert all(len(names) == 1 for names in qc_resources.values())
+    assert list(summary.index) == ["Alpha", "Beta"]
+    assert summary["tasks"].tolist() == [24, 24]
@@ -0,0 +1,54 @@
+# test_schedule_index.py
+# This file checks every ScheduleIndex query against a scan of schedule.assignments.
+
+import random
+import pytest
+from schedule_index import ScheduleIndex
+from scheduler import Scheduler
+from utils import topological_sort
+from test_scheduler import build_workload
+
+def scan(schedule):
+    """Every booking as (resource name, task, day, work_time), in the order of schedule.assignments."""
+    return [(name, task, day, work_time) for name, entries in schedule.assignments.items()
+            for task, day, work_time in entries]
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_queries_match_a_scan(seed):
+    tasks, resources = build_workload(seed, features=120)
+    schedule = Scheduler(resources, placement_policy="backfill", split_tasks=True)
+    schedule.schedule_tasks(topological_sort(tasks))
+    index = ScheduleIndex(schedule)
+    bookings = scan(schedule)
+    by_day = lambda booking: booking[2]
+    last_day = max(booking[2] for booking in bookings)
+    assert index.last_day == last_day
+
+    rng = random.Random(seed)
+    for _ in range(200):
+        first = rng.randint(0, last_day + 1)
+        last = first + rng.randint(0, 6)
+        resource = rng.choice(resources)
+        department = rng.choice([None, resource.department])
+        own = [booking for booking in bookings if booking[0] == resource.name]
+
+        assert index.resource_in_range(resource.name, first, last) == sorted(
+            [booking for booking in own if first <= booking[2] <= last], key=by_day)
+        assert index.resource_on_day(resource.name, first) == [booking for booking in own if booking[2] == first]
+        assert index.bookings_on_day(first) == [booking for booking in bookings if booking[2] == first]
+        active = {}
+        for booking in sorted(bookings, key=by_day):
+            if first <= booking[2] <= last:
+                active.setdefault(booking[1].name, booking[1])
+        assert index.tasks_active(first, last) == list(active.values())
+        busy = {booking[0] for booking in bookings if first <= booking[2] <= last}
+        assert index.free_resources(first, last, department) == [
+            r for r in resources if r.name not in busy and department in (None, r.department)]
+
+    for task in tasks:
+        own = sorted([booking for booking in bookings if booking[1] is task], key=by_day)
+        assert index.placements(task.name) == own
+        assert index.task_span(task.name) == (own[0][2], own[-1][2], list(dict.fromkeys(b[0] for b in own)))
+        assert index.task_work(task.name) == pytest.approx(sum(booking[3] for booking in own))
+    assert [day for day, _ in index.iter_days()] == sorted({booking[2] for booking in bookings})
+    assert index.task_span("Missing: task") is None
@@ -0,0 +1,62 @@
+# test_scheduler.py
+# This file checks resource selection and split placement against brute-force searches.
+
+import random
+import pytest
+from data_structures import Resource, Task
+from scheduler import Scheduler
+from utils import topological_sort
+
+def build_workload(seed, features=200, departments=4, resources_per_department=3):
+    """Half-day and longer tasks in chains, which leave half-capacity gaps ahead of whole free days."""
+    rng = random.Random(seed)
+    names = [f"A{d}" for d in range(departments)]
+    resources = [Resource(f"{name}-{r}", name) for name in names for r in range(resources_per_department)]
+    tasks = []
+    for feature in range(features):
+        previous = None
+        for name in rng.sample(names, rng.randint(1, departments)):
+            task = Task(f"{name}: F{feature}", {name: rng.choice([0.5, 0.5, 1, 1.5, 2, 3])}, rng.randint(1, 3))
+            if previous is not None:
+                task.dependencies.append(previous)
+            tasks.append(task)
+            previous = task
+    return tasks, resources
+
+class CheckedScheduler(Scheduler):
+    """Compares every pick of _select_resource with an evaluation of every resource of the department."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wrong_picks = []
+
+    def _select_resource(self, task, start_day):
+        chosen = super()._select_resource(task, start_day)
+        backfill = self.placement_policy == "backfill"
+        probe_days = task.durations if self.priority_policy != "list" or backfill else dict.fromkeys(task.durations, 1)
+        keys = {}
+        for department in task.durations:
+            for workload, position, resource in self._department_index[department]:
+                days = self.find_available_days(resource, probe_days[department], start_day)
+                keys[resource] = ((days[-1] if backfill else days[0]), workload, position)
+        if keys[chosen] != min(keys.values()):
+            self.wrong_picks.append(task.name)
+        return chosen
+
+@pytest.mark.parametrize("priority_policy", ["list", "critical_path", "heft"])
+@pytest.mark.parametrize("placement_policy", ["first_fit", "backfill"])
+def test_select_resource_matches_brute_force(priority_policy, placement_policy):
+    tasks, resources = build_workload(seed=7)
+    schedule = CheckedScheduler(resources, priority_policy=priority_policy, placement_policy=placement_policy)
+    schedule.schedule_tasks(topological_sort(tasks))
+    assert schedule.wrong_picks == []
+
+def test_split_task_fits_half_day_gap():
+    resource = Resource("A-0", "A")
+    for day in range(1, 59):
+        resource.availability.book(day, 0.5 if day == 4 else 1)
+    task = Task("A: F1", {"A": 0.5}, max_split=3)
+    schedule = Scheduler([resource], split_tasks=True)
+    schedule.schedule_tasks([task])
+    assert (task.start_day, task.end_day) == (4, 4)
+    assert schedule.task_workloads[task] == [(resource, 0.5)]
@@ -0,0 +1,62 @@
+# test_service.py
+# This file checks that the scheduling service rejects bad changes whole and recovers from a failed schedule.
+
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from service import SchedulingService, create_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_service():
+    service = SchedulingService()
+    loaded = service.load(os.path.join(ROOT, "input.xlsx"), os.path.join(ROOT, "dependency_rules.json"))
+    return service, loaded
+
+@pytest.mark.parametrize("bad_entry", [
+    {"feature": "New feature", "durations": {"IOS": 2}},
+    {"feature": "VCN - Listing", "durations": {"IOS": "abc"}},
+    {"feature": "VCN - Listing", "durations": {"IOS": 0}},
+    {"feature": "VCN - Listing", "max_split": 0, "durations": {"IOS": 2}},
+    {"feature": "VCN - Listing", "max_split": 1.5, "durations": {"IOS": 2}},
+    {"durations": {"IOS": 2}},
+])
+def test_bad_entry_changes_no_row(bad_entry):
+    service, _ = load_service()
+    before = service.tasks()
+    with pytest.raises(ValueError):
+        service.submit_tasks([{"feature": "VCN - Deletion", "durations": {"IOS": 9}}, bad_entry])
+    assert service.tasks() == before
+    assert service.schedule()["replanned"] == 0
+
+def test_bad_entry_is_a_client_error():
+    service, _ = load_service()
+    server = create_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        body = json.dumps({"tasks": [{"feature": "VCN - Listing", "durations": {"IOS": "abc"}}]}).encode()
+        request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}/tasks", data=body, method="POST")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        assert error.value.code == 400
+        assert "positive number" in json.loads(error.value.read())["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_failed_schedule_leaves_no_task_unplaced():
+    service, loaded = load_service()
+
+    # No resource works in Design, so this change cannot be placed, and the BE API
+    # task it comes with would have been given back along with its dependents
+    service.submit_tasks([{"feature": "VCN - Listing", "priority": 2, "durations": {"BE API": 2, "Design": 2}}])
+    with pytest.raises(Exception, match="Unable to schedule all tasks"):
+        service.schedule()
+
+    service.submit_tasks([{"feature": "VCN - Listing", "durations": {"Design": None}}])
+    result = service.schedule()
+    assert result["tasks"] == loaded["tasks"]
+    assert all(row["start_day"] is not None for row in service.tasks())
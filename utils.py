@@ -4,66 +4,61 @@
 from collections import deque
 import sys
 import os
+import platform
 
-def calculate_total_duration(task, task_duration_map, graph, memo):
-    """
-    Recursively calculate the total duration of a task including its dependencies.
-    Uses memoization to optimize performance for tasks with shared dependencies.
+def get_base_task_name(task):
+    """Return the feature part of a "<department>: <feature>" task name."""
+    return task.name.split(": ")[1].split(" (")[0]
+
+def build_dependency_graph(tasks):
     """
-    if task.name in memo:
-        return memo[task.name]
-    
-    total_duration = task.durations.get(task.name, 0)
-    for dep in task.dependencies:
-        dep_task = next((t for t in graph if t.name == dep), None)
-        if dep_task:
-            dep_duration = calculate_total_duration(dep_task, task_duration_map, graph, memo)
-            total_duration = max(total_duration, dep_duration)
-    
-    memo[task.name] = total_duration
-    return total_duration
-
-def topological_sort(tasks):
+    Index the dependency edges between tasks in a single O(n + e) pass.
+    Returns a mapping of each task to the tasks that depend on it and the
+    number of dependencies of each task that are part of tasks.
     """
-    Perform a topological sort of tasks and then sort them by priority.
-    In case of equal priorities, sort by total duration.
-    """
-    graph = {task: set() for task in tasks}
-    in_degree = {task: 0 for task in tasks}
-    task_durations = {task.name: task.durations for task in tasks}
-    
-    # Build the graph and calculate in-degrees
+    dependents = {task: [] for task in tasks}
+    in_degree = dict.fromkeys(tasks, 0)
     for task in tasks:
         for dep in task.dependencies:
-            dep_task = next((t for t in tasks if t.name == dep), None)
-            if dep_task:
-                graph[dep_task].add(task)
+            if dep in dependents:
+                dependents[dep].append(task)
                 in_degree[task] += 1
-    
+    return dependents, in_degree
+
+def topological_sort(tasks, graph=None):
+    """
+    Perform a topological sort of tasks and then sort them by priority.
+    In case of equal priorities, tasks heading the longest remaining chain of
+    work (see critical_path.longest_remaining_paths) come first.
+    A graph prebuilt with build_dependency_graph can be passed in to skip rebuilding it.
+    """
+    # Imported here because critical_path builds on this module
+    from critical_path import longest_remaining_paths, task_duration
+
+    dependents, in_degree = graph or build_dependency_graph(tasks)
+    in_degree = dict(in_degree)
+
     # Perform topological sort
     queue = deque([task for task in tasks if in_degree[task] == 0])
     result = []
-    memo = {}
-    
+
     while queue:
         task = queue.popleft()
         result.append(task)
-        for dependent in graph[task]:
+        for dependent in dependents[task]:
             in_degree[dependent] -= 1
             if in_degree[dependent] == 0:
                 queue.append(dependent)
-    
+
     if len(result) != len(tasks):
         raise ValueError("Circular dependency detected")
-    
-    # Calculate total durations
-    task_duration_map = {}
-    for task in result:
-        task_duration_map[task] = calculate_total_duration(task, task_durations, graph, memo)
-    
-    # Sort tasks by priority (ascending), and by total duration in case of equal priorities
-    result.sort(key=lambda t: (t.priority, -task_duration_map[t]))
-    
+
+    # Longest remaining path of each task, in one pass over the reversed order
+    remaining = longest_remaining_paths(reversed(result), dependents, task_duration)
+
+    # Sort tasks by priority (ascending), and by remaining path in case of equal priorities
+    result.sort(key=lambda t: (t.priority, -remaining[t]))
+
     return result
 
 
@@ -75,4 +70,15 @@ def resource_path(relative_path):
     except Exception:
         base_path = os.path.abspath(".")
 
-    return os.path.join(base_path, relative_path)
\ No newline at end of file
+    return os.path.join(base_path, relative_path)
+
+
+def open_output_file(filename):
+    """Open a generated file with the platform's default application."""
+    # Use platform-specific commands to open the file automatically
+    if platform.system() == "Windows":
+        os.startfile(filename)
+    elif platform.system() == "Darwin":  # macOS
+        os.system("open " + filename)
+    else:
+        print(f"Warning: Automatic opening not supported for your platform. Please open {filename} manually.")
\ No newline at end of file
@@ -0,0 +1,84 @@
+# worker.py
+# This file runs scheduling jobs on a long-lived background thread that reports progress and can be cancelled.
+
+import logging
+import queue
+import threading
+import time
+
+class RunCancelled(Exception):
+    """Raised inside a run, at its next progress report, once the run has been cancelled."""
+
+class SchedulerWorker:
+    """
+    A daemon thread that runs main.main for submitted jobs, one at a time.
+
+    The thread, the modules it imported and the parsed-input cache of excel_io
+    stay alive between jobs, so repeated runs reuse an already-warm worker.
+    Results are put on the events queue for the caller (the Tk loop) to poll:
+        ("progress", job_id, stage, done, total, elapsed)
+        ("done", job_id, elapsed, schedule)
+        ("cancelled", job_id, elapsed)
+        ("error", job_id, message)
+    """
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self._jobs = queue.Queue()
+        self._cancel_events = {}
+        self._next_job_id = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="scheduler-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, tasks_file, output_file, **options):
+        """Queue a run of main.main(tasks_file, output_file, **options) and return its job id. output_file may be None."""
+        with self._lock:
+            self._next_job_id += 1
+            job_id = self._next_job_id
+            self._cancel_events[job_id] = threading.Event()
+        self._jobs.put((job_id, tasks_file, output_file, options))
+        return job_id
+
+    def cancel(self, job_id):
+        """Ask a queued or running job to stop. A running job stops at its next progress report."""
+        with self._lock:
+            cancel_event = self._cancel_events.get(job_id)
+        if cancel_event:
+            cancel_event.set()
+
+    def stop(self):
+        """Let the thread exit once the queued jobs are done."""
+        self._jobs.put(None)
+
+    def _run(self):
+        # Import the pipeline here so the first run does not pay for it
+        from main import main
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            job_id, tasks_file, output_file, options = job
+            with self._lock:
+                cancel_event = self._cancel_events[job_id]
+            start = time.perf_counter()
+
+            def progress(stage, done, total):
+                if cancel_event.is_set():
+                    raise RunCancelled()
+                self.events.put(("progress", job_id, stage, done, total, time.perf_counter() - start))
+
+            try:
+                if cancel_event.is_set():
+                    raise RunCancelled()
+                schedule = main(tasks_file, output_file, progress=progress, **options)
+                self.events.put(("done", job_id, time.perf_counter() - start, schedule))
+            except RunCancelled:
+                self.events.put(("cancelled", job_id, time.perf_counter() - start))
+            except Exception as e:
+                logging.exception("An error occurred while running the scheduler")
+                self.events.put(("error", job_id, str(e)))
+            finally:
+                with self._lock:
+                    del self._cancel_events[job_id]
@@ -0,0 +1,97 @@
+# workload_generator.py
+# This file generates synthetic input workbooks and dependency rules for benchmarking the scheduler.
+
+import argparse
+import json
+import random
+import pandas as pd
+
+# Relative weights of priorities 1, 2 and 3
+PRIORITY_DISTRIBUTIONS = {
+    "uniform": [1, 1, 1],
+    "skewed": [1, 3, 6],
+    "urgent": [6, 3, 1],
+    "single": [1, 0, 0],
+}
+
+DURATION_CHOICES = [0.5, 1, 1.5, 2, 3, 5]
+
+def generate_departments(n_departments, include_qc=True):
+    """Name the department columns of the tasks sheet; with include_qc the last two are the QC columns."""
+    if include_qc:
+        return [f"Department {i}" for i in range(1, max(n_departments - 2, 0) + 1)] + ["QC Creation", "QC execution"]
+    return [f"Department {i}" for i in range(1, n_departments + 1)]
+
+def generate_rules(departments, rule_density, rng):
+    """
+    Create dependency rules shaped like dependency_rules.json: each department
+    may have to finish before any department to its right, and every feature's
+    work has to finish before its QC execution.
+    """
+    rules = {}
+    work_departments = [d for d in departments if not d.startswith("QC")]
+    for i, department in enumerate(work_departments):
+        dependents = [later for later in work_departments[i + 1:] if rng.random() < rule_density]
+        if "QC execution" in departments:
+            dependents.append("QC execution")
+        if dependents:
+            rules[department] = dependents
+    if "QC Creation" in departments:
+        rules["QC Creation"] = ["QC execution"]
+    return rules
+
+def generate_workload(n_tasks, n_departments, n_resources, priority_distribution="uniform",
+                      rule_density=0.3, fill_rate=0.8, include_qc=True, seed=0):
+    """
+    Build a synthetic workload with n_tasks base tasks (feature rows).
+    Returns the tasks sheet, the resources sheet and the dependency rules.
+    """
+    rng = random.Random(seed)
+    departments = generate_departments(n_departments, include_qc)
+    weights = PRIORITY_DISTRIBUTIONS[priority_distribution]
+
+    rows = []
+    for i in range(n_tasks):
+        row = {"Feature": f"Feature {i}", "Priority": rng.choices([1, 2, 3], weights=weights)[0]}
+        for department in departments:
+            row[department] = rng.choice(DURATION_CHOICES) if rng.random() < fill_rate else None
+        if all(row[department] is None for department in departments):
+            row[rng.choice(departments)] = rng.choice(DURATION_CHOICES)
+        rows.append(row)
+    tasks_df = pd.DataFrame(rows, columns=["Feature", "Priority"] + departments)
+
+    # QC Creation and QC execution tasks both run on the QC resources
+    resource_departments = list(dict.fromkeys("QC" if d.startswith("QC") else d for d in departments))
+    columns = {department: [] for department in resource_departments}
+    for i in range(max(n_resources, len(resource_departments))):
+        department = resource_departments[i % len(resource_departments)]
+        columns[department].append(f"Resource {i + 1}")
+    resources_df = pd.DataFrame({d: pd.Series(names, dtype=object) for d, names in columns.items()})
+
+    return tasks_df, resources_df, generate_rules(departments, rule_density, rng)
+
+def write_workload(path, rules_path, n_tasks, n_departments, n_resources, **options):
+    """Write a synthetic workbook to path and its dependency rules to rules_path."""
+    tasks_df, resources_df, rules = generate_workload(n_tasks, n_departments, n_resources, **options)
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        tasks_df.to_excel(writer, sheet_name="Sheet1", index=False)
+        resources_df.to_excel(writer, sheet_name="Sheet2", index=False)
+    with open(rules_path, 'w') as f:
+        json.dump(rules, f, indent=4)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic scheduling workbook and dependency rules.")
+    parser.add_argument("output", help="Workbook to write.")
+    parser.add_argument("--rules-output", default="synthetic_rules.json")
+    parser.add_argument("--tasks", type=int, default=1000, help="Number of base tasks (feature rows).")
+    parser.add_argument("--departments", type=int, default=8)
+    parser.add_argument("--resources", type=int, default=40)
+    parser.add_argument("--priorities", choices=list(PRIORITY_DISTRIBUTIONS), default="uniform")
+    parser.add_argument("--rule-density", type=float, default=0.3)
+    parser.add_argument("--fill-rate", type=float, default=0.8, help="Share of department cells that hold a duration.")
+    parser.add_argument("--no-qc", action="store_true", help="Leave out the QC Creation and QC execution columns.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_workload(args.output, args.rules_output, args.tasks, args.departments, args.resources,
+                   priority_distribution=args.priorities, rule_density=args.rule_density,
+                   fill_rate=args.fill_rate, include_qc=not args.no_qc, seed=args.seed)